@@ -1,7 +1,7 @@
 from typing import List, Dict, Any, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from src.state import InvestigatorState, Document, Fact
-from src.utils import get_llm_with_retry, get_json_parser, smart_truncate, rate_limiter
+from src.utils import get_llm_with_retry, get_json_parser, smart_truncate, rate_limited, batch_config
 from pydantic import BaseModel, Field
 
 # --- Document Analyst ---
@@ -32,30 +32,32 @@ def document_analyst(state: InvestigatorState) -> Dict[str, Any]:
         """
     )
 
-    chain = prompt | llm | parser
+    chain = rate_limited(prompt | llm | parser)
 
-    updated_documents = []
     errors = []
-
-    for doc in state["documents"]:
-        rate_limiter.wait()
-        # If already analyzed, skip
-        if doc.get("analysis"):
-            updated_documents.append(doc)
-            continue
-
-        try:
-            result = chain.invoke({
-                "content": smart_truncate(doc["content"], 4000),
-                "format_instructions": parser.get_format_instructions()
-            })
-            doc["analysis"] = result
-        except Exception as e:
-            print(f"Error analyzing document {doc['id']}: {e}")
-            doc["analysis"] = {"error": str(e)}
-            errors.append({"agent": "document_analyst", "error": f"Failed to analyze {doc['id']}: {e}"})
-
-        updated_documents.append(doc)
+    # Already analyzed documents are skipped; the rest run as one bounded-concurrency batch
+    pending = [doc for doc in state["documents"] if not doc.get("analysis")]
+    if pending:
+        results = chain.batch(
+            [
+                {
+                    "content": smart_truncate(doc["content"], 4000),
+                    "format_instructions": parser.get_format_instructions()
+                }
+                for doc in pending
+            ],
+            config=batch_config(),
+            return_exceptions=True,
+        )
+        for doc, result in zip(pending, results):
+            if isinstance(result, Exception):
+                print(f"Error analyzing document {doc['id']}: {result}")
+                doc["analysis"] = {"error": str(result)}
+                errors.append({"agent": "document_analyst", "error": f"Failed to analyze {doc['id']}: {result}"})
+            else:
+                doc["analysis"] = result
+
+    updated_documents = list(state["documents"])
 
     result = {"documents": updated_documents}
     if errors:
@@ -102,31 +104,47 @@ def entity_fact_extractor(state: InvestigatorState) -> Dict[str, Any]:
         """
     )
 
-    chain = prompt | llm | parser
+    chain = rate_limited(prompt | llm | parser)
 
-    all_facts = []
-    all_entities = set()
-    errors = []
-
-    for doc in state["documents"]:
-        try:
-            print(f"--- Deep Extracting Facts from {doc['id']} ---")
-            rate_limiter.wait()
-            result = chain.invoke({
+    documents = state["documents"]
+    print(f"--- Deep Extracting Facts from {len(documents)} documents ---")
+    results = chain.batch(
+        [
+            {
                 "doc_id": doc["id"],
                 "content": smart_truncate(doc["content"], 6000),
                 "format_instructions": parser.get_format_instructions()
-            })
+            }
+            for doc in documents
+        ],
+        config=batch_config(),
+        return_exceptions=True,
+    )
 
+    # batch() returns results in input order, so facts follow document order
+    # whichever call finishes first
+    all_facts = []
+    all_entities = {}
+    errors = []
+
+    for doc, result in zip(documents, results):
+        if isinstance(result, Exception):
+            print(f"Error in deep extraction for {doc['id']}: {result}")
+            errors.append({"agent": "entity_fact_extractor", "error": f"Failed on {doc['id']}: {result}"})
+            continue
+
+        try:
             # Map result to state format
             extracted_facts = result.facts if hasattr(result, "facts") else result.get("facts", [])
 
-            for f in extracted_facts:
+            # Ids are scoped to their document, so a failure on one document
+            # does not renumber the facts of the others
+            for i, f in enumerate(extracted_facts):
                 # Handle both Pydantic and raw dict if parser varied
                 f_dict = f.dict() if hasattr(f, "dict") else f
 
                 fact_entry = {
-                    "id": f"fact_{len(all_facts)}",
+                    "id": f"fact_{doc['id']}_{i}",
                     "source_doc_id": doc["id"],
                     "source_quote": f_dict.get("source_quote", ""),
                     "description": f_dict.get("description", ""),
@@ -135,13 +153,14 @@ def entity_fact_extractor(state: InvestigatorState) -> Dict[str, Any]:
                     "confidence": f_dict.get("confidence", 1.0)
                 }
                 all_facts.append(fact_entry)
+                # Ordered de-duplication keeps the entity list stable across runs
                 for ent in f_dict.get("entities", []):
                     if isinstance(ent, str):
-                        all_entities.add(ent)
+                        all_entities[ent] = None
                     elif isinstance(ent, dict):
-                        all_entities.add(ent.get("name", str(ent)))
+                        all_entities[ent.get("name", str(ent))] = None
                     else:
-                        all_entities.add(str(ent))
+                        all_entities[str(ent)] = None
 
         except Exception as e:
             print(f"Error in deep extraction for {doc['id']}: {e}")
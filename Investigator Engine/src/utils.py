@@ -1,6 +1,7 @@
 import os
 import time
 import logging
+import threading
 from typing import List, Dict, Any, Optional
 
 from langchain_openai import ChatOpenAI
@@ -157,21 +158,43 @@ class AdaptiveRateLimiter:
     def __init__(self):
         self._delay = float(os.getenv("LLM_RATE_LIMIT_SECONDS", "2"))
         self._last_call = 0.0
+        self._lock = threading.Lock()
 
     def wait(self):
-        """Wait the configured delay between LLM calls."""
-        now = time.time()
-        elapsed = now - self._last_call
-        if elapsed < self._delay:
-            sleep_time = self._delay - elapsed
+        """Wait the configured delay between LLM calls (thread-safe: each caller reserves its own slot)."""
+        with self._lock:
+            now = time.time()
+            start = max(now, self._last_call + self._delay)
+            self._last_call = start
+        if start > now:
+            sleep_time = start - now
             logger.debug(f"Rate limiter: sleeping {sleep_time:.1f}s")
             time.sleep(sleep_time)
-        self._last_call = time.time()
 
 
 # Global rate limiter instance
 rate_limiter = AdaptiveRateLimiter()
 
+# Per-document chains run as one batch with at most this many LLM calls in flight
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+
+def batch_config() -> Dict[str, Any]:
+    """RunnableConfig for chain.batch() fan-out over documents."""
+    return {"max_concurrency": LLM_MAX_CONCURRENCY}
+
+
+def rate_limited(chain):
+    """
+    The chain with rate_limiter.wait() before every invocation, so calls
+    fanned out by batch() still start LLM_RATE_LIMIT_SECONDS apart.
+    """
+    def _wait(inputs):
+        rate_limiter.wait()
+        return inputs
+
+    return RunnableLambda(_wait) | chain
+
 
 # ============================================================
 # LLM Provider Setup
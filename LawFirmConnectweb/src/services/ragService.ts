@@ -19,16 +19,142 @@ const getAuthHeaders = () => {
   return {};
 };
 
+// Files above this size go through the resumable upload protocol
+const RESUMABLE_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+const UPLOAD_PART_CONCURRENCY = 3;
+// localStorage entries mapping a file to its unfinished upload, so a retry resumes it
+const UPLOAD_RESUME_KEY_PREFIX = "resumableUpload:";
+
+const resumeKey = (caseId: string, file: File) =>
+  `${UPLOAD_RESUME_KEY_PREFIX}${caseId}:${file.name}:${file.size}:${file.lastModified}`;
+
+const sha256Hex = async (file: File) => {
+  const digest = await crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, "0"))
+    .join("");
+};
+
+const putWithRetry = async (url: string, body: Blob, retries = 5) => {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await axios.put(url, body, {
+        headers: { "Content-Type": "application/octet-stream", ...getAuthHeaders() },
+      });
+    } catch (error: any) {
+      const status = error?.response?.status;
+      // Network drops have no status; retry those and server errors
+      if ((status === undefined || status >= 500) && attempt < retries) {
+        await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** (attempt - 1)));
+        continue;
+      }
+      throw error;
+    }
+  }
+};
+
 const ragService = {
+  /**
+   * Uploads a file in parts that survive dropped connections. The content
+   * hash is sent first, so a file the server already has is not transferred.
+   * An interrupted upload of the same file (case, name, size, modification
+   * time) is resumed from the parts the server already has; pass uploadId
+   * to resume a specific one. isScanned forces OCR on every low-text page.
+   */
+  uploadResumable: async (
+    caseId: string,
+    file: File,
+    sessionId?: string,
+    onProgress?: (fraction: number) => void,
+    uploadId?: string,
+    isScanned = false,
+  ) => {
+    const key = resumeKey(caseId, file);
+    uploadId = uploadId || localStorage.getItem(key) || undefined;
+    let partSize = 0;
+    let pending: number[] = [];
+    if (uploadId) {
+      try {
+        const status = await axios.get(`${RAG_API_URL}/uploads/${uploadId}`, {
+          headers: getAuthHeaders(),
+        });
+        if (status.data.status === "uploading") {
+          partSize = status.data.partSize;
+          pending = status.data.missingParts;
+        } else {
+          uploadId = undefined;
+        }
+      } catch (error: any) {
+        // Expired or unknown session: start over; anything else is a real failure
+        if (![403, 404].includes(error?.response?.status)) throw error;
+        uploadId = undefined;
+      }
+      if (!uploadId) localStorage.removeItem(key);
+    }
+    if (!uploadId) {
+      const init = await axios.post(
+        `${RAG_API_URL}/uploads`,
+        { caseId, filename: file.name, size: file.size, sha256: await sha256Hex(file), sessionId, isScanned },
+        { headers: getAuthHeaders() },
+      );
+      if (init.data.status === "complete") {
+        onProgress?.(1);
+        return init.data;
+      }
+      uploadId = init.data.uploadId as string;
+      partSize = init.data.partSize;
+      pending = Array.from({ length: init.data.totalParts }, (_, i) => i);
+      localStorage.setItem(key, uploadId);
+    }
+
+    const total = Math.ceil(file.size / partSize);
+    let done = total - pending.length;
+    const worker = async () => {
+      for (let part = pending.shift(); part !== undefined; part = pending.shift()) {
+        const blob = file.slice(part * partSize, (part + 1) * partSize);
+        await putWithRetry(`${RAG_API_URL}/uploads/${uploadId}/parts/${part}`, blob);
+        onProgress?.(++done / total);
+      }
+    };
+    await Promise.all(Array.from({ length: UPLOAD_PART_CONCURRENCY }, worker));
+
+    const complete = await axios.post(`${RAG_API_URL}/uploads/${uploadId}/complete`, null, {
+      headers: getAuthHeaders(),
+    });
+    localStorage.removeItem(key);
+    return complete.data;
+  },
+
+  /**
+   * Abandons the unfinished resumable upload of a file, if there is one.
+   */
+  abortResumableUpload: async (caseId: string, file: File) => {
+    const key = resumeKey(caseId, file);
+    const uploadId = localStorage.getItem(key);
+    if (!uploadId) return;
+    try {
+      await axios.delete(`${RAG_API_URL}/uploads/${uploadId}`, { headers: getAuthHeaders() });
+    } catch (error: any) {
+      if (error?.response?.status !== 404) throw error;
+    }
+    localStorage.removeItem(key);
+  },
+
   /**
    * Ingests a document into the RAG system.
    * @param caseId The ID of the case.
    * @param file The file object to upload.
+   * @param isScanned Whether the user marked the file as a scanned document.
    */
-  ingestDocument: async (caseId: string, file: File, retries = 3, sessionId?: string) => {
+  ingestDocument: async (caseId: string, file: File, retries = 3, sessionId?: string, isScanned = false) => {
+    if (file.size > RESUMABLE_UPLOAD_THRESHOLD && !file.name.toLowerCase().endsWith(".zip")) {
+      return ragService.uploadResumable(caseId, file, sessionId, undefined, undefined, isScanned);
+    }
+
     const formData = new FormData();
     formData.append("file", file);
     formData.append("caseId", caseId);
+    formData.append("isScanned", isScanned ? "true" : "false");
     if (sessionId) {
       formData.append("sessionId", sessionId);
     }
@@ -233,11 +359,15 @@ const ragService = {
    */
   getDocumentText: async (caseId: string, filename: string) => {
     try {
-      const response = await axios.get(
-        `${RAG_API_URL}/document-text/${caseId}/${encodeURIComponent(filename)}`,
-        { headers: getAuthHeaders() },
-      );
-      return response.data; // { filename, pages: [{text, page_number?, file_type?}] }
+      const url = `${RAG_API_URL}/document-text/${caseId}/${encodeURIComponent(filename)}`;
+      let response = await axios.get(url, { headers: getAuthHeaders() });
+      // 202: the server is still extracting the pages; retry a few times
+      for (let attempt = 0; response.status === 202 && attempt < 15; attempt++) {
+        const retryAfter = Number(response.headers["retry-after"]) || 2;
+        await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+        response = await axios.get(url, { headers: getAuthHeaders() });
+      }
+      return response.data; // { filename, total_pages, pages: [{text, page_number?, file_type?}] }
     } catch (error: any) {
       if (error?.response?.status === 429) {
         handleRateLimitError(error.config?.url || "/document-text");
@@ -0,0 +1,171 @@
+"""
+Chunker benchmark: LegalChunker vs the fixed-size character splitter.
+
+For each splitter, chunks a set of case files page by page (as ingestion
+does) and reports chunk count, embedded tokens, chunking and embedding
+time, and retrieval recall@k / MRR over an in-memory index of all chunks.
+
+Queries come from a JSONL file of {"file", "question", "answer"} records,
+where "answer" is a span of the document text that a relevant chunk must
+contain. Without one, sentences sampled from the documents serve as
+queries (a proxy that rewards chunks keeping sentences intact and in
+context, not a substitute for real questions).
+
+    python -m benchmarks.chunking documents/*.pdf
+    python -m benchmarks.chunking --questions benchmarks/data/case_questions.jsonl documents/*.txt
+"""
+
+import os
+import re
+import json
+import time
+import random
+import argparse
+
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from ingestion.chunker import LegalChunker, embedding_token_counter, split_sentences
+from ingestion.loader import parse_file_with_pages
+
+RECALL_AT = (1, 5, 10)
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def load_corpus(paths: list[str]) -> dict[str, list[dict]]:
+    """{filename: pages} for every parseable file."""
+    corpus = {}
+    for path in paths:
+        try:
+            pages = [p for p in parse_file_with_pages(path) if p.get("text", "").strip()]
+        except Exception as e:
+            print(f"[SKIP] {path}: {e}")
+            continue
+        if pages:
+            corpus[os.path.basename(path)] = pages
+    return corpus
+
+
+def load_questions(path: str | None, corpus: dict[str, list[dict]], per_doc: int = 20, seed: int = 7) -> list[dict]:
+    if path:
+        with open(path, encoding="utf-8") as f:
+            questions = [json.loads(line) for line in f if line.strip()]
+        return [q for q in questions if q["file"] in corpus]
+
+    rng = random.Random(seed)
+    questions = []
+    for filename, pages in corpus.items():
+        sentences = [s for p in pages for s in split_sentences(p["text"]) if 60 <= len(s) <= 300]
+        for sentence in rng.sample(sentences, min(per_doc, len(sentences))):
+            questions.append({"file": filename, "question": sentence, "answer": sentence})
+    return questions
+
+
+def chunk_corpus(splitter, corpus: dict[str, list[dict]]) -> tuple[list[dict], float]:
+    """All chunks as {"file", "text"}, plus the time spent splitting."""
+    chunks = []
+    t0 = time.perf_counter()
+    for filename, pages in corpus.items():
+        for page in pages:
+            chunks.extend({"file": filename, "text": text} for text in splitter.split_text(page["text"]))
+    return chunks, time.perf_counter() - t0
+
+
+def embed_chunks(chunks: list[dict]) -> tuple[np.ndarray, float]:
+    from utils.embeddings import embedder
+    t0 = time.perf_counter()
+    vectors = np.asarray(embedder.embed_documents([c["text"] for c in chunks]), dtype=np.float32)
+    return vectors, time.perf_counter() - t0
+
+
+def relevant_chunks(chunks: list[dict], questions: list[dict]) -> list[set[int]]:
+    """Per question, the indexes of the chunks that contain its answer span."""
+    normalized = [(c["file"], _normalize(c["text"])) for c in chunks]
+    # A span cut across two chunks has no relevant chunk: a miss for this splitter
+    relevant = []
+    for q in questions:
+        answer = _normalize(q["answer"])
+        relevant.append({i for i, (f, text) in enumerate(normalized) if f == q["file"] and answer in text})
+    return relevant
+
+
+def summarize(ranks: list[int | None], latencies: list[float]) -> dict:
+    """recall@k, MRR and query latency (ms) from each question's first relevant rank (None: not retrieved)."""
+    n = max(len(ranks), 1)
+    found = [r for r in ranks if r]
+    latencies = sorted(latencies)
+    return {
+        **{f"recall@{k}": round(sum(r <= k for r in found) / n, 3) for k in RECALL_AT},
+        "mrr": round(sum(1 / r for r in found) / n, 3),
+        "query_ms": round(1000 * sum(latencies) / max(len(latencies), 1), 2),
+        "query_p95_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 2) if latencies else 0.0,
+        "questions": len(ranks),
+    }
+
+
+def evaluate(chunks: list[dict], vectors: np.ndarray, questions: list[dict], top_k: int = max(RECALL_AT),
+             embed_query=None) -> dict:
+    """recall@k, MRR and query latency over an exact cosine search."""
+    if embed_query is None:
+        from utils.embeddings import embedder
+        embed_query = embedder.embed_query
+    ranks, latencies = [], []
+    for q, relevant in zip(questions, relevant_chunks(chunks, questions)):
+        t0 = time.perf_counter()
+        scores = vectors @ np.asarray(embed_query(q["question"]), dtype=np.float32)
+        ranked = np.argsort(-scores)[:top_k].tolist()
+        latencies.append(time.perf_counter() - t0)
+        ranks.append(next((r for r, i in enumerate(ranked, 1) if i in relevant), None))
+    return summarize(ranks, latencies)
+
+
+def run(corpus, questions, splitters: dict) -> dict:
+    count_tokens = embedding_token_counter()
+    results = {}
+    for label, splitter in splitters.items():
+        chunks, split_seconds = chunk_corpus(splitter, corpus)
+        tokens = count_tokens([c["text"] for c in chunks])
+        vectors, embed_seconds = embed_chunks(chunks)
+        results[label] = {
+            "chunks": len(chunks),
+            "tokens": sum(tokens),
+            "mean_tokens": round(sum(tokens) / max(len(tokens), 1), 1),
+            "max_tokens": max(tokens, default=0),
+            "split_s": round(split_seconds, 2),
+            "embed_s": round(embed_seconds, 2),
+            **evaluate(chunks, vectors, questions),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--questions", help="JSONL of {file, question, answer}; sampled sentences if omitted")
+    parser.add_argument("--chunk-size", type=int, default=int(os.getenv("CHUNK_SIZE", "1500")))
+    parser.add_argument("--chunk-overlap", type=int, default=int(os.getenv("CHUNK_OVERLAP", "300")))
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.files)
+    questions = load_questions(args.questions, corpus)
+    print(f"{len(corpus)} documents, {sum(len(p) for p in corpus.values())} pages, {len(questions)} questions")
+
+    splitters = {
+        f"recursive {args.chunk_size}/{args.chunk_overlap}": RecursiveCharacterTextSplitter(
+            chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap
+        ),
+        "legal": LegalChunker(),
+    }
+    results = run(corpus, questions, splitters)
+
+    columns = list(next(iter(results.values())).keys())
+    print(f"\n{'splitter':<24}" + "".join(f"{c:>12}" for c in columns))
+    for label, row in results.items():
+        print(f"{label:<24}" + "".join(f"{row[c]:>12}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
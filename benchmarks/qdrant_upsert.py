@@ -0,0 +1,101 @@
+"""
+Qdrant bulk upsert throughput benchmark.
+
+Compares the old strategy (sequential 100-point batches, wait=True) with
+the parallel fire-and-confirm path in ``ingestion.injector.qdrant_upsert``
+on a throwaway collection filled with random 1024-d vectors and chunk-sized
+payloads.
+
+    python -m benchmarks.qdrant_upsert --points 10000 100000
+    QDRANT_UPSERT_PARALLELISM=8 python -m benchmarks.qdrant_upsert --points 100000
+"""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import models
+
+from ingestion.injector import qdrant, qdrant_upsert, QDRANT_UPSERT_PARALLELISM
+
+VECTOR_DIM = 1024  # bge-m3
+TEXT_SIZE = 1500   # CHUNK_SIZE default
+ROUND_SIZE = 10_000
+
+
+def make_points(rng: np.random.Generator, n: int, first_index: int = 0):
+    """n random vectors (as the lists the embedder returns) with chunk-sized payloads."""
+    vectors = rng.random((n, VECTOR_DIM), dtype=np.float32).tolist()
+    filler = ("lorem ipsum dolor sit amet " * (TEXT_SIZE // 27 + 1))[:TEXT_SIZE]
+    payloads = [
+        {
+            "chunk_id": str(uuid.uuid4()),
+            "text": filler,
+            "source": "bench.pdf",
+            "case_id": "bench",
+            "chunk_index": first_index + i,
+        }
+        for i in range(n)
+    ]
+    return vectors, payloads
+
+
+def sequential_upsert(collection: str, vectors, payloads, batch_size: int = 100):
+    points = [
+        models.PointStruct(id=p["chunk_id"], vector=v, payload=p)
+        for v, p in zip(vectors, payloads)
+    ]
+    for i in range(0, len(points), batch_size):
+        qdrant.upsert(collection_name=collection, points=points[i:i + batch_size], wait=True)
+
+
+def run(n: int, collection: str, round_size: int = ROUND_SIZE):
+    """
+    Points are generated and sent round_size at a time (generation is not
+    timed), so a 100k run never holds more than one round in memory. The
+    parallel path confirms only the last round with wait=True, as one
+    ingestion of n points would.
+    """
+    results = {}
+    for label, fn in (
+        ("sequential wait=True", lambda v, p, last: sequential_upsert(collection, v, p)),
+        (f"parallel x{QDRANT_UPSERT_PARALLELISM} + barrier",
+         lambda v, p, last: qdrant_upsert(qdrant, collection, v, p, wait=last)),
+    ):
+        qdrant.recreate_collection(
+            collection_name=collection,
+            vectors_config=models.VectorParams(size=VECTOR_DIM, distance=models.Distance.COSINE),
+        )
+        rng = np.random.default_rng(0)
+        elapsed = 0.0
+        for start in range(0, n, round_size):
+            size = min(round_size, n - start)
+            vectors, payloads = make_points(rng, size, start)
+            t0 = time.time()
+            fn(vectors, payloads, start + size >= n)
+            elapsed += time.time() - t0
+            del vectors, payloads
+        count = qdrant.count(collection_name=collection, exact=True).count
+        results[label] = (elapsed, count)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--collection", default="bench_upsert")
+    parser.add_argument("--round-size", type=int, default=ROUND_SIZE, help="points generated and sent per round")
+    args = parser.parse_args()
+
+    try:
+        for n in args.points:
+            print(f"\n=== {n} points ===")
+            for label, (elapsed, count) in run(n, args.collection, args.round_size).items():
+                print(f"{label:<32} {elapsed:8.2f}s  {n / elapsed:10.0f} pts/s  (count={count})")
+    finally:
+        qdrant.delete_collection(args.collection)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Retrieval grid: chunking x embedding model x reranker x fetch_k.
+
+CHUNK_SIZE / CHUNK_OVERLAP (or the legal chunker), EMBED_MODEL,
+RERANKER_MODEL and the reranker's candidate pool
+(fetch_k = min(top_k * RETRIEVAL_FETCH_MULTIPLIER, RETRIEVAL_FETCH_K_MAX)
+in rag/rag.py) are evaluated together: for every combination the case files
+are chunked and embedded into an in-memory index, and the labeled questions
+are run through the same dense search -> cross-encoder rerank pipeline the
+API uses (without neighbour expansion).
+
+Reported per configuration: recall@k and MRR (a hit is a chunk of the right
+file containing the answer span), index size (float32 vectors plus chunk
+text, as stored in Qdrant), ingestion throughput (chunks/sec for splitting
+plus embedding) and query latency (query embedding + search + rerank, mean
+and p95).
+
+The default question set, benchmarks/data/case_questions.jsonl, covers the
+sample files documents/case1.txt, case2.txt and sample1.txt.
+
+    python -m benchmarks.retrieval_grid
+    python -m benchmarks.retrieval_grid --chunkers recursive:1000/200 recursive:1500/300 legal:350 \\
+        --embed-models BAAI/bge-m3 intfloat/multilingual-e5-base \\
+        --rerankers none cross-encoder/mmarco-mMiniLMv2-L12-H384-v1 --fetch-multipliers 2 3 5 \\
+        --json grid.json
+"""
+
+import os
+import gc
+import json
+import time
+import argparse
+
+import numpy as np
+import torch
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from sentence_transformers import SentenceTransformer, CrossEncoder
+
+from benchmarks.chunking import RECALL_AT, load_corpus, load_questions, chunk_corpus, relevant_chunks, summarize
+from ingestion.chunker import LegalChunker
+
+DEFAULT_FILES = ["documents/case1.txt", "documents/case2.txt", "documents/sample1.txt"]
+DEFAULT_QUESTIONS = os.path.join(os.path.dirname(__file__), "data", "case_questions.jsonl")
+TOP_K = max(RECALL_AT)
+
+_device = "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _short(model_name: str) -> str:
+    return model_name.rsplit("/", 1)[-1]
+
+
+def make_splitter(spec: str, model: SentenceTransformer):
+    """
+    "recursive:SIZE/OVERLAP" (characters) or "legal:TARGET[/MAX]" (tokens of
+    the model being evaluated, so chunks fit that model's window).
+    """
+    kind, _, params = spec.partition(":")
+    sizes = [int(p) for p in params.split("/") if p]
+    if kind == "recursive":
+        size, overlap = (sizes + [1500, 300][len(sizes):])[:2]
+        return RecursiveCharacterTextSplitter(chunk_size=size, chunk_overlap=overlap)
+    if kind == "legal":
+        tokenizer = model.tokenizer
+
+        def count_tokens(texts: list[str]) -> list[int]:
+            if not texts:
+                return []
+            encoded = tokenizer(texts, add_special_tokens=False, return_attention_mask=False)["input_ids"]
+            return [len(ids) for ids in encoded]
+
+        kwargs = {"count_tokens": count_tokens}
+        if sizes:
+            kwargs["target_tokens"] = sizes[0]
+        if len(sizes) > 1:
+            kwargs["max_tokens"] = sizes[1]
+        return LegalChunker(**kwargs)
+    raise ValueError(f"Unknown chunker spec: {spec!r} (expected recursive:SIZE/OVERLAP or legal:TARGET[/MAX])")
+
+
+def load_embedder(model_name: str) -> SentenceTransformer:
+    model = SentenceTransformer(model_name, device=_device)
+    return model.half() if _device == "cuda" else model
+
+
+def embed_queries(model: SentenceTransformer, questions: list[dict]) -> tuple[np.ndarray, list[float]]:
+    """One encode call per question, as the API embeds queries, with the time each took."""
+    model.encode(["warm-up"], normalize_embeddings=True, show_progress_bar=False)
+    vectors, seconds = [], []
+    for q in questions:
+        t0 = time.perf_counter()
+        vectors.append(model.encode([q["question"]], normalize_embeddings=True, show_progress_bar=False)[0])
+        seconds.append(time.perf_counter() - t0)
+    return np.asarray(vectors, dtype=np.float32), seconds
+
+
+def search(chunks, vectors, questions, query_vectors, query_seconds, reranker: CrossEncoder | None,
+           fetch_k: int) -> dict:
+    """Dense top-fetch_k, optionally cross-encoder reranked, cut to TOP_K."""
+    ranks, latencies = [], []
+    for q, query_vector, embed_seconds, relevant in zip(
+            questions, query_vectors, query_seconds, relevant_chunks(chunks, questions)):
+        t0 = time.perf_counter()
+        scores = vectors @ query_vector
+        candidates = np.argsort(-scores)[:fetch_k if reranker else TOP_K]
+        if reranker is not None and len(candidates):
+            rerank_scores = reranker.predict(
+                [[q["question"], chunks[i]["text"]] for i in candidates], show_progress_bar=False
+            )
+            candidates = candidates[np.argsort(-np.asarray(rerank_scores))]
+        ranked = candidates[:TOP_K].tolist()
+        latencies.append(embed_seconds + time.perf_counter() - t0)
+        ranks.append(next((r for r, i in enumerate(ranked, 1) if i in relevant), None))
+    return summarize(ranks, latencies)
+
+
+def run_grid(corpus, questions, chunker_specs, embed_models, reranker_models, fetch_multipliers,
+             fetch_k_max: int, batch_size: int) -> list[dict]:
+    rerankers = {name: None if name == "none" else CrossEncoder(name, device=_device) for name in reranker_models}
+    fetch_ks = sorted({min(TOP_K * m, fetch_k_max) for m in fetch_multipliers})
+    rows = []
+    for model_name in embed_models:
+        print(f"[GRID] Loading {model_name} on {_device}")
+        model = load_embedder(model_name)
+        query_vectors, query_seconds = embed_queries(model, questions)
+        for spec in chunker_specs:
+            chunks, split_seconds = chunk_corpus(make_splitter(spec, model), corpus)
+            texts = [c["text"] for c in chunks]
+            t0 = time.perf_counter()
+            vectors = np.asarray(
+                model.encode(texts, batch_size=batch_size, normalize_embeddings=True, show_progress_bar=False),
+                dtype=np.float32,
+            )
+            embed_seconds = time.perf_counter() - t0
+            base = {
+                "chunker": spec,
+                "embed_model": model_name,
+                "chunks": len(chunks),
+                "index_mb": round((vectors.nbytes + sum(len(t.encode("utf-8")) for t in texts)) / 2**20, 2),
+                "ingest_cps": round(len(chunks) / max(split_seconds + embed_seconds, 1e-9), 1),
+            }
+            for reranker_name, reranker in rerankers.items():
+                # Without a reranker the pool size changes nothing: one row
+                for fetch_k in (fetch_ks if reranker else [TOP_K]):
+                    row = {
+                        **base,
+                        "reranker": reranker_name,
+                        "fetch_k": fetch_k,
+                        **search(chunks, vectors, questions, query_vectors, query_seconds, reranker, fetch_k),
+                    }
+                    rows.append(row)
+                    print(f"[GRID] {spec} | {_short(model_name)} | {_short(reranker_name)} | fetch_k={fetch_k}: "
+                          f"recall@{TOP_K}={row[f'recall@{TOP_K}']} mrr={row['mrr']}")
+        del model
+        gc.collect()
+        if _device == "cuda":
+            torch.cuda.empty_cache()
+    return rows
+
+
+def print_table(rows: list[dict]):
+    columns = ["chunks", "index_mb", "ingest_cps", *(f"recall@{k}" for k in RECALL_AT), "mrr",
+               "query_ms", "query_p95_ms"]
+    header = f"{'chunker':<22}{'embed':<26}{'reranker':<30}{'fetch_k':>8}"
+    print("\n" + header + "".join(f"{c:>13}" for c in columns))
+    for row in sorted(rows, key=lambda r: (-r["mrr"], r["query_ms"])):
+        print(
+            f"{row['chunker']:<22}{_short(row['embed_model']):<26}{_short(row['reranker']):<30}{row['fetch_k']:>8}"
+            + "".join(f"{row[c]:>13}" for c in columns)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*", default=DEFAULT_FILES)
+    parser.add_argument("--questions", default=DEFAULT_QUESTIONS, help="JSONL of {file, question, answer}")
+    parser.add_argument("--chunkers", nargs="+", default=[
+        f"recursive:{os.getenv('CHUNK_SIZE', '1500')}/{os.getenv('CHUNK_OVERLAP', '300')}",
+        "recursive:1000/200",
+        "legal",
+    ])
+    parser.add_argument("--embed-models", nargs="+", default=[os.getenv("EMBED_MODEL", "BAAI/bge-m3")])
+    parser.add_argument("--rerankers", nargs="+", default=[
+        "none", os.getenv("RERANKER_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"),
+    ], help='cross-encoder model names; "none" for dense ranking only')
+    parser.add_argument("--fetch-multipliers", nargs="+", type=int, default=[2, 3, 5])
+    parser.add_argument("--fetch-k-max", type=int, default=int(os.getenv("RETRIEVAL_FETCH_K_MAX", "80")))
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("EMBED_BATCH_SIZE", "128")))
+    parser.add_argument("--json", help="also write every row to this file")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.files)
+    questions = load_questions(args.questions, corpus)
+    if not questions:
+        parser.error("no questions refer to the given files")
+    print(f"{len(corpus)} documents, {sum(len(p) for p in corpus.values())} pages, {len(questions)} questions")
+
+    rows = run_grid(corpus, questions, args.chunkers, args.embed_models, args.rerankers,
+                    args.fetch_multipliers, args.fetch_k_max, args.batch_size)
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\nWrote {len(rows)} rows to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
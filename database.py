@@ -12,6 +12,12 @@ logger.info(f"MongoDB database: {db.name}")
 
 chat_collection = db["chat_history"]
 document_status_collection = db["document_status"]
+ingestion_jobs_collection = db["ingestion_jobs"]
+ingestion_batches_collection = db["ingestion_batches"]
+ocr_page_cache_collection = db["ocr_page_cache"]
+document_pages_collection = db["document_pages"]
+document_files_collection = db["document_files"]
+upload_sessions_collection = db["upload_sessions"]
 draft_sessions_collection = db["draft_sessions"]
 draft_versions_collection = db["draft_versions"]
 investigation_reports_collection = db["investigation_reports"]
@@ -22,12 +28,24 @@ chat_feedback_collection = db["chat_feedback"]
 token_usage_collection = db["token_usage"]
 response_cache_collection = db["response_cache"]
 custom_instructions_collection = db["custom_instructions"]
+maintenance_locks_collection = db["maintenance_locks"]
 
 # --- MongoDB Indexes (idempotent — safe to call on every startup) ---
 chat_collection.create_index("session_id")
 chat_collection.create_index([("case_id", 1), ("user_id", 1)])
 document_status_collection.create_index([("case_id", 1), ("filename", 1)], unique=True)
 document_status_collection.create_index("session_id")
+document_pages_collection.create_index([("case_id", 1), ("filename", 1), ("page_index", 1)], unique=True)
+document_files_collection.create_index([("case_id", 1), ("filename", 1)], unique=True)
+# Resumable upload sessions are dropped once expires_at passes
+upload_sessions_collection.create_index("expires_at", expireAfterSeconds=0)
+ingestion_jobs_collection.create_index([("status", 1), ("fair_rank", 1), ("next_run_at", 1)])
+ingestion_jobs_collection.create_index([("case_id", 1), ("filename", 1), ("status", 1)])
+ingestion_batches_collection.create_index([("case_id", 1), ("created_at", -1)])
+# OCR page cache entries are keyed by _id; expire them after OCR_CACHE_TTL_DAYS
+ocr_page_cache_collection.create_index(
+    "created_at", expireAfterSeconds=int(os.getenv("OCR_CACHE_TTL_DAYS", "180")) * 86400
+)
 investigation_jobs_collection.create_index([("case_id", 1), ("status", 1)])
 investigation_reports_collection.create_index([("case_id", 1), ("created_at", -1)])
 draft_sessions_collection.create_index([("case_id", 1), ("user_id", 1)])
@@ -0,0 +1,42 @@
+"""
+Deterministic, content-derived chunk IDs.
+
+A chunk's Qdrant point ID depends only on the document identity
+(case, session, source) and the chunk text, plus how many identical chunks
+precede it in the document. Re-ingesting an edited document therefore
+keeps the IDs of unchanged chunks, which is what lets sync_document_chunks
+skip re-embedding them.
+"""
+
+import uuid
+import hashlib
+
+# Fixed namespace so the same chunk of the same document always maps to the same ID
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c2a4e-5d3b-4c8e-9a7f-2b1d0e3c4f58")
+
+
+def make_chunk_id(case_id: str, session_id: str, source: str, text: str, occurrence: int = 0) -> str:
+    """
+    Deterministic, content-derived chunk ID. Depends only on the document
+    identity and the chunk text (plus how many identical chunks precede it),
+    not on its position — so inserting a paragraph does not change the IDs
+    of the chunks around it.
+    """
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{case_id}|{session_id}|{source}|{digest}|{occurrence}"))
+
+
+def chunk_id_sequence(case_id: str, session_id: str, source: str):
+    """
+    Callable mapping a document's chunk texts, fed in order, to their IDs.
+    Repeats of a text (a boilerplate clause, an empty table cell) get the
+    next occurrence number, so they never collide.
+    """
+    seen: dict[str, int] = {}
+
+    def next_id(text: str) -> str:
+        occurrence = seen.get(text, 0)
+        seen[text] = occurrence + 1
+        return make_chunk_id(case_id, session_id, source, text, occurrence)
+
+    return next_id
@@ -0,0 +1,227 @@
+"""
+Token-aware, structure-aware chunking for legal documents.
+
+RecursiveCharacterTextSplitter cuts every document into ~1500-character
+windows with a fixed 300-character overlap, regardless of where sections or
+numbered paragraphs begin and of how many tokens the embedding model will
+actually see. LegalChunker instead:
+
+- measures size in embedding-model tokens (the bge-m3 tokenizer), packing
+  chunks up to CHUNK_TARGET_TOKENS and past it only to keep a fragment
+  below CHUNK_MIN_TOKENS from standing alone (up to CHUNK_MAX_TOKENS);
+- splits on legal structure first: headings (Section, Article, Chapter,
+  Schedule, Annexure, ...) always start a new chunk, numbered clauses and
+  paragraphs ("1.", "2.3", "(a)", "(iv)") and blank lines are preferred cut
+  points, and only a paragraph too long for one chunk is cut between
+  sentences;
+- overlaps adaptively: chunks that end on a structural boundary carry no
+  overlap, while a paragraph cut mid-way repeats its last sentence(s)
+  (up to CHUNK_MAX_OVERLAP_TOKENS) at the start of the next chunk.
+
+``split_text`` has the same signature as the LangChain splitters, so the
+two are interchangeable (see CHUNKER in ingestion/injector.py).
+"""
+
+import os
+import re
+import functools
+
+CHUNK_TARGET_TOKENS = int(os.getenv("CHUNK_TARGET_TOKENS", "350"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "512"))
+CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", "60"))
+CHUNK_MAX_OVERLAP_TOKENS = int(os.getenv("CHUNK_MAX_OVERLAP_TOKENS", "64"))
+# Used only for estimates before any text has been tokenized
+CHARS_PER_TOKEN = 4.0
+
+# Block levels: lower is a stronger boundary
+HEADING, CLAUSE, PARAGRAPH = 0, 1, 2
+
+_HEADING_RE = re.compile(
+    r"^\s*(?:SECTION|Section|Sec\.|ARTICLE|Article|Art\.|CHAPTER|Chapter|PART|Part|"
+    r"SCHEDULE|Schedule|ANNEXURE|Annexure|ANNEX|Annex|APPENDIX|Appendix|EXHIBIT|Exhibit)"
+    r"\s*[-–:]?\s*(?:[0-9]+[A-Z]?|[IVXLC]+|[A-Z])?\b"
+)
+# A short line in capitals ("JUDGMENT", "FACTS OF THE CASE", "PRAYER")
+_CAPS_HEADING_RE = re.compile(r"^\s*[A-Z][A-Z0-9 ,.&'()/-]{2,80}$")
+_CLAUSE_RE = re.compile(
+    r"^\s*(?:\d{1,3}(?:\.\d{1,3})*[.)]?\s|\(\d{1,3}\)\s|\([a-z]{1,2}\)\s|\([ivxlc]{1,6}\)\s|[ivxlc]{1,6}\)\s|[a-z]\)\s)"
+)
+# Sentence ends, not after common legal abbreviations ("Sec. 5", "v. State", "No. 12")
+_ABBREVIATIONS = ("v", "vs", "No", "no", "Nos", "Sec", "Art", "Cl", "para", "Para", "paras", "Sr", "Mr", "Ms",
+                  "Mrs", "Dr", "Ltd", "Co", "Hon'ble", "viz", "i.e", "e.g", "etc", "Rs", "S", "O", "r")
+_SENTENCE_END_RE = re.compile(
+    "".join(rf"(?<!\b{re.escape(a)}\.)" for a in _ABBREVIATIONS)
+    + r"(?<=[.;?!])\s+(?=[\"'(\[]?[A-Z0-9])"
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _tokenizer():
+    from transformers import AutoTokenizer
+    from utils.embeddings import EMBED_MODEL
+    return AutoTokenizer.from_pretrained(EMBED_MODEL)
+
+
+def embedding_token_counter():
+    """Token counts from the embedding model's own tokenizer (special tokens excluded)."""
+    tokenizer = _tokenizer()
+
+    def count(texts: list[str]) -> list[int]:
+        if not texts:
+            return []
+        encoded = tokenizer(texts, add_special_tokens=False, return_attention_mask=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+
+    return count
+
+
+def _block_level(first_line: str) -> int:
+    if _HEADING_RE.match(first_line):
+        return HEADING
+    stripped = first_line.strip()
+    if _CAPS_HEADING_RE.match(stripped) and any(c.isalpha() for c in stripped) and len(stripped.split()) <= 8:
+        return HEADING
+    if _CLAUSE_RE.match(first_line):
+        return CLAUSE
+    return PARAGRAPH
+
+
+def split_blocks(text: str) -> list[tuple[int, str]]:
+    """
+    Cut text into structural blocks: a block starts at a blank line, a
+    heading or a numbered clause. Returns (level, text) pairs in order.
+    """
+    blocks: list[tuple[int, str]] = []
+    current: list[str] = []
+    level = PARAGRAPH
+
+    def flush():
+        if current and "".join(current).strip():
+            blocks.append((level, "\n".join(current).strip()))
+
+    for line in text.splitlines():
+        if not line.strip():
+            flush()
+            current, level = [], PARAGRAPH
+            continue
+        line_level = _block_level(line)
+        if line_level < PARAGRAPH and current:
+            flush()
+            current = []
+        if not current:
+            level = line_level
+        current.append(line)
+    flush()
+    return blocks
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s for s in _SENTENCE_END_RE.split(text) if s.strip()]
+
+
+class LegalChunker:
+    """Structure-first packer of legal text into token-bounded chunks."""
+
+    def __init__(self, target_tokens: int = CHUNK_TARGET_TOKENS, max_tokens: int = CHUNK_MAX_TOKENS,
+                 min_tokens: int = CHUNK_MIN_TOKENS, max_overlap_tokens: int = CHUNK_MAX_OVERLAP_TOKENS,
+                 count_tokens=None):
+        self.target_tokens = target_tokens
+        self.max_tokens = max(max_tokens, target_tokens)
+        self.min_tokens = min_tokens
+        self.max_overlap_tokens = max_overlap_tokens
+        self._count_tokens = count_tokens
+
+    def count_tokens(self, texts: list[str]) -> list[int]:
+        if self._count_tokens is None:
+            self._count_tokens = embedding_token_counter()
+        return self._count_tokens(texts)
+
+    def estimate_chunk_count(self, chars: int) -> int:
+        return max(1, round(chars / (self.target_tokens * CHARS_PER_TOKEN)))
+
+    def _split_long_block(self, text: str) -> list[str]:
+        """Pieces of an over-long block: sentences packed to target, last sentences repeated as overlap."""
+        sentences = split_sentences(text)
+        sizes = self.count_tokens(sentences)
+        units: list[tuple[str, int]] = []
+        for sentence, size in zip(sentences, sizes):
+            if size <= self.max_tokens:
+                units.append((sentence, size))
+            else:
+                units.extend(self._split_words(sentence, size))
+
+        pieces: list[str] = []
+        current: list[tuple[str, int]] = []
+        tokens = 0
+        for unit in units:
+            if current and tokens + unit[1] > self.target_tokens:
+                pieces.append(" ".join(s for s, _ in current))
+                # Adaptive overlap: carry trailing sentences that fit the overlap budget
+                carry: list[tuple[str, int]] = []
+                carried = 0
+                for prev in reversed(current):
+                    if carried + prev[1] > self.max_overlap_tokens or carried + prev[1] + unit[1] > self.max_tokens:
+                        break
+                    carry.insert(0, prev)
+                    carried += prev[1]
+                current, tokens = carry, carried
+            current.append(unit)
+            tokens += unit[1]
+        if current:
+            pieces.append(" ".join(s for s, _ in current))
+        return pieces
+
+    def _split_words(self, sentence: str, size: int) -> list[tuple[str, int]]:
+        """Last resort for a single sentence over max_tokens: equal word windows."""
+        words = sentence.split()
+        parts = -(-size // self.target_tokens)
+        step = -(-len(words) // parts)
+        windows = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+        return list(zip(windows, self.count_tokens(windows)))
+
+    def split_text(self, text: str) -> list[str]:
+        blocks = split_blocks(text)
+        if not blocks:
+            return []
+        sizes = self.count_tokens([b for _, b in blocks])
+
+        chunks: list[str] = []
+        current: list[str] = []
+        tokens = 0
+
+        def flush():
+            nonlocal current, tokens
+            if current:
+                chunks.append("\n\n".join(current))
+            current, tokens = [], 0
+
+        for (level, block), size in zip(blocks, sizes):
+            # A heading starts a new chunk unless the current one is too small to stand alone
+            if level == HEADING and tokens >= self.min_tokens:
+                flush()
+            if size > self.max_tokens:
+                pieces = self._split_long_block(block)
+                if tokens < self.min_tokens and current:
+                    # A lone heading stays attached to the text it introduces
+                    pieces[0] = "\n\n".join(current + [pieces[0]])
+                    current, tokens = [], 0
+                flush()
+                chunks.extend(pieces[:-1])
+                # The tail of a long block may still share a chunk with what follows
+                current, tokens = [pieces[-1]], self.count_tokens([pieces[-1]])[0]
+                continue
+            # Close the chunk at this boundary once past the target; a chunk still
+            # below min_tokens may grow up to the max rather than stand alone
+            if current and (tokens + size > self.max_tokens
+                            or (tokens + size > self.target_tokens and tokens >= self.min_tokens)):
+                flush()
+            current.append(block)
+            tokens += size
+        flush()
+
+        # Fold a fragment left at the very end into the chunk before it
+        if len(chunks) >= 2:
+            previous, last = self.count_tokens(chunks[-2:])
+            if last < self.min_tokens and previous + last <= self.max_tokens:
+                chunks[-2:] = ["\n\n".join(chunks[-2:])]
+        return chunks
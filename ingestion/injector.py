@@ -1,6 +1,8 @@
 import os
 import time
-import uuid
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 from neo4j import GraphDatabase
@@ -8,6 +10,9 @@ from qdrant_client import QdrantClient, models
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from utils.embeddings import embedder
+from ingestion.chunker import LegalChunker
+from ingestion.chunk_ids import chunk_id_sequence
+from ingestion.progress import ProgressReporter
 
 # ------------------ LOAD ENV ------------------
 load_dotenv()
@@ -27,16 +32,36 @@ qdrant = QdrantClient(url=QDRANT_URL, api_key=QDRANT_KEY)
 
 
 # ------------------ NEO4J HELPERS ------------------
-def create_chunk_node(driver, chunk_id: str, text: str, source: str, case_id: str, session_id: str = ""):
+def create_chunk_node(driver, chunk_id: str, text: str, source: str, case_id: str, session_id: str = "", chunk_index: int | None = None):
     query = """
     MERGE (c:Chunk {id: $id})
     SET c.text = $text,
         c.source = $source,
         c.caseId = $case_id,
-        c.sessionId = $session_id
+        c.sessionId = $session_id,
+        c.chunkIndex = $chunk_index
     """
     with driver.session() as s:
-        s.run(query, id=chunk_id, text=text, source=source, case_id=case_id, session_id=session_id)
+        s.run(query, id=chunk_id, text=text, source=source, case_id=case_id, session_id=session_id, chunk_index=chunk_index)
+
+
+def create_chunk_nodes(driver, payloads: list[dict], source: str, case_id: str, session_id: str = ""):
+    """Batched create_chunk_node: one round trip for a whole batch of chunk payloads."""
+    query = """
+    UNWIND $rows AS row
+    MERGE (c:Chunk {id: row.id})
+    SET c.text = row.text,
+        c.source = $source,
+        c.caseId = $case_id,
+        c.sessionId = $session_id,
+        c.chunkIndex = row.chunk_index
+    """
+    rows = [
+        {"id": p["chunk_id"], "text": p["text"], "chunk_index": p.get("chunk_index")}
+        for p in payloads
+    ]
+    with driver.session() as s:
+        s.run(query, rows=rows, source=source, case_id=case_id, session_id=session_id)
 
 
 def create_entity_relations(driver, chunk_id: str, text: str):
@@ -45,11 +70,34 @@ def create_entity_relations(driver, chunk_id: str, text: str):
 
 
 # ------------------ QDRANT HELPERS ------------------
+# Bulk upsert tuning: concurrent in-flight batches and per-batch limits
+QDRANT_UPSERT_PARALLELISM = int(os.getenv("QDRANT_UPSERT_PARALLELISM", "4"))
+QDRANT_BATCH_MAX_POINTS = int(os.getenv("QDRANT_BATCH_MAX_POINTS", "256"))
+QDRANT_BATCH_MAX_BYTES = int(os.getenv("QDRANT_BATCH_MAX_BYTES", str(4 * 1024 * 1024)))
+
+# collection name -> vector dim, for collections already verified in this process
+_verified_collections: dict[str, int] = {}
+_verified_lock = threading.Lock()
+_upsert_pool = ThreadPoolExecutor(max_workers=QDRANT_UPSERT_PARALLELISM, thread_name_prefix="qdrant-upsert")
+
+
 def ensure_qdrant_collection(client: QdrantClient, collection_name: str, vector_dim: int):
     """
     Ensure the Qdrant collection exists with the correct vector schema.
     Vector name will be 'vector' (default used by many retrievers).
+    The result is cached per process, so only the first call per collection
+    costs a get_collection round trip.
     """
+    if _verified_collections.get(collection_name) == vector_dim:
+        return
+    with _verified_lock:
+        if _verified_collections.get(collection_name) == vector_dim:
+            return
+        _verify_collection(client, collection_name, vector_dim)
+        _verified_collections[collection_name] = vector_dim
+
+
+def _verify_collection(client: QdrantClient, collection_name: str, vector_dim: int):
     try:
         info = client.get_collection(collection_name)
         existing_dim = info.config.params.vectors.size \
@@ -79,14 +127,63 @@ def ensure_qdrant_collection(client: QdrantClient, collection_name: str, vector_
                 distance=models.Distance.COSINE,
             ),
         )
+    ensure_payload_indexes(client, collection_name)
     print(f"[OK] Qdrant collection '{collection_name}' ready.")
 
 
-def qdrant_upsert(client: QdrantClient, collection: str, vectors: list[list[float]], payloads: list[dict]):
+def ensure_payload_indexes(client: QdrantClient, collection_name: str):
+    """
+    Index the payload fields used by retrieval filters. Neighbour-window
+    expansion filters on (source, chunk_index ranges), which stays cheap on
+    large collections only when these fields are indexed.
+    """
+    index_fields = {
+        "case_id": models.PayloadSchemaType.KEYWORD,
+        "source": models.PayloadSchemaType.KEYWORD,
+        "chunk_index": models.PayloadSchemaType.INTEGER,
+    }
+    for field_name, schema in index_fields.items():
+        try:
+            client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=schema,
+            )
+        except Exception as e:
+            print(f"[WARN] Could not create payload index '{field_name}': {e}")
+
+
+def _point_size(vector: list[float], payload: dict) -> int:
+    """Rough wire size of a point: JSON floats plus the payload text."""
+    return len(vector) * 12 + sum(len(str(v)) + len(k) for k, v in payload.items())
+
+
+def _split_points(points: list[models.PointStruct], sizes: list[int]) -> list[list[models.PointStruct]]:
+    """Group points into batches bounded by both point count and estimated bytes."""
+    batches, batch, batch_bytes = [], [], 0
+    for point, size in zip(points, sizes):
+        if batch and (len(batch) >= QDRANT_BATCH_MAX_POINTS or batch_bytes + size > QDRANT_BATCH_MAX_BYTES):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(point)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def qdrant_upsert(client: QdrantClient, collection: str, vectors: list[list[float]], payloads: list[dict],
+                  wait: bool = True):
     """
     Upsert points into Qdrant using qdrant_client models.
     - We use 'chunk_id' in payload to match Neo4j's Chunk.id
     - Qdrant point ID can be same as chunk_id for simplicity
+
+    Batches are sized by payload bytes and sent concurrently with wait=False
+    (acknowledged once in the WAL). With wait=True the last batch is held
+    back and sent with wait=True after the others are acknowledged: Qdrant
+    applies the WAL in order, so its completion means every batch is
+    applied and searchable.
     """
     if not vectors:
         print("[WARN] No vectors to upsert.")
@@ -106,19 +203,303 @@ def qdrant_upsert(client: QdrantClient, collection: str, vectors: list[list[floa
             )
         )
 
-    QDRANT_BATCH_SIZE = 100
-    print(f"[INFO] Upserting {len(points)} points into Qdrant collection '{collection}' (batch size: {QDRANT_BATCH_SIZE})...")
-    for i in range(0, len(points), QDRANT_BATCH_SIZE):
-        batch = points[i:i + QDRANT_BATCH_SIZE]
-        client.upsert(collection_name=collection, points=batch, wait=True)
-        print(f"[INFO] Upserted batch {i // QDRANT_BATCH_SIZE + 1} ({len(batch)} points)")
-    print("[OK] Qdrant upsert completed.")
+    batches = _split_points(points, [_point_size(v, p) for v, p in zip(vectors, payloads)])
+    barrier = batches.pop() if wait else None
+    t0 = time.time()
+
+    futures = [
+        _upsert_pool.submit(client.upsert, collection_name=collection, points=batch, wait=False)
+        for batch in batches
+    ]
+    for future in futures:
+        future.result()
+    if barrier:
+        client.upsert(collection_name=collection, points=barrier, wait=True)
+
+    print(
+        f"[OK] Upserted {len(points)} points into '{collection}' in "
+        f"{len(futures) + (1 if barrier else 0)} batches ({time.time() - t0:.2f}s)"
+    )
 
 
-# Configurable chunk sizes via environment variables
+# "legal": token- and structure-aware LegalChunker (ingestion/chunker.py);
+# "recursive": the previous fixed-size character splitter
+CHUNKER = os.getenv("CHUNKER", "legal").lower()
+# Configurable chunk sizes via environment variables (recursive splitter)
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1500"))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "300"))
 
+
+# ------------------ CHUNK DIFF ------------------
+def _ordinals(payload: dict) -> tuple:
+    return (payload.get("chunk_index"), payload.get("page_number"), payload.get("file_type"))
+
+
+def _fetch_existing_chunks(case_id: str, source_name: str, session_id: str) -> dict:
+    """
+    Return {chunk_id: ordinals} for the points already stored for this
+    (case_id, session_id, source): the case-level copy ("") and each session's
+    copy of a filename are separate documents. Qdrant errors propagate, so
+    the job fails and is retried instead of re-embedding everything and
+    orphaning the old points.
+    """
+    existing = {}
+    if not qdrant.collection_exists(QDRANT_COLLECTION):
+        return existing
+    offset = None
+    while True:
+        batch, offset = qdrant.scroll(
+            collection_name=QDRANT_COLLECTION,
+            scroll_filter=models.Filter(
+                must=[
+                    models.FieldCondition(key="case_id", match=models.MatchValue(value=case_id)),
+                    models.FieldCondition(key="session_id", match=models.MatchValue(value=session_id)),
+                    models.FieldCondition(key="source", match=models.MatchValue(value=source_name)),
+                ]
+            ),
+            limit=1024,
+            offset=offset,
+            with_payload=["chunk_index", "page_number", "file_type"],
+            with_vectors=False,
+        )
+        for point in batch:
+            existing[str(point.id)] = _ordinals(point.payload or {})
+        if offset is None:
+            break
+    return existing
+
+
+def _retrieve_vectors(chunk_ids: list[str]) -> dict:
+    vectors = {}
+    for i in range(0, len(chunk_ids), 256):
+        for point in qdrant.retrieve(
+            collection_name=QDRANT_COLLECTION,
+            ids=chunk_ids[i:i + 256],
+            with_payload=False,
+            with_vectors=True,
+        ):
+            vectors[str(point.id)] = point.vector
+    return vectors
+
+
+def _delete_chunks(chunk_ids: list[str]):
+    """Delete chunks by ID from Neo4j and Qdrant."""
+    with driver.session() as s:
+        s.run("MATCH (c:Chunk) WHERE c.id IN $ids DETACH DELETE c", ids=chunk_ids)
+    for i in range(0, len(chunk_ids), 1000):
+        qdrant.delete(
+            collection_name=QDRANT_COLLECTION,
+            points_selector=models.PointIdsList(points=chunk_ids[i:i + 1000]),
+        )
+
+
+# Pipeline tuning: chunks per batch and batches buffered between stages
+PIPELINE_BATCH_SIZE = int(os.getenv("INGEST_PIPELINE_BATCH_SIZE", "64"))
+PIPELINE_DEPTH = int(os.getenv("INGEST_PIPELINE_DEPTH", "4"))
+
+_PIPELINE_DONE = object()
+
+
+class _PipelineAborted(Exception):
+    pass
+
+
+def _pipe_put(q: queue.Queue, item, abort: threading.Event):
+    while True:
+        if abort.is_set():
+            raise _PipelineAborted()
+        try:
+            q.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+def _pipe_get(q: queue.Queue, abort: threading.Event):
+    while True:
+        if abort.is_set():
+            raise _PipelineAborted()
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+
+
+def _batched(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def sync_document_chunks(case_id: str, source_name: str, session_id: str, payloads, vectors_for,
+                         progress: ProgressReporter | None = None) -> dict:
+    """
+    Bring the stored chunks of (case_id, source_name) in line with `payloads`
+    (any iterable, consumed lazily) in one pass:
+      - new chunks are embedded via vectors_for(new_payloads) and upserted,
+      - unchanged chunks whose position moved get their payload rewritten
+        with their stored vector (no re-embedding),
+      - chunks no longer present are deleted.
+
+    Runs as a pipeline over bounded queues, so memory stays flat and Qdrant
+    and Neo4j writes overlap with embedding:
+
+        split/diff ──> embed ──> Qdrant writer
+                  └──────────> Neo4j writer
+
+    Returns the chunk counts (total/new/moved/stale); stage counters are
+    reported to `progress` as batches complete.
+    """
+    existing = _fetch_existing_chunks(case_id, source_name, session_id)
+    seen_ids: set[str] = set()
+    counts = {"total": 0, "new": 0, "moved": 0}
+
+    abort = threading.Event()
+    embed_q: queue.Queue = queue.Queue(maxsize=PIPELINE_DEPTH)
+    qdrant_q: queue.Queue = queue.Queue(maxsize=PIPELINE_DEPTH)
+    neo4j_q: queue.Queue = queue.Queue(maxsize=PIPELINE_DEPTH)
+
+    def split_stage():
+        for batch in _batched(payloads, PIPELINE_BATCH_SIZE):
+            new_chunks = [p for p in batch if p["chunk_id"] not in existing]
+            moved_chunks = [
+                p for p in batch
+                if p["chunk_id"] in existing and existing[p["chunk_id"]] != _ordinals(p)
+            ]
+            seen_ids.update(p["chunk_id"] for p in batch)
+            counts["total"] += len(batch)
+            counts["new"] += len(new_chunks)
+            counts["moved"] += len(moved_chunks)
+            if new_chunks or moved_chunks:
+                _pipe_put(embed_q, (new_chunks, moved_chunks), abort)
+                _pipe_put(neo4j_q, new_chunks + moved_chunks, abort)
+        _pipe_put(embed_q, _PIPELINE_DONE, abort)
+        _pipe_put(neo4j_q, _PIPELINE_DONE, abort)
+
+    def embed_stage():
+        while (item := _pipe_get(embed_q, abort)) is not _PIPELINE_DONE:
+            new_chunks, moved_chunks = item
+            vectors = vectors_for(new_chunks) if new_chunks else []
+            if progress and new_chunks:
+                progress.add(chunks_embedded=len(new_chunks))
+            if moved_chunks:
+                stored = _retrieve_vectors([p["chunk_id"] for p in moved_chunks])
+                vectors += [stored[p["chunk_id"]] for p in moved_chunks]
+            _pipe_put(qdrant_q, (new_chunks + moved_chunks, vectors), abort)
+        _pipe_put(qdrant_q, _PIPELINE_DONE, abort)
+
+    def qdrant_stage():
+        # Hold back the latest batch so only the final one waits for indexing
+        pending = None
+        while (item := _pipe_get(qdrant_q, abort)) is not _PIPELINE_DONE:
+            if pending:
+                qdrant_upsert(qdrant, QDRANT_COLLECTION, pending[1], pending[0], wait=False)
+                if progress:
+                    progress.add(points_upserted=len(pending[0]))
+            pending = item
+        if pending:
+            qdrant_upsert(qdrant, QDRANT_COLLECTION, pending[1], pending[0], wait=True)
+            if progress:
+                progress.add(points_upserted=len(pending[0]))
+
+    def neo4j_stage():
+        while (item := _pipe_get(neo4j_q, abort)) is not _PIPELINE_DONE:
+            create_chunk_nodes(driver, item, source_name, case_id, session_id)
+            for payload in item:
+                create_entity_relations(driver, payload["chunk_id"], payload["text"])
+
+    stages = [split_stage, embed_stage, qdrant_stage, neo4j_stage]
+    errors: list[BaseException] = []
+
+    def run(stage):
+        try:
+            stage()
+        except _PipelineAborted:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            abort.set()
+
+    with ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix="ingest") as pool:
+        for stage in stages:
+            pool.submit(run, stage)
+    if errors:
+        raise errors[0]
+
+    stale_ids = [chunk_id for chunk_id in existing if chunk_id not in seen_ids]
+    unchanged = counts["total"] - counts["new"] - counts["moved"]
+    print(
+        f"[DIFF] {counts['new']} new, {counts['moved']} moved, "
+        f"{unchanged} unchanged, {len(stale_ids)} stale"
+    )
+    if stale_ids:
+        _delete_chunks(stale_ids)
+        print(f"[INFO] Removed {len(stale_ids)} stale chunks.")
+    return {**counts, "stale": len(stale_ids)}
+
+
+_legal_chunker: LegalChunker | None = None
+
+
+def get_splitter():
+    """The configured text splitter (anything with split_text(text) -> list[str])."""
+    global _legal_chunker
+    if CHUNKER == "recursive":
+        return RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    if _legal_chunker is None:
+        _legal_chunker = LegalChunker()
+    return _legal_chunker
+
+
+def _estimate_chunk_count(text: str, page_metadata: list[dict] | None = None) -> int:
+    """Rough chunk count for ETA purposes, before the lazy splitter has run."""
+    chars = sum(len(p.get("text", "")) for p in page_metadata) if page_metadata else len(text)
+    if CHUNKER == "recursive":
+        return max(1, round(chars / max(CHUNK_SIZE - CHUNK_OVERLAP, 1)))
+    return get_splitter().estimate_chunk_count(chars)
+
+
+def _iter_chunk_payloads(text: str, source_name: str, case_id: str, session_id: str,
+                         page_metadata: list[dict] | None = None):
+    """Yield chunk payloads in document order, splitting page by page as consumed."""
+    splitter = get_splitter()
+
+    def pieces():
+        if page_metadata:
+            # Page-aware chunking: chunk each page separately to preserve page numbers
+            for page_info in page_metadata:
+                page_text = page_info.get("text", "")
+                if not page_text.strip():
+                    continue
+                for chunk_text in splitter.split_text(page_text):
+                    yield chunk_text, page_info
+        else:
+            # Legacy path: no page metadata
+            for chunk_text in splitter.split_text(text):
+                yield chunk_text, {}
+
+    chunk_id_for = chunk_id_sequence(case_id, session_id, source_name)
+    for chunk_index, (chunk_text, page_info) in enumerate(pieces()):
+        payload = {
+            "chunk_id": chunk_id_for(chunk_text),
+            "text": chunk_text,
+            "source": source_name,
+            "case_id": case_id,
+            "session_id": session_id,
+            "chunk_index": chunk_index,
+        }
+        if "page_number" in page_info:
+            payload["page_number"] = page_info["page_number"]
+        if "file_type" in page_info:
+            payload["file_type"] = page_info["file_type"]
+        yield payload
+
+
 # ------------------ INGEST DOCUMENT ------------------
 def ingest_document(text: str, source_name: str, case_id: str, page_metadata: list[dict] | None = None, session_id: str | None = None):
     """
@@ -131,80 +512,107 @@ def ingest_document(text: str, source_name: str, case_id: str, page_metadata: li
         page_metadata: Optional list of dicts with keys: text, page_number, file_type.
                       When provided, chunks preserve page-level metadata.
         session_id: Optional session ID. When set, doc is scoped to that chat session.
+
+    Every chunk payload carries its ordinals within the document: ``source``
+    (doc), ``page_number`` (page, when known) and ``chunk_index`` (sequence
+    across the whole document). Retrieval uses them to expand a hit to its
+    neighbouring chunks.
+
+    Re-ingesting a document is incremental: chunk IDs are content-derived, so
+    only new or edited chunks are embedded and chunks that disappeared from
+    the text are removed.
     """
     effective_session_id = session_id or ""
     print(f"\n=== Ingesting: {source_name} for Case: {case_id} (session: {effective_session_id or 'none'}) ===")
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
+    payloads = _iter_chunk_payloads(text, source_name, case_id, effective_session_id, page_metadata)
+    progress = ProgressReporter(case_id, source_name, resume=True)
+    progress.set_stage(
+        "embedding",
+        chunks_total=_estimate_chunk_count(text, page_metadata),
+        chunks_embedded=0,
+        points_upserted=0,
     )
 
-    payloads: list[dict] = []
+    def embed_new(chunks: list[dict]) -> list[list[float]]:
+        texts = [c["text"] for c in chunks]
+        t0 = time.time()
+        vectors = embedder.embed_documents(texts)
+        print(f"[EMBED] Encoded {len(texts)} chunks in {time.time() - t0:.1f}s")
+        return vectors
 
-    # Collect all chunks + metadata first, then batch-embed
-    all_texts: list[str] = []
-
-    if page_metadata:
-        # Page-aware chunking: chunk each page separately to preserve page numbers
-        for page_info in page_metadata:
-            page_text = page_info.get("text", "")
-            if not page_text.strip():
-                continue
-            page_chunks = splitter.split_text(page_text)
-            for chunk_text in page_chunks:
-                chunk_id = str(uuid.uuid4())
-                all_texts.append(chunk_text)
-
-                payload = {
-                    "chunk_id": chunk_id,
-                    "text": chunk_text,
-                    "source": source_name,
-                    "case_id": case_id,
-                    "session_id": effective_session_id,
-                }
-                if "page_number" in page_info:
-                    payload["page_number"] = page_info["page_number"]
-                if "file_type" in page_info:
-                    payload["file_type"] = page_info["file_type"]
-                payloads.append(payload)
-
-                create_chunk_node(driver, chunk_id, chunk_text, source_name, case_id, effective_session_id)
-                create_entity_relations(driver, chunk_id, chunk_text)
-
-        print(f"[INFO] Total chunks (page-aware): {len(all_texts)}")
-    else:
-        # Legacy path: no page metadata
-        chunks = splitter.split_text(text)
-        print(f"[INFO] Total chunks: {len(chunks)}")
-
-        for chunk_text in chunks:
-            chunk_id = str(uuid.uuid4())
-            all_texts.append(chunk_text)
-
-            payloads.append(
-                {
-                    "chunk_id": chunk_id,
-                    "text": chunk_text,
-                    "source": source_name,
-                    "case_id": case_id,
-                    "session_id": effective_session_id,
-                }
-            )
+    counts = sync_document_chunks(case_id, source_name, effective_session_id, payloads, embed_new, progress)
+    progress.finish(chunks_total=counts["total"])
 
-            create_chunk_node(driver, chunk_id, chunk_text, source_name, case_id, effective_session_id)
-            create_entity_relations(driver, chunk_id, chunk_text)
+    print("[DONE] Ingestion completed!")
 
-    # Batch-embed all chunks at once (3-10x faster than per-chunk)
-    print(f"[EMBED] Batch encoding {len(all_texts)} chunks...")
-    t0 = time.time()
-    vectors = embedder.embed_documents(all_texts)
-    print(f"[EMBED] Encoded {len(all_texts)} chunks in {time.time() - t0:.1f}s")
 
-    # Upsert into Qdrant
-    qdrant_upsert(qdrant, QDRANT_COLLECTION, vectors, payloads)
+# ------------------ CLONE DOCUMENT ------------------
+def clone_document(src_case_id: str, src_source: str, source_name: str, case_id: str,
+                   session_id: str | None = None, text: str = "", page_metadata: list[dict] | None = None):
+    """
+    Re-use the stored chunks and vectors of a byte-identical document that is
+    already ingested as (src_case_id, src_source): the points are copied with
+    their payloads re-stamped for the new case/session, so nothing is
+    re-chunked or re-embedded. Falls back to a full ingest_document() when the
+    source has no stored points (e.g. it was deleted in the meantime).
+    """
+    effective_session_id = session_id or ""
+    print(f"\n=== Cloning: {src_source} (case {src_case_id}) -> {source_name} (case {case_id}) ===")
 
-    print("[DONE] Ingestion completed!")
+    src_filter = models.Filter(
+        must=[
+            models.FieldCondition(key="case_id", match=models.MatchValue(value=src_case_id)),
+            models.FieldCondition(key="source", match=models.MatchValue(value=src_source)),
+        ]
+    )
+    points = []
+    offset = None
+    while True:
+        batch, offset = qdrant.scroll(
+            collection_name=QDRANT_COLLECTION,
+            scroll_filter=src_filter,
+            limit=256,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        points.extend(batch)
+        if offset is None:
+            break
+
+    if not points:
+        print("[WARN] Source document has no stored chunks. Falling back to full ingestion.")
+        ingest_document(text, source_name, case_id, page_metadata=page_metadata, session_id=session_id)
+        return
+
+    points.sort(key=lambda p: (p.payload.get("chunk_index") is None, p.payload.get("chunk_index") or 0))
+    payloads: list[dict] = []
+    vectors_by_id: dict[str, list[float]] = {}
+    chunk_id_for = chunk_id_sequence(case_id, effective_session_id, source_name)
+    for point in points:
+        payload = dict(point.payload)
+        chunk_id = chunk_id_for(payload.get("text", ""))
+        payload.update(
+            chunk_id=chunk_id,
+            source=source_name,
+            case_id=case_id,
+            session_id=effective_session_id,
+        )
+        payloads.append(payload)
+        vectors_by_id[chunk_id] = point.vector
+
+    print(f"[INFO] Re-using {len(points)} stored chunks (no parsing or embedding)")
+    progress = ProgressReporter(case_id, source_name, resume=True)
+    progress.set_stage("embedding", chunks_total=len(payloads), chunks_embedded=0, points_upserted=0)
+    sync_document_chunks(
+        case_id, source_name, effective_session_id, payloads,
+        lambda chunks: [vectors_by_id[c["chunk_id"]] for c in chunks],
+        progress,
+    )
+    progress.finish()
+
+    print("[DONE] Clone completed!")
 
 
 # ------------------ MAIN ------------------
@@ -1,16 +1,26 @@
+import io
 import os
 import re
 import tempfile
 import zipfile
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Parsers
 import pypdf
 from docx import Document
 from PIL import Image
-from sarvamai import SarvamAI
+from ingestion.ocr_scheduler import submit_ocr_job
+from ingestion.ocr_cache import (
+    page_fingerprint,
+    file_fingerprint,
+    cache_key,
+    get_cached_pages,
+    store_pages,
+)
 
 SARVAM_MAX_PAGES = 10
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tiff"}
+# Pages with less extractable text than this (and an image) are sent to OCR
+OCR_MIN_PAGE_CHARS = int(os.getenv("OCR_MIN_PAGE_CHARS", "30"))
 
 
 def _clean_ocr_markdown(text: str) -> str:
@@ -22,6 +32,11 @@ def _clean_ocr_markdown(text: str) -> str:
     return text.strip()
 
 
+def _natural_key(name: str):
+    """Sort key so page_2.md comes before page_10.md."""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
 def _get_sarvam_key():
     return os.getenv("SARVAM_API_KEY", "")
 
@@ -31,49 +46,30 @@ def load_text_file(file_path: str) -> str:
 
 def _sarvam_ocr(file_path: str) -> str:
     """Extract text from an image or scanned PDF using Sarvam Document Intelligence."""
-    api_key = _get_sarvam_key()
-    if not api_key:
+    if not _get_sarvam_key():
         return "OCR Failed: SARVAM_API_KEY is not set. Please add it to your .env file."
 
+    key = cache_key(file_fingerprint(file_path))
+    cached = get_cached_pages([key])
+    if key in cached:
+        print(f"[OCR cache] Hit for {file_path}")
+        return cached[key]
+
     tmp_pdf_path = None
     try:
-        client = SarvamAI(api_subscription_key=api_key)
-
         # Convert image files to PDF since Sarvam only accepts PDF/ZIP
         upload_path = file_path
         ext = os.path.splitext(file_path)[1].lower()
-        if ext in [".jpg", ".jpeg", ".png", ".bmp", ".tiff"]:
+        if ext in IMAGE_EXTENSIONS:
             img = Image.open(file_path).convert("RGB")
             fd, tmp_pdf_path = tempfile.mkstemp(suffix=".pdf")
             os.close(fd)
             img.save(tmp_pdf_path, "PDF")
             upload_path = tmp_pdf_path
 
-        # Create a document intelligence job
-        job = client.document_intelligence.create_job(
-            language="en-IN",
-            output_format="md",
-        )
-
-        # Upload the file, start, and wait for completion
-        job.upload_file(upload_path)
-        job.start()
-        job.wait_until_complete()
-
-        # Download output to a temp directory
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            output_path = os.path.join(tmp_dir, "output.zip")
-            job.download_output(output_path)
-
-            # Extract markdown text from the ZIP
-            text = ""
-            with zipfile.ZipFile(output_path, "r") as zf:
-                for name in sorted(zf.namelist()):
-                    if name.endswith(".md"):
-                        page_text = _clean_ocr_markdown(zf.read(name).decode("utf-8"))
-                        text += page_text + "\n"
-
-            return text.strip() if text.strip() else ""
+        text = "\n".join(_read_ocr_output(submit_ocr_job(upload_path).result())).strip()
+        store_pages({key: text})
+        return text
 
     except Exception as e:
         print(f"Sarvam OCR error for {file_path}: {e}")
@@ -83,127 +79,237 @@ def _sarvam_ocr(file_path: str) -> str:
             os.unlink(tmp_pdf_path)
 
 
-def _sarvam_ocr_pages(file_path: str) -> list[str]:
-    """Extract text from a PDF using Sarvam, returning a list of per-page texts."""
-    api_key = _get_sarvam_key()
-    if not api_key:
-        print("SARVAM_API_KEY is not set.")
-        return []
-
+def ocr_images(image_paths: list[str]) -> dict[str, str]:
+    """
+    OCR many images with as few Sarvam jobs as possible: uncached images are
+    packed SARVAM_MAX_PAGES at a time into one multi-page PDF and each output
+    page is mapped back to its source image. Results land in the same cache
+    _sarvam_ocr reads, so a later per-file parse of these images is free.
+    Returns {image_path: text} for the images that were OCR'd or cached.
+    """
+    if not _get_sarvam_key():
+        return {}
+    keys = {path: cache_key(file_fingerprint(path)) for path in image_paths}
+    cached = get_cached_pages(list(keys.values()))
+    results = {path: cached[k] for path, k in keys.items() if k in cached}
+    misses = [path for path in image_paths if path not in results]
+    groups = [misses[i:i + SARVAM_MAX_PAGES] for i in range(0, len(misses), SARVAM_MAX_PAGES)]
+    print(f"[Sarvam OCR] {len(image_paths)} images: {len(results)} cached, {len(misses)} in {len(groups)} jobs")
+
+    jobs = []
+    fresh = {}
     try:
-        client = SarvamAI(api_subscription_key=api_key)
-        job = client.document_intelligence.create_job(
-            language="en-IN",
-            output_format="md",
-        )
-        job.upload_file(file_path)
-        job.start()
-        job.wait_until_complete()
-
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            output_path = os.path.join(tmp_dir, "output.zip")
-            job.download_output(output_path)
-
-            page_texts = []
-            with zipfile.ZipFile(output_path, "r") as zf:
-                for name in sorted(zf.namelist()):
-                    if name.endswith(".md"):
-                        page_texts.append(_clean_ocr_markdown(zf.read(name).decode("utf-8")))
-            return page_texts
+        for group in groups:
+            try:
+                images = [Image.open(path).convert("RGB") for path in group]
+            except Exception as e:
+                print(f"[Sarvam OCR] Could not read image batch, leaving it to per-file OCR: {e}")
+                continue
+            fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+            with os.fdopen(fd, "wb") as f:
+                images[0].save(f, "PDF", save_all=True, append_images=images[1:])
+            jobs.append((group, pdf_path, submit_ocr_job(pdf_path)))
+
+        for group, _, future in jobs:
+            try:
+                texts = _read_ocr_output(future.result())
+            except Exception as e:
+                print(f"[Sarvam OCR] Image batch of {len(group)} failed: {e}")
+                continue
+            if len(texts) != len(group):
+                # Can't tell which page belongs to which image; leave them to per-file OCR
+                print(f"[Sarvam OCR] Image batch: expected {len(group)} pages, got {len(texts)}")
+                continue
+            fresh.update((path, text.strip()) for path, text in zip(group, texts))
+    finally:
+        for _, pdf_path, _ in jobs:
+            if os.path.exists(pdf_path):
+                os.unlink(pdf_path)
 
-    except Exception as e:
-        print(f"Sarvam OCR pages error for {file_path}: {e}")
-        return []
+    store_pages({keys[path]: text for path, text in fresh.items()})
+    results.update(fresh)
+    return results
 
 
-def load_pdf_file(file_path: str) -> str:
-    # First try pypdf for digital/text-based PDFs
-    text = ""
-    try:
-        reader = pypdf.PdfReader(file_path)
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    except Exception as e:
-        print(f"Error reading PDF {file_path}: {e}")
+def _read_ocr_output(output_zip: bytes) -> list[str]:
+    """Per-page cleaned markdown from a Sarvam output ZIP, in page order."""
+    page_texts = []
+    with zipfile.ZipFile(io.BytesIO(output_zip), "r") as zf:
+        for name in sorted(zf.namelist(), key=_natural_key):
+            if name.endswith(".md"):
+                page_texts.append(_clean_ocr_markdown(zf.read(name).decode("utf-8")))
+    return page_texts
 
-    # If pypdf got meaningful text, return it
-    if text.strip() and len(text.strip()) > 50:
-        return text
 
-    # Otherwise fall back to Sarvam for scanned PDFs (with chunking support)
-    print(f"PDF appears to be scanned, falling back to Sarvam OCR: {file_path}")
-    pages = load_pdf_with_pages(file_path, force_ocr=True)
+def load_pdf_file(file_path: str) -> str:
+    # Text layer where present, Sarvam OCR only for scanned/image-only pages
+    pages = load_pdf_with_pages(file_path)
     return "\n".join(p["text"] for p in pages) if pages else ""
 
 
-def _ocr_chunk(reader_pages, chunk_start, chunk_end):
-    """OCR a subset of pages. Returns (chunk_start, list_of_texts)."""
+def _write_page_batch(reader_pages, indices: list[int]) -> str:
+    """Write the given pages to a temporary PDF for one Sarvam job; caller deletes it."""
     writer = pypdf.PdfWriter()
-    for pg in range(chunk_start, chunk_end):
+    for pg in indices:
         writer.add_page(reader_pages[pg])
-
     fd, chunk_path = tempfile.mkstemp(suffix=".pdf")
-    os.close(fd)
+    with os.fdopen(fd, "wb") as f:
+        writer.write(f)
+    return chunk_path
+
+
+def ocr_pdf_pages(reader_pages, indices: list[int], on_pages_done=None, cache_only: bool = False) -> dict[int, str]:
+    """
+    OCR the given pages, serving repeats from the per-page cache and sending
+    only the misses to Sarvam in SARVAM_MAX_PAGES jobs through the shared
+    OCR scheduler. Returns {page_index: text}. ``on_pages_done(n)`` is called
+    as pages are served: once for the cache hits, then per finished batch.
+    With cache_only the misses are left out instead of sent to Sarvam.
+    """
+    if not cache_only and not _get_sarvam_key():
+        print("SARVAM_API_KEY is not set.")
+        return {}
+
+    keys = {}
+    for pg in indices:
+        try:
+            keys[pg] = cache_key(page_fingerprint(reader_pages[pg]))
+        except Exception as e:
+            print(f"[OCR cache] Could not fingerprint page {pg + 1}: {e}")
+    cached = get_cached_pages(list(keys.values()))
+    results = {pg: cached[k] for pg, k in keys.items() if k in cached}
+
+    misses = [pg for pg in indices if pg not in results]
+    if cache_only:
+        print(f"[Sarvam OCR] {len(results)} pages cached, {len(misses)} skipped (cache only)")
+        return results
+    print(f"[Sarvam OCR] {len(results)} pages cached, {len(misses)} to OCR")
+    if on_pages_done and results:
+        on_pages_done(len(results))
+    batches = [misses[i:i + SARVAM_MAX_PAGES] for i in range(0, len(misses), SARVAM_MAX_PAGES)]
+
+    # Queue every batch first so they compete fairly for the global OCR budget
+    jobs = []
+    fresh = {}
     try:
-        with open(chunk_path, "wb") as f:
-            writer.write(f)
-        print(f"[Sarvam OCR] Processing chunk pages {chunk_start + 1}-{chunk_end}...")
-        return (chunk_start, _sarvam_ocr_pages(chunk_path))
-    except Exception as e:
-        print(f"[Sarvam OCR] Chunk {chunk_start + 1}-{chunk_end} failed: {e}")
-        return (chunk_start, [])
+        for batch in batches:
+            path = _write_page_batch(reader_pages, batch)
+            jobs.append((batch, path, submit_ocr_job(path)))
+
+        for batch, _, future in jobs:
+            label = f"pages {batch[0] + 1}-{batch[-1] + 1}"
+            try:
+                texts = _read_ocr_output(future.result())
+            except Exception as e:
+                print(f"[Sarvam OCR] {label} failed: {e}")
+                continue
+            finally:
+                if on_pages_done:
+                    on_pages_done(len(batch))
+            results.update(zip(batch, texts))
+            # Only cache when Sarvam returned one page per input page
+            if len(texts) == len(batch):
+                fresh.update(zip(batch, texts))
+            else:
+                print(f"[Sarvam OCR] {label}: expected {len(batch)} pages, got {len(texts)}")
     finally:
-        if os.path.exists(chunk_path):
-            os.unlink(chunk_path)
+        for _, path, _ in jobs:
+            if os.path.exists(path):
+                os.unlink(path)
+
+    store_pages({keys[pg]: text for pg, text in fresh.items() if pg in keys})
+    return results
 
 
 def load_pdf_with_pages(file_path: str, force_ocr: bool = False) -> list[dict]:
     """Load PDF returning per-page chunks with page numbers."""
-    if force_ocr:
-        print(f"User marked as scanned, using Sarvam OCR: {file_path}")
-        reader = pypdf.PdfReader(file_path)
-        total_pages = len(reader.pages)
-        print(f"[Sarvam OCR] PDF has {total_pages} pages (max per job: {SARVAM_MAX_PAGES})")
-
-        if total_pages <= SARVAM_MAX_PAGES:
-            page_texts = _sarvam_ocr_pages(file_path)
-            return [{"text": t, "page_number": i + 1} for i, t in enumerate(page_texts) if t.strip()]
-
-        # Submit all chunks in parallel (max 3 concurrent Sarvam jobs)
-        all_pages = []
-        chunks_ranges = [
-            (chunk_start, min(chunk_start + SARVAM_MAX_PAGES, total_pages))
-            for chunk_start in range(0, total_pages, SARVAM_MAX_PAGES)
-        ]
-
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            futures = {
-                executor.submit(_ocr_chunk, reader.pages, start, end): (start, end)
-                for start, end in chunks_ranges
-            }
-            for future in as_completed(futures):
-                chunk_start, chunk_texts = future.result()
-                for i, text in enumerate(chunk_texts):
-                    if text.strip():
-                        all_pages.append({"text": text, "page_number": chunk_start + i + 1})
-
-        # Sort by page number since parallel execution returns in arbitrary order
-        all_pages.sort(key=lambda p: p["page_number"])
-        return all_pages
+    try:
+        total_pages = count_pdf_pages(file_path)
+    except Exception as e:
+        print(f"Error reading PDF {file_path}: {e}")
+        return []
+    pages = extract_pdf_page_range(file_path, 0, total_pages, force_ocr=force_ocr)
+    return apply_selective_ocr(file_path, pages)
+
+
+def count_pdf_pages(file_path: str) -> int:
+    """Return the number of pages in a PDF (reads only the page tree)."""
+    return len(pypdf.PdfReader(file_path).pages)
 
+
+def _page_has_images(page) -> bool:
+    """True if the page draws an image XObject or inline image (i.e. may be a scan)."""
+    try:
+        resources = page.get("/Resources")
+        resources = resources.get_object() if resources is not None else {}
+        xobjects = resources.get("/XObject")
+        if xobjects is not None:
+            for xobj in xobjects.get_object().values():
+                if xobj.get_object().get("/Subtype") == "/Image":
+                    return True
+        contents = page.get_contents()
+        return contents is not None and re.search(rb"(^|\s)BI\s", contents.get_data()) is not None
+    except Exception:
+        # Can't tell: let the caller's text check decide
+        return True
+
+
+def extract_pdf_page_range(file_path: str, start: int, end: int, force_ocr: bool = False) -> list[dict]:
+    """
+    Extract the text layer of pages [start, end) of a PDF.
+    Module-level so it can run in a worker process; each call opens its own reader.
+
+    Pages whose text layer is shorter than OCR_MIN_PAGE_CHARS and that draw
+    an image are returned with ``needs_ocr: True`` for apply_selective_ocr.
+    With force_ocr (user marked the file as scanned) every such low-text
+    page is flagged, image or not.
+    """
     pages = []
     try:
         reader = pypdf.PdfReader(file_path)
-        for i, page in enumerate(reader.pages, 1):
-            page_text = page.extract_text()
-            if page_text and page_text.strip():
-                pages.append({"text": page_text, "page_number": i})
+        for i in range(start, min(end, len(reader.pages))):
+            page = reader.pages[i]
+            page_text = page.extract_text() or ""
+            if len(page_text.strip()) < OCR_MIN_PAGE_CHARS and (force_ocr or _page_has_images(page)):
+                pages.append({"text": page_text, "page_number": i + 1, "needs_ocr": True})
+            elif page_text.strip():
+                pages.append({"text": page_text, "page_number": i + 1})
     except Exception as e:
-        print(f"Error reading PDF {file_path}: {e}")
+        print(f"Error reading PDF {file_path} pages {start + 1}-{end}: {e}")
     return pages
 
+
+def apply_selective_ocr(file_path: str, pages: list[dict], progress=None, cache_only: bool = False) -> list[dict]:
+    """
+    OCR the pages flagged ``needs_ocr`` by extract_pdf_page_range, batched
+    into SARVAM_MAX_PAGES jobs, and merge them back in page order. OCR'd
+    pages are marked ``ocr: True``; pages that stay empty are dropped.
+    ``progress`` (a ProgressReporter) gets pages_ocr_total, then pages_ocr
+    per finished batch. With cache_only only cached OCR output is used.
+    """
+    flagged = [p["page_number"] - 1 for p in pages if p.get("needs_ocr")]
+    if flagged:
+        print(f"[Sarvam OCR] {file_path}: {len(flagged)} of {len(pages)} pages lack a text layer")
+        on_pages_done = None
+        if progress:
+            progress.update(pages_ocr_total=len(flagged), pages_ocr=0)
+            on_pages_done = lambda n: progress.add(pages_ocr=n)
+        reader = pypdf.PdfReader(file_path)
+        ocr_texts = ocr_pdf_pages(reader.pages, flagged, on_pages_done, cache_only=cache_only)
+        for page in pages:
+            if page.pop("needs_ocr", False):
+                ocr_text = ocr_texts.get(page["page_number"] - 1, "")
+                if ocr_text.strip():
+                    page["text"] = ocr_text
+                    page["ocr"] = True
+    return [p for p in pages if p["text"].strip()]
+
+
+def ocr_page_ratio(pages: list[dict]) -> float:
+    """Fraction of a document's text pages that came from OCR."""
+    return round(sum(1 for p in pages if p.get("ocr")) / len(pages), 3) if pages else 0.0
+
+
 def load_docx_file(file_path: str) -> str:
     text = ""
     try:
@@ -228,7 +334,7 @@ def parse_file(file_path: str) -> str:
         return load_pdf_file(file_path)
     elif ext in [".docx", ".doc"]:
         return load_docx_file(file_path)
-    elif ext in [".jpg", ".jpeg", ".png", ".bmp", ".tiff"]:
+    elif ext in IMAGE_EXTENSIONS:
         return load_image_file(file_path)
     else:
         # Fallback to text
@@ -266,4 +372,7 @@ def parse_file_with_pages(file_path: str, force_ocr: bool = False) -> list[dict]
         return pages if pages else [{"text": "", "file_type": file_type}]
     else:
         text = parse_file(file_path)
-        return [{"text": text, "file_type": file_type}]
+        entry = {"text": text, "file_type": file_type}
+        if file_type == "Image/OCR":
+            entry["ocr"] = True
+        return [entry]
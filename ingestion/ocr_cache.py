@@ -0,0 +1,105 @@
+"""
+Per-page cache of Sarvam OCR output.
+
+Pages are keyed by a fingerprint of what gets rendered (content stream,
+referenced images/fonts, page box and rotation) combined with the OCR
+language and output format, so a retry, a re-upload or the same annexure
+filed in another case never pays for OCR twice. Cache failures are never
+fatal: a miss just means the page is sent to Sarvam.
+"""
+
+import hashlib
+from datetime import datetime
+
+OCR_LANGUAGE = "en-IN"
+OCR_OUTPUT_FORMAT = "md"
+# Bump when _clean_ocr_markdown or the fingerprint changes to invalidate old entries
+OCR_CACHE_VERSION = 1
+
+
+def _collection():
+    # Imported lazily: the loader also runs in spawned parse workers, which
+    # must not open a MongoDB connection just by importing this module.
+    from database import ocr_page_cache_collection
+    return ocr_page_cache_collection
+
+
+def _hash_object(obj, h, seen: set, depth: int = 0):
+    """Feed the bytes of every stream reachable from `obj` into `h`."""
+    if depth > 12:
+        return
+    ref = getattr(obj, "indirect_reference", None) or (obj if hasattr(obj, "idnum") else None)
+    if ref is not None:
+        key = (ref.idnum, ref.generation)
+        if key in seen:
+            return
+        seen.add(key)
+    obj = obj.get_object() if hasattr(obj, "get_object") else obj
+
+    data = getattr(obj, "_data", None)
+    if isinstance(data, bytes):
+        h.update(data)
+    if isinstance(obj, dict):
+        for k in sorted(obj.keys()):
+            if k == "/Parent":
+                continue
+            h.update(str(k).encode())
+            _hash_object(obj[k], h, seen, depth + 1)
+    elif isinstance(obj, list):
+        for item in obj:
+            _hash_object(item, h, seen, depth + 1)
+    elif data is None:
+        h.update(repr(obj).encode())
+
+
+def page_fingerprint(page) -> str:
+    """sha256 over everything that determines how a pypdf page renders."""
+    h = hashlib.sha256()
+    h.update(f"{[float(x) for x in page.mediabox]}|{page.rotation}".encode())
+    contents = page.get_contents()
+    if contents is not None:
+        h.update(contents.get_data())
+    _hash_object(page.get("/Resources"), h, set())
+    return h.hexdigest()
+
+
+def file_fingerprint(file_path: str) -> str:
+    """sha256 of a file's bytes, for single-image OCR inputs."""
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_key(fingerprint: str, language: str = OCR_LANGUAGE, output_format: str = OCR_OUTPUT_FORMAT) -> str:
+    return f"v{OCR_CACHE_VERSION}:{language}:{output_format}:{fingerprint}"
+
+
+def get_cached_pages(keys: list[str]) -> dict[str, str]:
+    """Return {key: text} for the keys already in the cache."""
+    if not keys:
+        return {}
+    try:
+        return {
+            doc["_id"]: doc["text"]
+            for doc in _collection().find({"_id": {"$in": list(set(keys))}}, {"text": 1})
+        }
+    except Exception as e:
+        print(f"[OCR cache] Lookup failed, treating as miss: {e}")
+        return {}
+
+
+def store_pages(entries: dict[str, str]):
+    """Insert or refresh cache entries ({key: text})."""
+    if not entries:
+        return
+    from pymongo import UpdateOne
+    now = datetime.utcnow()
+    try:
+        _collection().bulk_write([
+            UpdateOne({"_id": key}, {"$set": {"text": text, "created_at": now}}, upsert=True)
+            for key, text in entries.items()
+        ], ordered=False)
+    except Exception as e:
+        print(f"[OCR cache] Store failed: {e}")
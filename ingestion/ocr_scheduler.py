@@ -0,0 +1,226 @@
+"""
+Process-wide scheduler for Sarvam Document Intelligence jobs.
+
+Every OCR job in the process goes through one asyncio loop running in a
+daemon thread, under a global concurrency cap (OCR_MAX_CONCURRENT_JOBS)
+and a job-start rate budget (OCR_JOBS_PER_MINUTE). Waiting jobs are queued
+per case and dispatched round-robin, so one large scanned upload cannot
+starve other cases. Job status is polled with asyncio.sleep between
+checks, so a running job costs no thread while Sarvam works on it.
+
+Callers are ordinary threads: ``submit_ocr_job`` returns a
+concurrent.futures.Future resolving to the job's output ZIP bytes.
+"""
+
+import os
+import time
+import asyncio
+import tempfile
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from sarvamai import SarvamAI
+
+from ingestion.ocr_cache import OCR_LANGUAGE, OCR_OUTPUT_FORMAT
+
+OCR_MAX_CONCURRENT_JOBS = int(os.getenv("OCR_MAX_CONCURRENT_JOBS", "4"))
+OCR_JOBS_PER_MINUTE = float(os.getenv("OCR_JOBS_PER_MINUTE", "30"))
+OCR_POLL_SECONDS = float(os.getenv("OCR_POLL_SECONDS", "2"))
+OCR_JOB_TIMEOUT_SECONDS = float(os.getenv("OCR_JOB_TIMEOUT_SECONDS", "900"))
+
+_TERMINAL_STATES = {"Completed", "PartiallyCompleted", "Failed"}
+
+# Fair-queuing key for OCR submitted from the current context. Set by the
+# async parsing entry point; asyncio.to_thread carries it into the loader.
+current_ocr_key: contextvars.ContextVar[str] = contextvars.ContextVar("current_ocr_key", default="default")
+
+
+class OcrScheduler:
+    def __init__(self, max_concurrent: int, jobs_per_minute: float):
+        self.max_concurrent = max_concurrent
+        self.rate = jobs_per_minute / 60.0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._start_lock = threading.Lock()
+        # Guards the queues and counters, which stats() reads from request threads
+        self._state_lock = threading.Lock()
+        # key -> deque of (file_path, Future, enqueued_at); OrderedDict order is the round-robin
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+        self._pending: asyncio.Event | None = None
+        self._running = 0
+        # Token bucket: allow a burst of one job per slot, then OCR_JOBS_PER_MINUTE
+        self.burst = float(max(1, max_concurrent))
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "wait_s": 0.0, "run_s": 0.0}
+
+    # ---------------- thread-side API ----------------
+    def submit(self, file_path: str, key: str | None = None) -> Future:
+        loop = self._ensure_loop()
+        future: Future = Future()
+        key = key or current_ocr_key.get()
+        loop.call_soon_threadsafe(self._enqueue, key, file_path, future)
+        return future
+
+    def stats(self) -> dict:
+        # Held only for the copy, never across an await, so callers never wait on the loop
+        with self._state_lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> dict:
+        completed = self._stats["completed"] or 1
+        return {
+            "queue_depth": sum(len(q) for q in self._queues.values()),
+            "queued_by_case": {k: len(q) for k, q in self._queues.items() if q},
+            "running": self._running,
+            "max_concurrent": self.max_concurrent,
+            "jobs_per_minute": self.rate * 60,
+            "submitted": self._stats["submitted"],
+            "completed": self._stats["completed"],
+            "failed": self._stats["failed"],
+            "avg_wait_s": round(self._stats["wait_s"] / completed, 2),
+            "avg_run_s": round(self._stats["run_s"] / completed, 2),
+        }
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    ready = threading.Event()
+                    threading.Thread(target=self._serve, args=(loop, ready), name="ocr-scheduler", daemon=True).start()
+                    ready.wait()
+                    self._loop = loop
+        return self._loop
+
+    def _serve(self, loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        self._pending = asyncio.Event()
+        loop.create_task(self._dispatch())
+        ready.set()
+        loop.run_forever()
+
+    # ---------------- loop-side ----------------
+    def _enqueue(self, key: str, file_path: str, future: Future):
+        with self._state_lock:
+            self._queues.setdefault(key, deque()).append((file_path, future, time.monotonic()))
+            self._stats["submitted"] += 1
+        self._pending.set()
+
+    def _next_job(self):
+        """Pop the head of the next non-empty case queue, round-robin."""
+        with self._state_lock:
+            for key in list(self._queues):
+                q = self._queues[key]
+                if q:
+                    self._queues.move_to_end(key)
+                    return q.popleft()
+                del self._queues[key]
+        return None
+
+    async def _take_token(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    async def _dispatch(self):
+        slots = asyncio.Semaphore(self.max_concurrent)
+        while True:
+            await self._pending.wait()
+            await slots.acquire()
+            job = self._next_job()
+            if job is None:
+                self._pending.clear()
+                slots.release()
+                continue
+            await self._take_token()
+            asyncio.get_running_loop().create_task(self._execute(job, slots))
+
+    async def _execute(self, job, slots: asyncio.Semaphore):
+        file_path, future, enqueued_at = job
+        started = time.monotonic()
+        with self._state_lock:
+            self._running += 1
+        try:
+            if future.set_running_or_notify_cancel():
+                output = await self._run_sarvam_job(file_path)
+                future.set_result(output)
+                with self._state_lock:
+                    self._stats["completed"] += 1
+                    self._stats["wait_s"] += started - enqueued_at
+                    self._stats["run_s"] += time.monotonic() - started
+        except Exception as e:
+            with self._state_lock:
+                self._stats["failed"] += 1
+            future.set_exception(e)
+        finally:
+            with self._state_lock:
+                self._running -= 1
+            slots.release()
+
+    async def _run_sarvam_job(self, file_path: str) -> bytes:
+        loop = asyncio.get_running_loop()
+        client = SarvamAI(api_subscription_key=os.getenv("SARVAM_API_KEY", ""))
+        # SDK calls are short blocking HTTP requests; only the wait is long
+        job = await loop.run_in_executor(None, lambda: client.document_intelligence.create_job(
+            language=OCR_LANGUAGE,
+            output_format=OCR_OUTPUT_FORMAT,
+        ))
+        await loop.run_in_executor(None, job.upload_file, file_path)
+        await loop.run_in_executor(None, job.start)
+
+        if hasattr(job, "get_status"):
+            deadline = time.monotonic() + OCR_JOB_TIMEOUT_SECONDS
+            while True:
+                status = await loop.run_in_executor(None, job.get_status)
+                state = getattr(status, "job_state", None)
+                if state in _TERMINAL_STATES:
+                    if state == "Failed":
+                        raise RuntimeError(f"Sarvam job failed: {getattr(status, 'error_message', '')}")
+                    break
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Sarvam job exceeded {OCR_JOB_TIMEOUT_SECONDS:.0f}s")
+                await asyncio.sleep(OCR_POLL_SECONDS)
+        else:
+            # Older SDKs only offer a blocking wait: give it its own thread rather
+            # than holding a slot of the shared executor for the whole job
+            await asyncio.wait_for(_in_own_thread(job.wait_until_complete), OCR_JOB_TIMEOUT_SECONDS)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "output.zip")
+            await loop.run_in_executor(None, job.download_output, output_path)
+            with open(output_path, "rb") as f:
+                return f.read()
+
+
+def _in_own_thread(fn) -> asyncio.Future:
+    """Run a long blocking call in a dedicated daemon thread; awaitable from the loop."""
+    future: Future = Future()
+
+    def run():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+
+    threading.Thread(target=run, name="ocr-wait", daemon=True).start()
+    return asyncio.wrap_future(future)
+
+
+_scheduler = OcrScheduler(OCR_MAX_CONCURRENT_JOBS, OCR_JOBS_PER_MINUTE)
+
+
+def submit_ocr_job(file_path: str, key: str | None = None) -> Future:
+    """Queue a PDF for OCR; the Future resolves to Sarvam's output ZIP bytes."""
+    return _scheduler.submit(file_path, key)
+
+
+def get_ocr_stats() -> dict:
+    return _scheduler.stats()
@@ -0,0 +1,127 @@
+"""
+Structured ingestion progress for document_status.
+
+A ProgressReporter accumulates per-stage counters for one document and
+publishes them under ``progress`` in its document_status record, at most
+once every PROGRESS_MIN_INTERVAL_SECONDS (stage changes and the final
+update are always written). Stage timings are kept alongside the counters
+so per-case throughput can be aggregated straight from Mongo.
+
+    progress: {
+        stage: parsing | parsed | queued | embedding | done,
+        pages_total, pages_parsed, pages_ocr_total, pages_ocr,
+        chunks_total (estimate until done), chunks_embedded, points_upserted,
+        parse_seconds, embed_seconds, eta_seconds, updated_at
+    }
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+
+PROGRESS_MIN_INTERVAL_SECONDS = float(os.getenv("PROGRESS_MIN_INTERVAL_SECONDS", "2"))
+
+_COUNTERS = ("pages_total", "pages_parsed", "pages_ocr_total", "pages_ocr",
+             "chunks_total", "chunks_embedded", "points_upserted")
+
+
+def _collection():
+    # Imported lazily so the loader's worker processes never touch MongoDB
+    from database import document_status_collection
+    return document_status_collection
+
+
+class ProgressReporter:
+    """
+    Progress of one document. ``resume=True`` picks up the counters already
+    published by an earlier stage (parsing runs in the upload request, the
+    rest in a queue job); otherwise the document starts from a clean slate.
+    """
+
+    def __init__(self, case_id: str, filename: str, resume: bool = False):
+        self.case_id = case_id
+        self.filename = filename
+        self.stage: str | None = None
+        self.counters: dict[str, int] = {}
+        self.timings: dict[str, float] = {}
+        if resume:
+            self._load()
+        self._stage_started = time.time()
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            doc = _collection().find_one(
+                {"case_id": self.case_id, "filename": self.filename}, {"progress": 1}
+            ) or {}
+        except Exception:
+            doc = {}
+        previous = doc.get("progress") or {}
+        self.counters = {k: previous[k] for k in _COUNTERS if k in previous}
+        self.timings = {k: previous[k] for k in ("parse_seconds", "embed_seconds") if k in previous}
+
+    def set_stage(self, stage: str, **counters):
+        with self._lock:
+            self._close_stage()
+            self.stage = stage
+            self._stage_started = time.time()
+            self.counters.update(counters)
+        self.flush(force=True)
+
+    def update(self, **counters):
+        """Set absolute counter values; publishes if the throttle interval has passed."""
+        with self._lock:
+            self.counters.update(counters)
+        self.flush()
+
+    def add(self, **increments):
+        """Increment counters (safe from pipeline threads)."""
+        with self._lock:
+            for name, value in increments.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+        self.flush()
+
+    def finish(self, **counters):
+        self.set_stage("done", **counters)
+
+    def _close_stage(self):
+        timing_key = {"parsing": "parse_seconds", "embedding": "embed_seconds"}.get(self.stage)
+        if timing_key:
+            self.timings[timing_key] = round(time.time() - self._stage_started, 2)
+
+    def _eta_seconds(self) -> float | None:
+        if self.stage == "embedding":
+            done = self.counters.get("chunks_embedded", 0)
+            total = self.counters.get("chunks_total", 0)
+        elif self.stage == "parsing":
+            # Text extraction and OCR pages counted as equal units of work
+            done = self.counters.get("pages_parsed", 0) + self.counters.get("pages_ocr", 0)
+            total = self.counters.get("pages_total", 0) + self.counters.get("pages_ocr_total", 0)
+        else:
+            return None
+        elapsed = time.time() - self._stage_started
+        if not done or not total or elapsed <= 0:
+            return None
+        return round(max(total - done, 0) / (done / elapsed), 1)
+
+    def flush(self, force: bool = False):
+        now = time.time()
+        if not force and now - self._last_flush < PROGRESS_MIN_INTERVAL_SECONDS:
+            return
+        self._last_flush = now
+        with self._lock:
+            progress = {k: v for k, v in self.counters.items() if k in _COUNTERS}
+            progress.update(self.timings)
+            progress["stage"] = self.stage
+            progress["eta_seconds"] = self._eta_seconds()
+            progress["updated_at"] = datetime.utcnow()
+        try:
+            _collection().update_one(
+                {"case_id": self.case_id, "filename": self.filename},
+                {"$set": {"progress": progress}}
+            )
+        except Exception as e:
+            # Progress is best-effort; never fail an ingestion over it
+            print(f"[WARN] Could not publish progress for {self.filename}: {e}")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Document store migration.
+
+Imports files from the flat ``documents/<filename>`` layout into the
+content-addressed store (services/document_store.py) for every
+document_status record that has no ``document_files`` entry yet. Safe to
+re-run: already indexed documents are skipped.
+
+    python migrate_document_store.py              # import legacy files
+    python migrate_document_store.py --dry-run    # report only
+    python migrate_document_store.py --remove-legacy
+        # also delete flat files once every record using them is imported
+    python migrate_document_store.py --gc
+        # delete blobs that no document points at any more
+"""
+
+import os
+import argparse
+
+from database import document_status_collection, document_files_collection
+from services.blob_storage import get_storage
+from services.document_store import import_file, legacy_path, hash_file, unreferenced_blobs
+
+
+def migrate(dry_run: bool = False, remove_legacy: bool = False):
+    indexed = {(r["case_id"], r["filename"]) for r in document_files_collection.find({}, {"case_id": 1, "filename": 1})}
+    imported = missing = 0
+    mismatched = []
+
+    for doc in document_status_collection.find({}, {"case_id": 1, "filename": 1, "content_hash": 1}):
+        key = (doc["case_id"], doc["filename"])
+        if key in indexed:
+            continue
+        source = legacy_path(doc["filename"])
+        if not os.path.isfile(source):
+            missing += 1
+            continue
+        if doc.get("content_hash") and hash_file(source)[1] != doc["content_hash"]:
+            # Another case uploaded a file with the same name over this one
+            mismatched.append(key)
+        imported += 1
+        if not dry_run:
+            import_file(doc["case_id"], doc["filename"], source)
+            indexed.add(key)
+
+    print(f"{'would import' if dry_run else 'imported'} {imported} documents, {missing} without a file on disk")
+    for case_id, filename in mismatched:
+        print(f"  [WARN] {filename} (case {case_id}): file on disk differs from the uploaded content_hash")
+
+    if remove_legacy and not dry_run:
+        still_needed = {
+            doc["filename"] for doc in document_status_collection.find({}, {"case_id": 1, "filename": 1})
+            if (doc["case_id"], doc["filename"]) not in indexed
+        }
+        removed = 0
+        for doc_filename in {f for _, f in indexed} - still_needed:
+            path = legacy_path(doc_filename)
+            if os.path.isfile(path):
+                os.unlink(path)
+                removed += 1
+        print(f"removed {removed} legacy files")
+
+
+def collect_garbage(dry_run: bool = False):
+    freed = count = 0
+    storage = get_storage()
+    for key, size in unreferenced_blobs():
+        count += 1
+        freed += size
+        if not dry_run:
+            storage.delete(key)
+    print(f"{'would delete' if dry_run else 'deleted'} {count} unreferenced blobs ({freed / (1024 * 1024):.1f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move flat documents/ files into the content-addressed store")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--remove-legacy", action="store_true", help="delete flat files once imported")
+    parser.add_argument("--gc", action="store_true", help="delete blobs no document references")
+    args = parser.parse_args()
+
+    migrate(dry_run=args.dry_run, remove_legacy=args.remove_legacy)
+    if args.gc:
+        collect_garbage(dry_run=args.dry_run)
@@ -0,0 +1,90 @@
+"""
+Small-to-big retrieval: search precise chunks, then widen each winner to
+its +/- NEIGHBOR_WINDOW neighbours within the same document, stitching
+consecutive chunks back together without the overlap they share.
+"""
+
+import os
+
+from qdrant_client import models
+
+NEIGHBOR_WINDOW = int(os.getenv("RETRIEVAL_NEIGHBOR_WINDOW", "1"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "300"))
+
+
+def merge_overlap(left: str, right: str) -> str:
+    """Join two consecutive chunks, dropping the splitter overlap they share."""
+    max_size = min(len(left), len(right), CHUNK_OVERLAP * 2)
+    for size in range(max_size, 10, -1):
+        if left.endswith(right[:size]):
+            return left + right[size:]
+    return f"{left}\n{right}"
+
+
+def expand_with_neighbors(client, collection: str, q_filter, points: list, window: int = NEIGHBOR_WINDOW) -> dict:
+    """
+    Expand retrieved points to their neighbouring chunks in one batched scroll.
+
+    Returns {point_id: expanded_text}. Points without a stored ``chunk_index``
+    (ingested before ordinals existed) are left out and keep their own text.
+    Neighbours already attached to a higher-ranked point are not repeated.
+    """
+    if window <= 0:
+        return {}
+
+    windows = []
+    for point in points:
+        idx = point.payload.get("chunk_index")
+        src = point.payload.get("source")
+        if idx is None or not src:
+            continue
+        windows.append((point, src, idx))
+    if not windows:
+        return {}
+
+    window_filters = [
+        models.Filter(
+            must=[
+                models.FieldCondition(key="source", match=models.MatchValue(value=src)),
+                models.FieldCondition(key="chunk_index", range=models.Range(gte=idx - window, lte=idx + window)),
+            ]
+        )
+        for _, src, idx in windows
+    ]
+    try:
+        neighbors, _ = client.scroll(
+            collection_name=collection,
+            scroll_filter=models.Filter(must=[q_filter, models.Filter(should=window_filters)]),
+            limit=len(windows) * (2 * window + 1),
+            with_payload=True,
+            with_vectors=False,
+        )
+    except Exception as e:
+        print(f"[WARN] Neighbour expansion failed, using bare chunks: {e}")
+        return {}
+
+    by_source: dict[str, dict[int, str]] = {}
+    for n in neighbors:
+        src = n.payload.get("source")
+        idx = n.payload.get("chunk_index")
+        if src and idx is not None:
+            by_source.setdefault(src, {})[idx] = n.payload.get("text", "")
+
+    expanded = {}
+    used: set[tuple[str, int]] = set()
+    for point, src, idx in windows:
+        texts_by_idx = by_source.get(src, {})
+        used.add((src, idx))
+        merged = point.payload.get("text", "")
+        for i in range(idx - 1, idx - window - 1, -1):
+            if i not in texts_by_idx or (src, i) in used:
+                break
+            merged = merge_overlap(texts_by_idx[i], merged)
+            used.add((src, i))
+        for i in range(idx + 1, idx + window + 1):
+            if i not in texts_by_idx or (src, i) in used:
+                break
+            merged = merge_overlap(merged, texts_by_idx[i])
+            used.add((src, i))
+        expanded[point.id] = merged
+    return expanded
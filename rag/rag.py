@@ -12,6 +12,7 @@ from neo4j_graphrag.retrievers.external.qdrant.qdrant import QdrantNeo4jRetrieve
 from neo4j_graphrag.types import LLMMessage, RetrieverResultItem
 
 from utils.embeddings import embedder, embed_text
+from rag.neighbors import expand_with_neighbors
 from utils.system_settings import load_provider_preset, get_effective_preset
 
 
@@ -38,6 +39,14 @@ RAG_MODEL = os.getenv("RAG_MODEL", "gpt-4o-mini")
 driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
 qdrant = QdrantClient(url=QDRANT_URL, api_key=QDRANT_KEY)
 
+BASE_TOP_K = int(os.getenv("RETRIEVAL_BASE_TOP_K", "10"))
+DETAILED_TOP_K = int(os.getenv("RETRIEVAL_DETAILED_TOP_K", "20"))
+# Dense candidates handed to the cross-encoder: min(top_k * multiplier, max).
+# Tune with benchmarks/retrieval_grid.py.
+FETCH_MULTIPLIER = int(os.getenv("RETRIEVAL_FETCH_MULTIPLIER", "3"))
+FETCH_K_MAX = int(os.getenv("RETRIEVAL_FETCH_K_MAX", "80"))
+
+
 def _get_llm_provider(user_id=None):
     """Get LLM provider based on current preset (dynamic), with optional per-user override"""
     provider = get_effective_preset(user_id)
@@ -206,8 +215,8 @@ def ask(query: str, case_id: str, history: list = [], top_k=5, user_id=None):
             # 1. Embed
             query_vector = self.embedder.embed_query(query_text)
 
-            # 2. Search Qdrant with 3x top_k for re-ranking headroom
-            fetch_k = min(top_k * 3, 80)
+            # 2. Search Qdrant with FETCH_MULTIPLIER x top_k for re-ranking headroom
+            fetch_k = min(top_k * FETCH_MULTIPLIER, FETCH_K_MAX)
             result = self.client.query_points(
                 collection_name=self.collection,
                 query=query_vector,
@@ -221,11 +230,17 @@ def ask(query: str, case_id: str, history: list = [], top_k=5, user_id=None):
             doc_texts = [p.payload.get("text", "") for p in points]
             reranked = rerank(query_text, doc_texts, top_k=top_k)
 
-            # 4. Format re-ranked results with numbered citations
+            # 4. Expand winners to neighbouring chunks (single batched fetch)
+            expanded = expand_with_neighbors(
+                self.client, self.collection, self.q_filter,
+                [points[orig_idx] for orig_idx, _ in reranked],
+            )
+
+            # 5. Format re-ranked results with numbered citations
             items = []
             for citation_idx, (orig_idx, rerank_score) in enumerate(reranked, 1):
                 point = points[orig_idx]
-                content = point.payload.get("text", "")
+                content = expanded.get(point.id, point.payload.get("text", ""))
                 src = point.payload.get("source", "")
                 page_num = point.payload.get("page_number")
                 file_type = point.payload.get("file_type")
@@ -263,13 +278,14 @@ def ask(query: str, case_id: str, history: list = [], top_k=5, user_id=None):
 
     # Dynamic Top-K Adjustment
     # If the user asks for a "report", "summary", or "detailed", we need MORE context.
+    # Hits are widened to neighbouring chunks, so fewer of them are needed.
     lower_query = query.lower()
     if any(keyword in lower_query for keyword in ["report", "summary", "detailed", "everything", "full"]):
-        print("[INFO] Detailed query detected. Boosting top_k to 50.")
-        top_k = max(top_k, 50)
+        print(f"[INFO] Detailed query detected. Boosting top_k to {DETAILED_TOP_K}.")
+        top_k = max(top_k, DETAILED_TOP_K)
     else:
         # Minimum baseline for good context
-        top_k = max(top_k, 15)
+        top_k = max(top_k, BASE_TOP_K)
 
     try:
         result = rag.search(
@@ -429,7 +445,7 @@ def ask_stream(query: str, case_id: str, history: list = [], top_k=5, user_id=No
             from rag.reranker import rerank
 
             query_vector = self.embedder.embed_query(query_text)
-            fetch_k = min(top_k * 3, 80)
+            fetch_k = min(top_k * FETCH_MULTIPLIER, FETCH_K_MAX)
             result = self.client.query_points(
                 collection_name=self.collection,
                 query=query_vector,
@@ -440,11 +456,15 @@ def ask_stream(query: str, case_id: str, history: list = [], top_k=5, user_id=No
             points = result.points
             doc_texts = [p.payload.get("text", "") for p in points]
             reranked = rerank(query_text, doc_texts, top_k=top_k)
+            expanded = expand_with_neighbors(
+                self.client, self.collection, self.q_filter,
+                [points[orig_idx] for orig_idx, _ in reranked],
+            )
 
             items = []
             for citation_idx, (orig_idx, rerank_score) in enumerate(reranked, 1):
                 point = points[orig_idx]
-                content = point.payload.get("text", "")
+                content = expanded.get(point.id, point.payload.get("text", ""))
                 src = point.payload.get("source", "")
                 page_num = point.payload.get("page_number")
                 file_type = point.payload.get("file_type")
@@ -468,9 +488,9 @@ def ask_stream(query: str, case_id: str, history: list = [], top_k=5, user_id=No
     # Dynamic top_k
     lower_query = query.lower()
     if any(kw in lower_query for kw in ["report", "summary", "detailed", "everything", "full"]):
-        top_k = max(top_k, 50)
+        top_k = max(top_k, DETAILED_TOP_K)
     else:
-        top_k = max(top_k, 15)
+        top_k = max(top_k, BASE_TOP_K)
 
     # 1. Retrieve contexts
     try:
@@ -1,10 +1,24 @@
 import os
-from fastapi import APIRouter, Request, HTTPException, Depends
-from fastapi.responses import FileResponse
-from typing import Dict
+import json
+import asyncio
+import mimetypes
+from urllib.parse import quote
+from fastapi import APIRouter, Request, HTTPException, Depends, Query
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
+from typing import Dict, Optional
 
 from dependencies import limiter
 from database import document_status_collection
+from services.page_store import ensure_pages_stored, load_pages, get_pages_hash, schedule_population
+from services.blob_storage import get_storage, DOCUMENT_STORE_DIR
+from services.document_store import get_file_record, resolve_document
+from utils.http_cache import (
+    negotiate_encoding,
+    compress_body,
+    etag_matches,
+    parse_byte_range,
+    RangeNotSatisfiable,
+)
 from utils.auth import get_current_user
 from utils.validation import validate_case_id, sanitize_filename
 from utils.error_handler import logger
@@ -18,47 +32,62 @@ async def get_document_text(
     request: Request,
     caseId: str,
     filename: str,
+    start: int = Query(0, ge=0),
+    count: Optional[int] = Query(None, ge=1, le=500),
     current_user: Dict = Depends(get_current_user)
 ):
-    """Return the parsed text content of a document for the in-app viewer."""
+    """
+    Return the parsed text content of a document for the in-app viewer.
+    ``start``/``count`` select a range of pages (by position); omit them for all pages.
+
+    Responses carry a strong ETag derived from the stored text's hash and
+    are gzip/brotli compressed when the client accepts it. If the page
+    store has no pages yet, they are extracted in the background and a 202
+    asks the client to retry.
+    """
     try:
         validate_case_id(caseId)
         safe_filename = sanitize_filename(filename)
 
-        doc_status = document_status_collection.find_one({
-            "case_id": caseId,
-            "filename": safe_filename,
-            "status": "Ready"
-        })
+        doc_status = document_status_collection.find_one(
+            {"case_id": caseId, "filename": safe_filename, "status": "Ready"},
+            {"case_id": 1, "filename": 1, "page_count": 1, "pages_hash": 1, "extracted_pages": 1}
+        )
 
         if not doc_status:
             raise HTTPException(status_code=404, detail="Document not found")
 
-        # Serve from cached extracted_pages if available
-        if doc_status.get("extracted_pages"):
-            return {
-                "filename": safe_filename,
-                "pages": doc_status["extracted_pages"]
-            }
-
-        # Fallback: re-parse
-        file_path = f"documents/{safe_filename}"
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="File not found on server")
-
-        from ingestion.loader import parse_file_with_pages
-        pages = parse_file_with_pages(file_path)
-
-        # Cache for future requests
-        document_status_collection.update_one(
-            {"case_id": caseId, "filename": safe_filename},
-            {"$set": {"extracted_pages": pages}}
-        )
-
-        return {
+        total_pages = await asyncio.to_thread(ensure_pages_stored, doc_status)
+        if total_pages is None:
+            if not schedule_population(caseId, safe_filename):
+                raise HTTPException(status_code=404, detail="File not found on server")
+            return JSONResponse(
+                status_code=202,
+                content={"filename": safe_filename, "status": "preparing", "pages": []},
+                headers={"Retry-After": "2"}
+            )
+
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        pages_hash = await asyncio.to_thread(get_pages_hash, doc_status)
+        etag = f'"{pages_hash[:32]}-{start}-{count or "all"}-{encoding or "identity"}"'
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        pages = await asyncio.to_thread(load_pages, caseId, safe_filename, start, count)
+        next_start = start + len(pages)
+        body = json.dumps({
             "filename": safe_filename,
+            "total_pages": total_pages,
+            "start": start,
+            "next_start": next_start if next_start < total_pages else None,
             "pages": pages
-        }
+        }).encode("utf-8")
+
+        body, applied = compress_body(body, encoding)
+        if applied:
+            headers["Content-Encoding"] = applied
+        return Response(content=body, media_type="application/json", headers=headers)
     except HTTPException:
         raise
     except Exception as e:
@@ -66,6 +95,26 @@ async def get_document_text(
         raise HTTPException(status_code=500, detail="Failed to read document")
 
 
+# When set (e.g. "/protected-documents/", an internal location aliased to
+# DOCUMENT_STORE_DIR), downloads are handed to the reverse proxy with
+# X-Accel-Redirect so it streams the file with sendfile(2).
+DOWNLOAD_ACCEL_PREFIX = os.getenv("DOWNLOAD_ACCEL_REDIRECT_PREFIX", "")
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+
+def _iter_file_range(file_path: str, start: int, end: int):
+    """Yield bytes [start, end] of a file (run by Starlette in its threadpool)."""
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
 @router.get("/download/{caseId}/{filename}")
 @limiter.limit("30/minute")
 async def download_document(
@@ -74,28 +123,81 @@ async def download_document(
     filename: str,
     current_user: Dict = Depends(get_current_user)
 ):
-    """Secure document download with authentication and ownership verification."""
+    """
+    Secure document download with authentication and ownership verification.
+    Supports conditional GET (ETag from the upload's sha256) and single
+    byte ranges (206), so resumed downloads and PDF viewers fetch only
+    what they need. With object storage the client is redirected to a
+    short-lived presigned URL instead.
+    """
     try:
         validate_case_id(caseId)
         safe_filename = sanitize_filename(filename)
 
-        doc_status = document_status_collection.find_one({
-            "case_id": caseId,
-            "filename": safe_filename,
-            "status": "Ready"
-        })
+        doc_status = document_status_collection.find_one(
+            {"case_id": caseId, "filename": safe_filename, "status": "Ready"},
+            {"content_hash": 1}
+        )
 
         if not doc_status:
             raise HTTPException(status_code=404, detail="Document not found")
 
-        file_path = f"documents/{safe_filename}"
-        if not os.path.exists(file_path):
+        media_type = mimetypes.guess_type(safe_filename)[0] or "application/octet-stream"
+        record = get_file_record(caseId, safe_filename)
+        if record:
+            url = get_storage().presigned_url(record["blob"], quote(safe_filename), media_type)
+            if url:
+                return RedirectResponse(url, status_code=307, headers={"Cache-Control": "no-store"})
+
+        file_path = await asyncio.to_thread(resolve_document, caseId, safe_filename)
+        if not file_path:
             raise HTTPException(status_code=404, detail="File not found on server")
 
-        return FileResponse(
-            path=file_path,
-            filename=safe_filename,
-            media_type='application/octet-stream'
+        stat = os.stat(file_path)
+        if doc_status.get("content_hash"):
+            etag = f'"{doc_status["content_hash"]}"'
+        else:
+            # Files uploaded before content hashing: size + mtime, as a weak validator
+            etag = f'W/"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, no-cache",
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(safe_filename)}",
+        }
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        # If-Range: only honour Range when the client's copy is still current
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if if_range and (if_range.strip() != etag or etag.startswith("W/")):
+            range_header = None
+
+        try:
+            byte_range = parse_byte_range(range_header, stat.st_size) if stat.st_size else None
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+
+        if DOWNLOAD_ACCEL_PREFIX:
+            # The proxy serves the body (and the Range) itself
+            relative = os.path.relpath(file_path, DOCUMENT_STORE_DIR).replace(os.sep, "/")
+            headers["X-Accel-Redirect"] = DOWNLOAD_ACCEL_PREFIX.rstrip("/") + "/" + quote(relative)
+            return Response(status_code=200, media_type=media_type, headers=headers)
+
+        if byte_range is None:
+            # Full body: FileResponse streams the file (and uses sendfile where the server supports it)
+            return FileResponse(path=file_path, media_type=media_type, headers=headers, stat_result=stat)
+
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            _iter_file_range(file_path, start, end),
+            status_code=206,
+            media_type=media_type,
+            headers=headers,
         )
     except HTTPException:
         raise
@@ -1,15 +1,29 @@
 import os
-import re
 import asyncio
+import re
+import uuid
+import zipfile
 from fastapi import APIRouter, Request, HTTPException, UploadFile, File, Form, Depends
 from typing import Dict, Optional
 from datetime import datetime
 
 from dependencies import limiter, generator
-from database import document_status_collection, precedent_cache_collection
+from database import document_status_collection, precedent_cache_collection, ingestion_batches_collection
 from schemas.document import GenerateDocumentRequest, SaveDocumentRequest, RetryIngestRequest
-from services.ingestion_service import run_ingestion_background, process_zip_file, process_single_file
-from ingestion.injector import ingest_document, delete_document
+from services.ingestion_service import (
+    process_single_file,
+    start_zip_batch,
+    save_upload,
+    stream_upload_to_disk,
+    MAX_FILE_SIZE,
+    ZIP_BATCH_DIR,
+)
+from services.ingestion_queue import enqueue_ingestion
+from services.parsing_service import parse_file_with_pages_async
+from services.page_store import save_pages, delete_pages
+from services.document_store import resolve_document, store_bytes
+from ingestion.injector import delete_document
+from ingestion.loader import get_file_type
 from utils.auth import get_current_user, get_user_id
 from utils.validation import validate_case_id, sanitize_filename, validate_string_length
 from utils.error_handler import log_security_event, logger
@@ -31,9 +45,8 @@ async def ingest_file(
         validate_case_id(caseId)
         safe_filename = sanitize_filename(file.filename)
 
-        MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE_MB", "50")) * 1024 * 1024
-        file_content = await file.read()
-        if len(file_content) > MAX_FILE_SIZE:
+        # Reject early when the client declared an oversized file
+        if file.size is not None and file.size > MAX_FILE_SIZE:
             raise HTTPException(
                 status_code=400,
                 detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
@@ -44,24 +57,43 @@ async def ingest_file(
 
         if safe_filename.lower().endswith('.zip'):
             logger.info(f"Processing zip file: {safe_filename}")
-            ingested_files, failed_files = process_zip_file(file_content, safe_filename, caseId, user_id, is_scanned=is_scanned)
-
+            batch_id = str(uuid.uuid4())
+            os.makedirs(ZIP_BATCH_DIR, exist_ok=True)
+            zip_path = os.path.join(ZIP_BATCH_DIR, f"{batch_id}.zip")
+            await stream_upload_to_disk(file, zip_path)
+            try:
+                batch = start_zip_batch(zip_path, batch_id, caseId, user_id, is_scanned=is_scanned)
+            except (HTTPException, zipfile.BadZipFile) as e:
+                if os.path.exists(zip_path):
+                    os.unlink(zip_path)
+                if isinstance(e, zipfile.BadZipFile):
+                    raise HTTPException(status_code=400, detail="Invalid zip file")
+                raise
+
+            queued = [m["filename"] for m in batch["members"] if m["status"] == "queued"]
+            rejected = [m["filename"] for m in batch["members"] if m["status"] == "failed"]
             return {
                 "status": "processing",
-                "message": f"Zip extracted. AI ingestion started in background.",
-                "ingested_files": ingested_files,
-                "failed_files": failed_files,
+                "message": f"Zip accepted. {len(queued)} files queued for AI ingestion.",
+                "batchId": batch_id,
+                "ingested_files": queued,
+                "failed_files": rejected,
                 "caseId": caseId
             }
 
         else:
-            await file.seek(0)
-            await process_single_file(file_content, safe_filename, caseId, user_id, session_id=sessionId or None, is_scanned=is_scanned)
+            file_location, size_bytes, content_hash = await save_upload(file, caseId, safe_filename)
+            dedup_hit = await process_single_file(
+                file_location, safe_filename, caseId, user_id,
+                session_id=sessionId or None, is_scanned=is_scanned,
+                content_hash=content_hash, size_bytes=size_bytes
+            )
 
             return {
                 "status": "processing",
                 "filename": safe_filename,
                 "caseId": caseId,
+                "dedup_hits": 1 if dedup_hit else 0,
                 "message": "File uploaded. AI ingestion processing in background."
             }
 
@@ -78,6 +110,27 @@ async def ingest_file(
         raise HTTPException(status_code=500, detail="File ingestion failed")
 
 
+@router.get("/ingest/batch/{batchId}")
+@limiter.limit("60/minute")
+async def get_ingestion_batch(
+    request: Request,
+    batchId: str,
+    current_user: Dict = Depends(get_current_user)
+):
+    """Per-member progress of a ZIP ingestion batch."""
+    try:
+        batch = ingestion_batches_collection.find_one({"_id": batchId}, {"zip_path": 0})
+        if not batch:
+            raise HTTPException(status_code=404, detail="Batch not found")
+        batch["batchId"] = batch.pop("_id")
+        return batch
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching ingestion batch: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to fetch ingestion batch")
+
+
 @router.get("/documents/session/{sessionId}")
 @limiter.limit("60/minute")
 async def get_session_documents(
@@ -119,6 +172,72 @@ async def get_documents_status(
         raise HTTPException(status_code=500, detail="Failed to fetch documents")
 
 
+@router.get("/documents/{caseId}/progress")
+@limiter.limit("60/minute")
+async def get_case_ingestion_progress(
+    request: Request,
+    caseId: str,
+    current_user: Dict = Depends(get_current_user)
+):
+    """Ingestion progress across a case: documents per status/stage, stage totals and throughput."""
+    try:
+        validate_case_id(caseId)
+
+        rows = document_status_collection.aggregate([
+            {"$match": {"case_id": caseId, "status": {"$ne": "Archived"}}},
+            {"$group": {
+                "_id": {"status": "$status", "stage": "$progress.stage"},
+                "documents": {"$sum": 1},
+                "pages_parsed": {"$sum": "$progress.pages_parsed"},
+                "pages_ocr": {"$sum": "$progress.pages_ocr"},
+                "chunks_total": {"$sum": "$progress.chunks_total"},
+                "chunks_embedded": {"$sum": "$progress.chunks_embedded"},
+                "points_upserted": {"$sum": "$progress.points_upserted"},
+                "parse_seconds": {"$sum": "$progress.parse_seconds"},
+                "embed_seconds": {"$sum": "$progress.embed_seconds"},
+                "max_eta_seconds": {"$max": "$progress.eta_seconds"},
+            }},
+        ])
+
+        by_status: Dict[str, int] = {}
+        in_flight: Dict[str, int] = {}
+        totals: Dict[str, float] = {}
+        eta = None
+        for row in rows:
+            status = row["_id"].get("status") or "Unknown"
+            by_status[status] = by_status.get(status, 0) + row["documents"]
+            if status == "Processing":
+                stage = row["_id"].get("stage") or "pending"
+                in_flight[stage] = in_flight.get(stage, 0) + row["documents"]
+                if row.get("max_eta_seconds") is not None:
+                    eta = max(eta or 0, row["max_eta_seconds"])
+            for key, value in row.items():
+                if key not in ("_id", "documents", "max_eta_seconds"):
+                    totals[key] = totals.get(key, 0) + (value or 0)
+
+        def rate(count_key, seconds_key):
+            seconds = totals.get(seconds_key, 0)
+            return round(totals.get(count_key, 0) / seconds, 2) if seconds else None
+
+        return {
+            "caseId": caseId,
+            "documents_by_status": by_status,
+            "in_flight_by_stage": in_flight,
+            "totals": totals,
+            "throughput": {
+                "pages_per_second": rate("pages_parsed", "parse_seconds"),
+                "chunks_embedded_per_second": rate("chunks_embedded", "embed_seconds"),
+                "points_upserted_per_second": rate("points_upserted", "embed_seconds"),
+            },
+            "eta_seconds": eta,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching ingestion progress: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to fetch ingestion progress")
+
+
 @router.delete("/documents/{caseId}/{filename}")
 @limiter.limit("30/minute")
 async def delete_document_endpoint(
@@ -159,6 +278,7 @@ async def delete_document_endpoint(
         if result.matched_count == 0:
             logger.warning(f"Document {safe_filename} not found in MongoDB for case {caseId}")
 
+        delete_pages(caseId, safe_filename)
         precedent_cache_collection.delete_one({"case_id": caseId})
 
         logger.info(f"Document archived: {safe_filename} for case {caseId} by user {user_id}")
@@ -210,11 +330,11 @@ async def save_document_endpoint(
         if not safe_filename.endswith(".txt") and not safe_filename.endswith(".md"):
             safe_filename += ".txt"
 
-        file_location = f"documents/{safe_filename}"
         user_id = get_user_id(current_user)
 
-        with open(file_location, "w", encoding="utf-8") as f:
-            f.write(body.content)
+        _, size_bytes, content_hash = await asyncio.to_thread(
+            store_bytes, body.caseId, safe_filename, body.content.encode("utf-8")
+        )
 
         document_status_collection.update_one(
             {"case_id": body.caseId, "filename": safe_filename},
@@ -224,22 +344,29 @@ async def save_document_endpoint(
                     "filename": safe_filename,
                     "case_id": body.caseId,
                     "user_id": user_id,
+                    "content_hash": content_hash,
+                    "size_bytes": size_bytes,
+                    "ocr_requested": False,
                     "last_updated": datetime.utcnow()
                 }
             },
             upsert=True
         )
+        # The stored text (and its pages_hash validator) must describe the new bytes
+        await asyncio.to_thread(
+            save_pages, body.caseId, safe_filename,
+            [{"text": body.content, "file_type": get_file_type(safe_filename)}]
+        )
 
-        asyncio.create_task(run_ingestion_background(
-            ingest_document,
+        enqueue_ingestion(
             body.caseId,
             safe_filename,
             text=body.content,
             source_name=safe_filename,
             case_id=body.caseId
-        ))
+        )
 
-        logger.info(f"Document saved, background ingestion started: {safe_filename}")
+        logger.info(f"Document saved, ingestion queued: {safe_filename}")
 
         return {
             "status": "processing",
@@ -270,29 +397,20 @@ async def retry_ingest(
         validate_case_id(body.caseId)
         safe_filename = sanitize_filename(body.filename)
 
-        file_path = f"documents/{safe_filename}"
-        if not os.path.exists(file_path):
+        file_path = await asyncio.to_thread(resolve_document, body.caseId, safe_filename)
+        if not file_path:
+            # The client may hold a slightly different name; match within the case only
             doc_status = document_status_collection.find_one(
-                {"case_id": body.caseId, "filename": safe_filename}
+                {"case_id": body.caseId, "filename": {"$regex": re.escape(safe_filename), "$options": "i"}},
+                {"filename": 1}
             )
-            if not doc_status:
-                doc_status = document_status_collection.find_one(
-                    {"case_id": body.caseId, "filename": {"$regex": re.escape(safe_filename), "$options": "i"}}
-                )
-            if doc_status and os.path.exists(f"documents/{doc_status['filename']}"):
-                safe_filename = doc_status['filename']
-                file_path = f"documents/{safe_filename}"
-            else:
-                for f_name in os.listdir("documents"):
-                    if safe_filename.lower() in f_name.lower() or f_name.lower() in safe_filename.lower():
-                        safe_filename = f_name
-                        file_path = f"documents/{safe_filename}"
-                        break
-                else:
-                    raise HTTPException(status_code=404, detail="File not found on server")
-
-        from ingestion.loader import parse_file_with_pages
-        page_data = parse_file_with_pages(file_path)
+            if doc_status:
+                safe_filename = doc_status["filename"]
+                file_path = await asyncio.to_thread(resolve_document, body.caseId, safe_filename)
+            if not file_path:
+                raise HTTPException(status_code=404, detail="File not found on server")
+
+        page_data = await parse_file_with_pages_async(file_path, case_id=body.caseId)
         content = "\n".join(p.get("text", "") for p in page_data)
 
         if not content.strip():
@@ -308,17 +426,17 @@ async def retry_ingest(
             },
             upsert=True
         )
+        save_pages(body.caseId, safe_filename, page_data)
 
-        asyncio.create_task(run_ingestion_background(
-            ingest_document,
+        enqueue_ingestion(
             body.caseId,
             safe_filename,
-            text=content,
-            source_name=safe_filename,
-            case_id=body.caseId
-        ))
+            job_type="ingest_pages",
+            case_id=body.caseId,
+            filename=safe_filename
+        )
 
-        logger.info(f"Retry ingestion started: {safe_filename}")
+        logger.info(f"Retry ingestion queued: {safe_filename}")
 
         return {"status": "processing", "message": "Result initiated in background"}
 
@@ -33,3 +33,19 @@ async def clear_user_preset_cache(request: Request, user_id: str):
     from utils.system_settings import clear_user_cache
     clear_user_cache(user_id)
     return {"status": "ok", "message": f"Cache cleared for user {user_id}"}
+
+
+@router.get("/api/admin/embedding-stats")
+@limiter.limit("30/minute")
+async def embedding_stats(request: Request):
+    """Embedding scheduler queue depth and interactive query latency percentiles."""
+    from utils.embeddings import get_embedding_stats
+    return get_embedding_stats()
+
+
+@router.get("/api/admin/ocr-stats")
+@limiter.limit("30/minute")
+async def ocr_stats(request: Request):
+    """OCR scheduler queue depth (total and per case), running jobs and average wait/run times."""
+    from ingestion.ocr_scheduler import get_ocr_stats
+    return get_ocr_stats()
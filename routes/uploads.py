@@ -0,0 +1,151 @@
+import re
+from fastapi import APIRouter, Request, HTTPException, Depends
+from typing import Dict
+from datetime import datetime
+
+from dependencies import limiter
+from database import document_status_collection
+from schemas.document import InitUploadRequest
+from services.upload_service import (
+    init_upload,
+    upload_part,
+    get_upload,
+    upload_status,
+    complete_upload,
+    abort_upload,
+)
+from utils.auth import get_current_user, get_user_id
+from utils.validation import validate_case_id, sanitize_filename
+from utils.error_handler import logger
+
+router = APIRouter()
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+@router.post("/uploads")
+@limiter.limit("30/minute")
+async def init_upload_endpoint(
+    request: Request,
+    body: InitUploadRequest,
+    current_user: Dict = Depends(get_current_user)
+):
+    """
+    Start a resumable upload. Responds with status "complete" when the
+    server already has the bytes, otherwise with an uploadId and part layout.
+    """
+    try:
+        validate_case_id(body.caseId)
+        safe_filename = sanitize_filename(body.filename)
+        if safe_filename.lower().endswith(".zip"):
+            raise HTTPException(status_code=400, detail="Zip archives must be uploaded through /ingest")
+        sha256 = body.sha256.lower()
+        if not SHA256_RE.match(sha256):
+            raise HTTPException(status_code=400, detail="sha256 must be 64 hex characters")
+
+        result = await init_upload(
+            body.caseId, safe_filename, body.size, sha256, get_user_id(current_user),
+            session_id=body.sessionId or None, is_scanned=body.isScanned
+        )
+        return {**result, "filename": safe_filename, "caseId": body.caseId}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Upload init error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to start upload")
+
+
+@router.put("/uploads/{uploadId}/parts/{partNumber}")
+@limiter.limit("600/minute")
+async def upload_part_endpoint(
+    request: Request,
+    uploadId: str,
+    partNumber: int,
+    current_user: Dict = Depends(get_current_user)
+):
+    """Upload one part (raw request body). Parts may be sent in parallel and re-sent safely."""
+    try:
+        user_id = get_user_id(current_user)
+        part_size = get_upload(uploadId, user_id)["part_size"]
+        # Refuse oversized parts before buffering them
+        content_length = request.headers.get("content-length")
+        if content_length is not None:
+            if not content_length.isdigit():
+                raise HTTPException(status_code=400, detail="Invalid Content-Length")
+            if int(content_length) > part_size:
+                raise HTTPException(status_code=413, detail="Part larger than the upload's part size")
+        data = bytearray()
+        async for chunk in request.stream():
+            data.extend(chunk)
+            if len(data) > part_size:
+                raise HTTPException(status_code=413, detail="Part larger than the upload's part size")
+        return await upload_part(uploadId, partNumber, bytes(data), user_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Upload part error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to store upload part")
+
+
+@router.get("/uploads/{uploadId}")
+@limiter.limit("120/minute")
+async def upload_status_endpoint(
+    request: Request,
+    uploadId: str,
+    current_user: Dict = Depends(get_current_user)
+):
+    """Which parts have arrived, so a client can resume after a dropped connection."""
+    try:
+        return upload_status(get_upload(uploadId, get_user_id(current_user)))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Upload status error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to fetch upload status")
+
+
+@router.post("/uploads/{uploadId}/complete")
+@limiter.limit("30/minute")
+async def complete_upload_endpoint(
+    request: Request,
+    uploadId: str,
+    current_user: Dict = Depends(get_current_user)
+):
+    """Verify the assembled file against its sha256 and queue it for ingestion."""
+    try:
+        user_id = get_user_id(current_user)
+        session = get_upload(uploadId, user_id)
+        result = await complete_upload(uploadId, user_id)
+        return {
+            **result,
+            "filename": session["filename"],
+            "caseId": session["case_id"],
+            "message": "File uploaded. AI ingestion processing in background."
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Upload completion error: {e}", exc_info=True)
+        if 'session' in locals():
+            document_status_collection.update_one(
+                {"case_id": session["case_id"], "filename": session["filename"]},
+                {"$set": {"status": "Failed", "error": "Processing failed", "last_updated": datetime.utcnow()}}
+            )
+        raise HTTPException(status_code=500, detail="Failed to complete upload")
+
+
+@router.delete("/uploads/{uploadId}")
+@limiter.limit("30/minute")
+async def abort_upload_endpoint(
+    request: Request,
+    uploadId: str,
+    current_user: Dict = Depends(get_current_user)
+):
+    try:
+        abort_upload(uploadId, get_user_id(current_user))
+        return {"status": "aborted"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Upload abort error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to abort upload")
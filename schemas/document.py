@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 
@@ -15,3 +16,12 @@ class SaveDocumentRequest(BaseModel):
 class RetryIngestRequest(BaseModel):
     caseId: str
     filename: str
+
+
+class InitUploadRequest(BaseModel):
+    caseId: str
+    filename: str
+    size: int
+    sha256: str
+    sessionId: Optional[str] = None
+    isScanned: bool = False
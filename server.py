@@ -64,6 +64,7 @@ from routes.system import router as system_router
 from routes.chat import router as chat_router
 from routes.documents import router as documents_router
 from routes.document_viewer import router as document_viewer_router
+from routes.uploads import router as uploads_router
 from routes.drafts import router as drafts_router
 from routes.investigation import router as investigation_router
 from routes.case_law import router as case_law_router
@@ -72,10 +73,40 @@ app.include_router(system_router)
 app.include_router(chat_router)
 app.include_router(documents_router)
 app.include_router(document_viewer_router)
+app.include_router(uploads_router)
 app.include_router(drafts_router)
 app.include_router(investigation_router)
 app.include_router(case_law_router)
 
+# --- Ingestion worker pool ---
+from services.ingestion_queue import start_ingestion_workers, stop_ingestion_workers
+from services.parsing_service import shutdown_parse_pool
+from services.page_store import prepopulate_page_store, PAGE_STORE_SWEEP
+
+
+def _log_sweep_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        logger.error("Page store sweep failed", exc_info=task.exception())
+
+
+@app.on_event("startup")
+async def on_startup():
+    start_ingestion_workers()
+    if PAGE_STORE_SWEEP:
+        # Held on app.state so the task is not garbage-collected mid-sweep
+        app.state.page_store_sweep = asyncio.create_task(prepopulate_page_store())
+        app.state.page_store_sweep.add_done_callback(_log_sweep_failure)
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    sweep = getattr(app.state, "page_store_sweep", None)
+    if sweep:
+        sweep.cancel()
+        await asyncio.gather(sweep, return_exceptions=True)
+    await stop_ingestion_workers()
+    shutdown_parse_pool()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
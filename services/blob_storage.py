@@ -0,0 +1,268 @@
+"""
+Blob storage backends for the document store.
+
+Blobs are addressed by key (``blobs/<aa>/<sha256><ext>``) and never change
+once written, so any backend can be shared by several API workers:
+
+- ``local`` (default): files under DOCUMENT_STORE_DIR.
+- ``s3``: any S3-compatible service (AWS S3, MinIO, ...), selected with
+  STORAGE_BACKEND=s3 and configured through S3_BUCKET, S3_PREFIX,
+  S3_ENDPOINT_URL and S3_REGION; credentials come from the usual AWS
+  environment / config chain. Requires boto3.
+
+Transfers stream between disk and the backend (multipart for S3), never
+through memory. Parsers and OCR need a real file, so ``local_path``
+materialises a blob on local disk; for S3 that is a read-through cache
+(blobs are immutable, so a cached copy can never be stale) capped at
+STORAGE_CACHE_MAX_MB (exceeded temporarily rather than evicting a blob
+used within STORAGE_CACHE_MIN_AGE_SECONDS). Downloads from S3 are served as presigned URLs so
+the bytes go straight from the bucket to the client.
+"""
+
+import os
+import time
+import threading
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # boto3 is only needed for STORAGE_BACKEND=s3
+    boto3 = None
+
+DOCUMENT_STORE_DIR = os.getenv("DOCUMENT_STORE_DIR", "documents")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+STORAGE_CACHE_DIR = os.getenv("STORAGE_CACHE_DIR", os.path.join(DOCUMENT_STORE_DIR, ".cache"))
+STORAGE_CACHE_MAX_BYTES = int(os.getenv("STORAGE_CACHE_MAX_MB", "2048")) * 1024 * 1024
+# A cached blob handed out by local_path() within this window is never evicted,
+# so a parse or download that has the path but has not opened it yet keeps it
+STORAGE_CACHE_MIN_AGE_SECONDS = int(os.getenv("STORAGE_CACHE_MIN_AGE_SECONDS", "3600"))
+S3_PRESIGNED_DOWNLOADS = os.getenv("S3_PRESIGNED_DOWNLOADS", "true").lower() == "true"
+S3_PRESIGN_EXPIRY_SECONDS = int(os.getenv("S3_PRESIGN_EXPIRY_SECONDS", "300"))
+
+
+class BlobNotFound(Exception):
+    pass
+
+
+class BlobStorage:
+    """Interface shared by the backends."""
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def put_file(self, key: str, source_path: str):
+        """Store a finished local file under key; the source file is consumed."""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> str:
+        """A local file with the blob's bytes. Raises BlobNotFound."""
+        raise NotImplementedError
+
+    def adopt_local(self, key: str, source_path: str) -> str:
+        """
+        Local path for a blob the backend already holds, given a local file
+        with the same bytes (consumed), so the blob need not be fetched again.
+        """
+        os.unlink(source_path)
+        return self.local_path(key)
+
+    def presigned_url(self, key: str, download_name: str, content_type: str) -> str | None:
+        """A time-limited URL clients can download from directly, if the backend has one."""
+        return None
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def iter_keys(self, prefix: str):
+        """Yield (key, size_bytes, mtime_epoch) for every blob under prefix."""
+        raise NotImplementedError
+
+
+class LocalBlobStorage(BlobStorage):
+    def __init__(self, root: str = DOCUMENT_STORE_DIR):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def put_file(self, key: str, source_path: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+    def local_path(self, key: str) -> str:
+        path = self._path(key)
+        if not os.path.isfile(path):
+            raise BlobNotFound(key)
+        return path
+
+    def delete(self, key: str):
+        if os.path.isfile(self._path(key)):
+            os.unlink(self._path(key))
+
+    def iter_keys(self, prefix: str):
+        base = self._path(prefix.rstrip("/"))
+        for root, _dirs, files in os.walk(base):
+            for name in files:
+                path = os.path.join(root, name)
+                st = os.stat(path)
+                yield os.path.relpath(path, self.root).replace(os.sep, "/"), st.st_size, st.st_mtime
+
+
+class S3BlobStorage(BlobStorage):
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str | None = None, region: str | None = None):
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None)
+        # Multipart transfers stream from/to disk in 8 MB parts
+        self.transfer_config = TransferConfig(multipart_threshold=8 * 1024 * 1024, multipart_chunksize=8 * 1024 * 1024)
+        self.cache = LocalBlobStorage(STORAGE_CACHE_DIR)
+        self._cache_lock = threading.Lock()
+        # key -> [size_bytes, last_used]: one directory walk at start-up, then kept in memory
+        self._cache_entries = {
+            key: [size, mtime] for key, size, mtime in self.cache.iter_keys("blobs") if not key.endswith(".part")
+        }
+        self._cache_bytes = sum(size for size, _ in self._cache_entries.values())
+
+    def _object_key(self, key: str) -> str:
+        return self.prefix + key
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_file(self, key: str, source_path: str):
+        self.client.upload_file(source_path, self.bucket, self._object_key(key), Config=self.transfer_config)
+        # Keep the bytes we just sent: ingestion parses the file right after storing it
+        self._add_to_cache(key, source_path)
+
+    def adopt_local(self, key: str, source_path: str) -> str:
+        # A duplicate upload's bytes seed the read-through cache instead of being re-downloaded
+        return self._add_to_cache(key, source_path)
+
+    def local_path(self, key: str) -> str:
+        if self.cache.exists(key):
+            path = self.cache.local_path(key)
+            os.utime(path)  # recently used: evicted last, also by other processes sharing the cache
+            self._touch_cached(key, path)
+            return path
+        path = self.cache._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.part"
+        try:
+            self.client.download_file(self.bucket, self._object_key(key), tmp_path, Config=self.transfer_config)
+            return self._add_to_cache(key, tmp_path)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise BlobNotFound(key)
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def presigned_url(self, key: str, download_name: str, content_type: str) -> str | None:
+        if not S3_PRESIGNED_DOWNLOADS:
+            return None
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._object_key(key),
+                "ResponseContentDisposition": f"attachment; filename*=UTF-8''{download_name}",
+                "ResponseContentType": content_type,
+            },
+            ExpiresIn=S3_PRESIGN_EXPIRY_SECONDS,
+        )
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        self.cache.delete(key)
+        with self._cache_lock:
+            entry = self._cache_entries.pop(key, None)
+            if entry:
+                self._cache_bytes -= entry[0]
+
+    def iter_keys(self, prefix: str):
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._object_key(prefix)):
+            for obj in page.get("Contents", []):
+                yield obj["Key"][len(self.prefix):], obj["Size"], obj["LastModified"].timestamp()
+
+    def _touch_cached(self, key: str, path: str):
+        """Record a cache entry as just used (adding it if another process cached it)."""
+        with self._cache_lock:
+            entry = self._cache_entries.get(key)
+            if entry is None:
+                entry = self._cache_entries[key] = [os.path.getsize(path), 0.0]
+                self._cache_bytes += entry[0]
+            entry[1] = time.time()
+
+    def _add_to_cache(self, key: str, source_path: str) -> str:
+        """Move a local file into the cache under key (consumed) and return its cached path."""
+        self.cache.put_file(key, source_path)
+        path = self.cache.local_path(key)
+        os.utime(path)
+        self._touch_cached(key, path)
+        self._trim_cache()
+        return path
+
+    def _trim_cache(self):
+        """
+        Evict least recently used cached blobs beyond STORAGE_CACHE_MAX_BYTES,
+        sparing any used within STORAGE_CACHE_MIN_AGE_SECONDS.
+        """
+        with self._cache_lock:
+            if self._cache_bytes <= STORAGE_CACHE_MAX_BYTES:
+                return
+            cutoff = time.time() - STORAGE_CACHE_MIN_AGE_SECONDS
+            for key, (size, last_used) in sorted(self._cache_entries.items(), key=lambda e: e[1][1]):
+                if self._cache_bytes <= STORAGE_CACHE_MAX_BYTES or last_used > cutoff:
+                    break
+                # The file's mtime is the only record of use by other processes sharing the cache
+                try:
+                    mtime = os.path.getmtime(self.cache._path(key))
+                except FileNotFoundError:
+                    mtime = None
+                if mtime is not None and mtime > cutoff:
+                    self._cache_entries[key][1] = mtime
+                    continue
+                self.cache.delete(key)
+                del self._cache_entries[key]
+                self._cache_bytes -= size
+
+
+def _create_storage() -> BlobStorage:
+    if STORAGE_BACKEND == "s3":
+        return S3BlobStorage(
+            bucket=os.environ["S3_BUCKET"],
+            prefix=os.getenv("S3_PREFIX", ""),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+            region=os.getenv("S3_REGION"),
+        )
+    if STORAGE_BACKEND != "local":
+        raise RuntimeError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+    return LocalBlobStorage(DOCUMENT_STORE_DIR)
+
+
+_storage: BlobStorage | None = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> BlobStorage:
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = _create_storage()
+    return _storage
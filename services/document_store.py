@@ -0,0 +1,143 @@
+"""
+Content-addressed document storage.
+
+Uploaded files are stored once per content hash, under the blob key
+``blobs/<aa>/<sha256><ext>`` in the configured blob storage backend
+(services/blob_storage.py: local disk or S3-compatible), and the
+``document_files`` collection maps each (case_id, filename) to its blob.
+Two cases uploading ``contract.pdf`` no longer overwrite each other,
+identical files share one blob, and finding a document's file is a single
+indexed lookup instead of a directory scan.
+
+Blobs are immutable: a new version of a file is a new blob, so concurrent
+uploads of the same bytes are harmless and any number of API workers can
+share the backend. The extension is kept on the blob because the parsers
+dispatch on it.
+
+Files from before the store (flat ``documents/<filename>``) are still
+found by ``resolve_document`` until ``migrate_document_store.py`` has
+imported them.
+"""
+
+import os
+import uuid
+import shutil
+import hashlib
+from datetime import datetime
+
+from database import document_files_collection
+from services.blob_storage import get_storage, BlobNotFound, DOCUMENT_STORE_DIR
+from utils.error_handler import logger
+
+BLOB_PREFIX = "blobs/"
+STAGING_DIR = os.path.join(DOCUMENT_STORE_DIR, ".staging")
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _extension(filename: str) -> str:
+    return os.path.splitext(filename)[1].lower()
+
+
+def blob_key(content_hash: str, filename: str) -> str:
+    return f"{BLOB_PREFIX}{content_hash[:2]}/{content_hash}{_extension(filename)}"
+
+
+def legacy_path(filename: str) -> str:
+    return os.path.join(DOCUMENT_STORE_DIR, filename)
+
+
+def new_staging_path(filename: str) -> str:
+    """A fresh local path to write an incoming file to before commit_blob publishes it."""
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    return os.path.join(STAGING_DIR, f"{uuid.uuid4().hex}{_extension(filename)}")
+
+
+def hash_file(path: str) -> tuple[int, str]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            size += len(chunk)
+            digest.update(chunk)
+    return size, digest.hexdigest()
+
+
+def link_blob(case_id: str, filename: str, content_hash: str, size_bytes: int, key: str):
+    """Point (case_id, filename) at an already stored blob."""
+    document_files_collection.update_one(
+        {"case_id": case_id, "filename": filename},
+        {
+            "$set": {"sha256": content_hash, "size_bytes": size_bytes, "blob": key, "updated_at": datetime.utcnow()},
+            "$setOnInsert": {"created_at": datetime.utcnow()},
+        },
+        upsert=True
+    )
+
+
+def commit_blob(staged_path: str, case_id: str, filename: str, content_hash: str, size_bytes: int) -> str:
+    """
+    Move a fully written, hashed local file into storage and point
+    (case_id, filename) at it. Returns a local path to the stored file (for
+    parsing). If the blob already exists the staged copy stands in for it
+    locally: dropped on local disk, kept as the cached copy with S3.
+    """
+    storage = get_storage()
+    key = blob_key(content_hash, filename)
+    if storage.exists(key):
+        path = storage.adopt_local(key, staged_path)
+    else:
+        storage.put_file(key, staged_path)
+        path = storage.local_path(key)
+    link_blob(case_id, filename, content_hash, size_bytes, key)
+    return path
+
+
+def store_bytes(case_id: str, filename: str, data: bytes) -> tuple[str, int, str]:
+    """Store an in-memory file (e.g. a saved draft). Returns (path, size_bytes, sha256)."""
+    staged = new_staging_path(filename)
+    with open(staged, "wb") as f:
+        f.write(data)
+    content_hash = hashlib.sha256(data).hexdigest()
+    return commit_blob(staged, case_id, filename, content_hash, len(data)), len(data), content_hash
+
+
+def import_file(case_id: str, filename: str, source_path: str) -> str:
+    """Copy an existing local file into storage (the source is left in place)."""
+    size, content_hash = hash_file(source_path)
+    staged = new_staging_path(filename)
+    shutil.copyfile(source_path, staged)
+    return commit_blob(staged, case_id, filename, content_hash, size)
+
+
+def get_file_record(case_id: str, filename: str) -> dict | None:
+    return document_files_collection.find_one({"case_id": case_id, "filename": filename}, {"_id": 0})
+
+
+def document_exists(case_id: str, filename: str) -> bool:
+    """Cheap check (no download) that a document has a stored file."""
+    return get_file_record(case_id, filename) is not None or os.path.isfile(legacy_path(filename))
+
+
+def resolve_document(case_id: str, filename: str) -> str | None:
+    """
+    Local path of a case's document, or None if it is not stored. With a
+    remote backend this may download the blob, so call it off the event loop.
+    """
+    record = get_file_record(case_id, filename)
+    if record:
+        try:
+            return get_storage().local_path(record["blob"])
+        except BlobNotFound:
+            logger.warning(f"Blob missing for {filename} (case {case_id}): {record['blob']}")
+    # Not migrated yet: the flat pre-store layout
+    path = legacy_path(filename)
+    return path if os.path.isfile(path) else None
+
+
+def unreferenced_blobs(min_age_seconds: int = 3600):
+    """(key, size_bytes) of blobs no index entry points at, older than min_age_seconds so in-flight commits are left alone."""
+    referenced = set(document_files_collection.distinct("blob"))
+    cutoff = datetime.utcnow().timestamp() - min_age_seconds
+    for key, size, mtime in get_storage().iter_keys(BLOB_PREFIX):
+        if key not in referenced and mtime < cutoff:
+            yield key, size
@@ -0,0 +1,333 @@
+"""
+Persistent ingestion job queue backed by MongoDB.
+
+Upload endpoints enqueue a job and return immediately; a fixed-size pool of
+asyncio workers (started with the app) drains the queue. Jobs survive
+restarts: a running job holds a lease that its worker keeps renewing, so a
+job whose worker died is picked up again once the lease lapses.
+
+A document never has two jobs running at once: a job for a document whose
+previous job still holds a live lease waits until that one finishes.
+
+Fairness: each job records its position in its case's backlog (``fair_rank``)
+and workers always take the lowest rank first, so cases are served
+round-robin. On top of that no case may hold more than INGEST_MAX_PER_CASE
+workers at once — a 200-file ZIP cannot monopolise the pool.
+"""
+
+import os
+import uuid
+import socket
+import asyncio
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+from ingestion.injector import ingest_document, clone_document
+from database import (
+    ingestion_jobs_collection,
+    ingestion_batches_collection,
+    document_status_collection,
+    precedent_cache_collection,
+)
+from utils.error_handler import logger
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+INGEST_MAX_PER_CASE = int(os.getenv("INGEST_MAX_PER_CASE", "2"))
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+INGEST_RETRY_BASE_SECONDS = float(os.getenv("INGEST_RETRY_BASE_SECONDS", "30"))
+INGEST_LEASE_SECONDS = int(os.getenv("INGEST_LEASE_SECONDS", "120"))
+INGEST_POLL_SECONDS = float(os.getenv("INGEST_POLL_SECONDS", "2"))
+INGEST_SHUTDOWN_GRACE_SECONDS = float(os.getenv("INGEST_SHUTDOWN_GRACE_SECONDS", "20"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help (e.g. the file has no text)."""
+
+
+# job_type -> handler called with the job's kwargs. Blocking callables run in
+# a thread; coroutine functions are awaited on the event loop.
+JOB_HANDLERS = {
+    "ingest": ingest_document,
+    "clone": clone_document,
+}
+
+_wakeup: asyncio.Event | None = None
+_workers: list[asyncio.Task] = []
+# job_id -> future of a blocking handler's thread. Cancelling a worker cannot
+# stop that thread, so shutdown checks here before handing the job back.
+_handler_threads: dict[str, asyncio.Future] = {}
+
+
+def register_job_handler(job_type: str, handler):
+    """Register a handler (blocking callable or coroutine function) for a job type."""
+    JOB_HANDLERS[job_type] = handler
+
+
+def update_batch_member(batch_id: str, filename: str, status: str, **fields):
+    """Record a batch member's current stage (queued/extracting/parsing/ingesting/...)."""
+    member_fields = {f"members.$.{key}": value for key, value in fields.items()}
+    ingestion_batches_collection.update_one(
+        {"_id": batch_id, "members.filename": filename},
+        {"$set": {"members.$.status": status, **member_fields, "updated_at": datetime.utcnow()}}
+    )
+
+
+def _finish_batch_member(batch_id: str, filename: str, succeeded: bool, error: str | None = None):
+    """Count a member as done/failed and close the batch once every member has finished."""
+    update_batch_member(batch_id, filename, "done" if succeeded else "failed", error=error)
+    batch = ingestion_batches_collection.find_one_and_update(
+        {"_id": batch_id},
+        {"$inc": {"counts.done" if succeeded else "counts.failed": 1}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if not batch:
+        return
+    counts = batch.get("counts", {})
+    if counts.get("done", 0) + counts.get("failed", 0) >= batch.get("total", 0):
+        ingestion_batches_collection.update_one(
+            {"_id": batch_id, "status": "processing"},
+            {"$set": {"status": "completed", "completed_at": datetime.utcnow()}}
+        )
+        zip_path = batch.get("zip_path")
+        if zip_path and os.path.exists(zip_path):
+            os.unlink(zip_path)
+        logger.info(f"Ingestion batch {batch_id} completed: {counts}")
+
+
+def enqueue_ingestion(case_id: str, filename: str, /, job_type: str = "ingest", **kwargs) -> str:
+    """
+    Queue a job for (case_id, filename) and return its id. ``kwargs`` are the
+    handler's arguments and may themselves include case_id/filename.
+
+    Any job still queued for the same document is superseded, so re-saving or
+    retrying a document never ingests a stale copy after the fresh one.
+    """
+    now = datetime.utcnow()
+    for stale in ingestion_jobs_collection.find(
+        {"case_id": case_id, "filename": filename, "status": "queued"}, {"kwargs.batch_id": 1}
+    ):
+        ingestion_jobs_collection.update_one(
+            {"_id": stale["_id"], "status": "queued"},
+            {"$set": {"status": "superseded", "updated_at": now}}
+        )
+        stale_batch_id = stale.get("kwargs", {}).get("batch_id")
+        if stale_batch_id:
+            _finish_batch_member(stale_batch_id, filename, succeeded=False, error="Superseded by a newer upload")
+    fair_rank = ingestion_jobs_collection.count_documents(
+        {"case_id": case_id, "status": {"$in": ["queued", "running"]}}
+    )
+    job_id = str(uuid.uuid4())
+    ingestion_jobs_collection.insert_one({
+        "_id": job_id,
+        "job_type": job_type,
+        "case_id": case_id,
+        "filename": filename,
+        "kwargs": kwargs,
+        "status": "queued",
+        "attempts": 0,
+        "fair_rank": fair_rank,
+        "next_run_at": now,
+        "created_at": now,
+        "updated_at": now,
+    })
+    if _wakeup is not None:
+        _wakeup.set()
+    logger.info(f"Queued {job_type} job {job_id}: {filename} for case {case_id}")
+    return job_id
+
+
+def _saturated_cases(now: datetime) -> list:
+    """Cases already holding INGEST_MAX_PER_CASE live workers."""
+    return [
+        row["_id"] for row in ingestion_jobs_collection.aggregate([
+            {"$match": {"status": "running", "lease_expires_at": {"$gt": now}}},
+            {"$group": {"_id": "$case_id", "running": {"$sum": 1}}},
+            {"$match": {"running": {"$gte": INGEST_MAX_PER_CASE}}},
+        ])
+    ]
+
+
+def _busy_documents(now: datetime) -> list[dict]:
+    """(case_id, filename) pairs that already have a running job with a live lease."""
+    return [
+        {"case_id": job["case_id"], "filename": job["filename"]}
+        for job in ingestion_jobs_collection.find(
+            {"status": "running", "lease_expires_at": {"$gt": now}}, {"_id": 0, "case_id": 1, "filename": 1}
+        )
+    ]
+
+
+def _claim_next_job():
+    """Atomically lease the next runnable job, or return None."""
+    now = datetime.utcnow()
+    query = {
+        "$or": [
+            {"status": "queued", "next_run_at": {"$lte": now}},
+            # Lease lapsed: the worker that owned it is gone.
+            {"status": "running", "lease_expires_at": {"$lte": now}},
+        ],
+        "case_id": {"$nin": _saturated_cases(now)},
+    }
+    # One job per document at a time: a re-save or retry waits for the running
+    # job instead of racing it over the document's chunks
+    busy = _busy_documents(now)
+    if busy:
+        query["$nor"] = busy
+    return ingestion_jobs_collection.find_one_and_update(
+        query,
+        {
+            "$set": {
+                "status": "running",
+                "worker_id": WORKER_ID,
+                "started_at": now,
+                "lease_expires_at": now + timedelta(seconds=INGEST_LEASE_SECONDS),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("fair_rank", 1), ("next_run_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _renew_lease(job_id: str):
+    """Keep a running job's lease alive until cancelled."""
+    while True:
+        await asyncio.sleep(INGEST_LEASE_SECONDS / 3)
+        ingestion_jobs_collection.update_one(
+            {"_id": job_id, "worker_id": WORKER_ID},
+            {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=INGEST_LEASE_SECONDS)}}
+        )
+
+
+async def _run_job(job: dict):
+    job_id = job["_id"]
+    case_id = job["case_id"]
+    filename = job["filename"]
+    attempts = job.get("attempts", 1)
+    kwargs = job.get("kwargs", {})
+    batch_id = kwargs.get("batch_id")
+    handler = JOB_HANDLERS.get(job.get("job_type", "ingest"))
+
+    heartbeat = asyncio.create_task(_renew_lease(job_id))
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job type '{job.get('job_type')}'")
+        if asyncio.iscoroutinefunction(handler):
+            await handler(**kwargs)
+        else:
+            thread = asyncio.ensure_future(asyncio.to_thread(handler, **kwargs))
+            _handler_threads[job_id] = thread
+            try:
+                await asyncio.shield(thread)
+            finally:
+                if thread.done():
+                    _handler_threads.pop(job_id, None)
+
+        now = datetime.utcnow()
+        ingestion_jobs_collection.update_one(
+            {"_id": job_id},
+            {"$set": {"status": "done", "finished_at": now, "updated_at": now}}
+        )
+        document_status_collection.update_one(
+            {"case_id": case_id, "filename": filename},
+            {"$set": {"status": "Ready", "last_updated": now}, "$unset": {"error": ""}}
+        )
+        precedent_cache_collection.delete_one({"case_id": case_id})
+        if batch_id:
+            _finish_batch_member(batch_id, filename, succeeded=True)
+        logger.info(f"Ingestion job {job_id} complete: {filename} for case {case_id}")
+
+    except Exception as e:
+        now = datetime.utcnow()
+        error = str(e)[:200]
+        if attempts < INGEST_MAX_ATTEMPTS and not isinstance(e, PermanentJobError):
+            delay = INGEST_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+            logger.warning(f"Ingestion job {job_id} failed (attempt {attempts}), retrying in {delay:.0f}s: {e}")
+            ingestion_jobs_collection.update_one(
+                {"_id": job_id},
+                {"$set": {
+                    "status": "queued",
+                    "last_error": error,
+                    "next_run_at": now + timedelta(seconds=delay),
+                    "updated_at": now,
+                }}
+            )
+        else:
+            logger.error(f"Ingestion job {job_id} failed permanently for {filename}: {e}", exc_info=True)
+            ingestion_jobs_collection.update_one(
+                {"_id": job_id},
+                {"$set": {"status": "failed", "last_error": error, "finished_at": now, "updated_at": now}}
+            )
+            document_status_collection.update_one(
+                {"case_id": case_id, "filename": filename},
+                {"$set": {"status": "Failed", "error": error, "last_updated": now}}
+            )
+            if batch_id:
+                _finish_batch_member(batch_id, filename, succeeded=False, error=error)
+    finally:
+        heartbeat.cancel()
+
+
+async def _worker_loop(worker_index: int):
+    while True:
+        try:
+            job = _claim_next_job()
+        except Exception as e:
+            logger.error(f"Ingestion worker {worker_index} could not claim a job: {e}")
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=INGEST_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            _wakeup.clear()
+            continue
+
+        await _run_job(job)
+
+
+def start_ingestion_workers():
+    """Start the worker pool. Jobs left over from a previous run are resumed."""
+    global _wakeup
+    if _workers:
+        return
+    _wakeup = asyncio.Event()
+    pending = ingestion_jobs_collection.count_documents({"status": {"$in": ["queued", "running"]}})
+    logger.info(f"Starting {INGEST_WORKERS} ingestion workers ({pending} pending jobs)")
+    for i in range(INGEST_WORKERS):
+        _workers.append(asyncio.create_task(_worker_loop(i)))
+
+
+async def stop_ingestion_workers():
+    """
+    Cancel the worker pool and hand this process's interrupted jobs back to
+    the queue. A blocking handler keeps running in its thread after its
+    worker is cancelled, so handlers get INGEST_SHUTDOWN_GRACE_SECONDS to
+    finish; a job whose handler is still running then is left ``running`` to
+    be retried once its lease lapses, never handed to another worker while
+    this one may still be writing.
+    """
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+    if _handler_threads:
+        await asyncio.wait(list(_handler_threads.values()), timeout=INGEST_SHUTDOWN_GRACE_SECONDS)
+    still_running = [job_id for job_id, thread in _handler_threads.items() if not thread.done()]
+    _handler_threads.clear()
+    if still_running:
+        logger.warning(f"{len(still_running)} ingestion handlers still running at shutdown; "
+                       f"their jobs will be retried once their leases lapse")
+
+    now = datetime.utcnow()
+    released = ingestion_jobs_collection.update_many(
+        {"status": "running", "worker_id": WORKER_ID, "_id": {"$nin": still_running}},
+        {"$set": {"status": "queued", "next_run_at": now, "updated_at": now}, "$inc": {"attempts": -1}}
+    )
+    if released.modified_count:
+        logger.info(f"Released {released.modified_count} interrupted ingestion jobs back to the queue")
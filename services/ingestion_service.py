@@ -1,126 +1,466 @@
 import os
-import shutil
 import asyncio
+import hashlib
 import zipfile
 import tempfile
 from datetime import datetime
 
-from ingestion.injector import ingest_document
-from ingestion.loader import parse_file_with_pages
-from database import document_status_collection, precedent_cache_collection
+from fastapi import HTTPException
+
+from ingestion.injector import ingest_document, clone_document
+from ingestion.loader import ocr_page_ratio, ocr_images, IMAGE_EXTENSIONS, SARVAM_MAX_PAGES
+from ingestion.ocr_scheduler import current_ocr_key
+from ingestion.progress import ProgressReporter
+from services.page_store import save_pages, copy_pages, load_pages, ensure_pages_stored
+from services.parsing_service import parse_file_with_pages_async
+from services.document_store import new_staging_path, commit_blob
+from database import document_status_collection, ingestion_batches_collection
+from services.ingestion_queue import (
+    enqueue_ingestion,
+    register_job_handler,
+    update_batch_member,
+    PermanentJobError,
+)
 from utils.error_handler import logger
 from utils.validation import sanitize_filename
 
+MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE_MB", "50")) * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
-async def run_ingestion_background(
-    ingest_fn, db_case_id, db_filename, **kwargs
-):
-    """Run ingestion in the background and update document status on completion/failure."""
-    try:
-        await asyncio.to_thread(ingest_fn, **kwargs)
-        document_status_collection.update_one(
-            {"case_id": db_case_id, "filename": db_filename},
-            {"$set": {"status": "Ready", "last_updated": datetime.utcnow()}}
+
+_FILE_TOO_LARGE = f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+
+
+def _file_too_large():
+    return HTTPException(status_code=400, detail=_FILE_TOO_LARGE)
+
+
+def _member_too_large():
+    # On the queue path: retrying cannot make the member smaller
+    return PermanentJobError(_FILE_TOO_LARGE)
+
+
+class _DiskSink:
+    """
+    Receives a file's bytes in chunks, hashing them and enforcing the size
+    limit as they arrive. Writes go to a temp file beside dest_path that is
+    renamed into place only when the ``with`` block completes without error.
+    ``too_large`` builds the exception raised once the limit is passed.
+    """
+
+    def __init__(self, dest_path: str, max_bytes: int, too_large=_file_too_large):
+        self.dest_path = dest_path
+        self.max_bytes = max_bytes
+        self._too_large = too_large
+        self.size = 0
+        self._digest = hashlib.sha256()
+
+    def __enter__(self):
+        fd, self._tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.dest_path) or ".", suffix=".part")
+        self._out = os.fdopen(fd, "wb")
+        return self
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise self._too_large()
+        self._digest.update(chunk)
+        self._out.write(chunk)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._out.close()
+            if exc_type is None:
+                os.replace(self._tmp_path, self.dest_path)
+        finally:
+            if os.path.exists(self._tmp_path):
+                os.unlink(self._tmp_path)
+        return False
+
+    def result(self) -> tuple[int, str]:
+        return self.size, self._digest.hexdigest()
+
+
+async def stream_upload_to_disk(upload, dest_path: str, max_bytes: int = MAX_FILE_SIZE) -> tuple[int, str]:
+    """
+    Stream an UploadFile to dest_path in chunks, hashing and enforcing the
+    size limit as the bytes arrive; the file appears at dest_path only once
+    the upload is complete. Returns (size_bytes, sha256_hex).
+    """
+    with _DiskSink(dest_path, max_bytes) as sink:
+        while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+            sink.write(chunk)
+    return sink.result()
+
+
+def copy_stream_to_disk(src, dest_path: str, max_bytes: int = MAX_FILE_SIZE) -> tuple[int, str]:
+    """
+    Blocking counterpart of stream_upload_to_disk for file objects (e.g. ZIP
+    members), run by queue handlers: an oversized file raises
+    PermanentJobError so the job fails without being retried.
+    """
+    with _DiskSink(dest_path, max_bytes, too_large=_member_too_large) as sink:
+        while chunk := src.read(UPLOAD_CHUNK_SIZE):
+            sink.write(chunk)
+    return sink.result()
+
+
+async def save_upload(upload, case_id: str, filename: str) -> tuple[str, int, str]:
+    """
+    Stream an upload into the document store under (case_id, filename).
+    Returns (path, size_bytes, sha256_hex).
+    """
+    staged = new_staging_path(filename)
+    size, content_hash = await stream_upload_to_disk(upload, staged)
+    path = await asyncio.to_thread(commit_blob, staged, case_id, filename, content_hash, size)
+    return path, size, content_hash
+
+
+def find_duplicate_document(content_hash: str, is_scanned: bool, case_id: str, filename: str):
+    """
+    Return the document_status entry of an already-ingested, byte-identical
+    file parsed with the same OCR setting, or None. The document being
+    (re)uploaded itself is never returned.
+    """
+    if not content_hash:
+        return None
+    return document_status_collection.find_one(
+        {
+            "content_hash": content_hash,
+            "ocr_requested": is_scanned,
+            "status": "Ready",
+            "$or": [{"page_count": {"$gt": 0}}, {"extracted_pages.0": {"$exists": True}}],
+            "$nor": [{"case_id": case_id, "filename": filename}],
+        },
+        {"case_id": 1, "filename": 1, "extracted_pages": 1, "page_count": 1, "ocr_page_ratio": 1},
+    )
+
+
+async def _parse_with_progress(file_path, case_id, filename, is_scanned, next_stage="parsed") -> list[dict]:
+    """Parse a file, publishing the parsing stage and page counters to document_status."""
+    progress = ProgressReporter(case_id, filename)
+    progress.set_stage("parsing")
+    # Counters advance while parsing runs: pages_total as soon as the PDF is
+    # counted, pages_parsed per page range, pages_ocr per OCR batch
+    page_data = await parse_file_with_pages_async(
+        file_path, force_ocr=is_scanned, case_id=case_id, progress=progress
+    )
+    pages_total = progress.counters.get("pages_total") or len(page_data)
+    progress.set_stage(
+        next_stage,
+        pages_total=pages_total,
+        pages_parsed=pages_total,
+        pages_ocr=sum(1 for p in page_data if p.get("ocr") and p.get("text", "").strip()),
+    )
+    return page_data
+
+
+def _record_duplicate(duplicate: dict, case_id: str, filename: str):
+    """Give (case_id, filename) a copy of an identical document's stored pages."""
+    ensure_pages_stored(duplicate)
+    copy_pages(duplicate["case_id"], duplicate["filename"], case_id, filename)
+    document_status_collection.update_one(
+        {"case_id": case_id, "filename": filename},
+        {"$set": {
+            "ocr_page_ratio": duplicate.get("ocr_page_ratio", 0.0),
+            "dedup_of": {"case_id": duplicate["case_id"], "filename": duplicate["filename"]},
+        }}
+    )
+    logger.info(f"Dedup hit: {filename} (case {case_id}) re-uses {duplicate['filename']} (case {duplicate['case_id']})")
+
+
+def queue_duplicate(duplicate: dict, case_id: str, filename: str, session_id=None):
+    """
+    Point (case_id, filename) at an identical document's stored pages and
+    queue a clone of its chunks and vectors instead of a fresh ingestion.
+    """
+    _record_duplicate(duplicate, case_id, filename)
+    enqueue_ingestion(
+        case_id,
+        filename,
+        job_type="clone_pages",
+        src_case_id=duplicate["case_id"],
+        src_source=duplicate["filename"],
+        case_id=case_id,
+        filename=filename,
+        session_id=session_id,
+    )
+
+
+def _store_parsed_pages(case_id: str, filename: str, page_data: list[dict]):
+    save_pages(case_id, filename, page_data)
+    document_status_collection.update_one(
+        {"case_id": case_id, "filename": filename},
+        {"$set": {"ocr_page_ratio": ocr_page_ratio(page_data)}, "$unset": {"dedup_of": ""}}
+    )
+
+
+def ingest_stored_pages(case_id, filename, session_id=None):
+    """Queue handler: ingest a document from the page store."""
+    pages = load_pages(case_id, filename)
+    ingest_document(
+        text="\n".join(p.get("text", "") for p in pages),
+        source_name=filename,
+        case_id=case_id,
+        page_metadata=pages,
+        session_id=session_id,
+    )
+
+
+def clone_stored_document(src_case_id, src_source, case_id, filename, session_id=None):
+    """Queue handler: clone a duplicate's chunks, with its stored pages as the re-ingest fallback."""
+    pages = load_pages(case_id, filename)
+    clone_document(
+        src_case_id=src_case_id,
+        src_source=src_source,
+        source_name=filename,
+        case_id=case_id,
+        session_id=session_id,
+        text="\n".join(p.get("text", "") for p in pages),
+        page_metadata=pages,
+    )
+
+
+register_job_handler("ingest_pages", ingest_stored_pages)
+register_job_handler("clone_pages", clone_stored_document)
+
+
+# ------------------ ZIP BATCHES ------------------
+ZIP_BATCH_DIR = os.getenv("ZIP_BATCH_DIR", "zip_batches")
+ZIP_MAX_MEMBERS = int(os.getenv("ZIP_MAX_MEMBERS", "500"))
+ZIP_MAX_TOTAL_BYTES = int(os.getenv("ZIP_MAX_TOTAL_MB", "1024")) * 1024 * 1024
+ZIP_MAX_COMPRESSION_RATIO = int(os.getenv("ZIP_MAX_COMPRESSION_RATIO", "100"))
+
+
+def _zip_members(zip_ref: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    """Regular file entries of an archive, skipping directories and OS metadata."""
+    members = []
+    for member in zip_ref.infolist():
+        if member.is_dir() or "__MACOSX" in member.filename:
+            continue
+        name = os.path.basename(member.filename)
+        if not name or name.startswith('.') or name.startswith('__'):
+            continue
+        members.append(member)
+    return members
+
+
+def start_zip_batch(zip_path: str, batch_id: str, caseId: str, user_id: str, is_scanned: bool = False) -> dict:
+    """
+    Validate an uploaded archive against the safety limits using only its
+    central directory, then queue one ingestion job per member and return
+    the batch record. Members are streamed out of the archive by the
+    workers, never extracted up front.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        members = _zip_members(zip_ref)
+
+    if len(members) > ZIP_MAX_MEMBERS:
+        raise HTTPException(status_code=400, detail=f"Zip has too many files (max {ZIP_MAX_MEMBERS})")
+    total_size = sum(m.file_size for m in members)
+    if total_size > ZIP_MAX_TOTAL_BYTES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Zip contents too large. Maximum uncompressed size: {ZIP_MAX_TOTAL_BYTES // (1024*1024)}MB"
         )
-        logger.info(f"Background ingestion complete: {db_filename} for case {db_case_id}")
-        precedent_cache_collection.delete_one({"case_id": db_case_id})
-    except Exception as e:
-        logger.error(f"Background ingestion failed for {db_filename}: {e}", exc_info=True)
+    for m in members:
+        if m.compress_size and m.file_size / m.compress_size > ZIP_MAX_COMPRESSION_RATIO:
+            raise HTTPException(status_code=400, detail="Zip rejected: suspicious compression ratio")
+
+    batch_members = []
+    queued = []
+    seen = set()
+    for m in members:
+        try:
+            safe_name = sanitize_filename(os.path.basename(m.filename))
+        except HTTPException:
+            continue
+        entry = {"filename": safe_name, "member": m.filename, "size_bytes": m.file_size, "status": "queued"}
+        if safe_name in seen:
+            entry.update(status="failed", error="Duplicate filename in archive")
+        elif m.file_size > MAX_FILE_SIZE:
+            entry.update(status="failed", error="File too large")
+        else:
+            queued.append((m, safe_name))
+        seen.add(safe_name)
+        batch_members.append(entry)
+
+    failed_count = len(batch_members) - len(queued)
+    now = datetime.utcnow()
+    batch = {
+        "_id": batch_id,
+        "case_id": caseId,
+        "user_id": user_id,
+        "zip_path": zip_path,
+        "status": "processing" if queued else "completed",
+        "total": len(batch_members),
+        "counts": {"done": 0, "failed": failed_count, "dedup_hits": 0},
+        "members": batch_members,
+        "created_at": now,
+        "updated_at": now,
+    }
+    ingestion_batches_collection.insert_one(batch)
+
+    for m, safe_name in queued:
         document_status_collection.update_one(
-            {"case_id": db_case_id, "filename": db_filename},
-            {"$set": {"status": "Failed", "error": str(e)[:200], "last_updated": datetime.utcnow()}}
+            {"case_id": caseId, "filename": safe_name},
+            {
+                "$set": {
+                    "status": "Processing",
+                    "filename": safe_name,
+                    "case_id": caseId,
+                    "user_id": user_id,
+                    "ocr_requested": is_scanned,
+                    "batch_id": batch_id,
+                    "last_updated": now
+                }
+            },
+            upsert=True
+        )
+
+    # Images are OCR'd together first (up to SARVAM_MAX_PAGES per Sarvam job);
+    # their member jobs are queued once the group pre-pass has filled the cache.
+    images = [(m, name) for m, name in queued if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS]
+    if len(images) < 2:
+        images = []
+    for m, safe_name in queued:
+        if (m, safe_name) not in images:
+            _enqueue_zip_member(batch_id, zip_path, m.filename, safe_name, caseId, is_scanned)
+    image_groups = [images[i:i + SARVAM_MAX_PAGES] for i in range(0, len(images), SARVAM_MAX_PAGES)]
+    for index, group in enumerate(image_groups):
+        enqueue_ingestion(
+            caseId,
+            f"{batch_id}:ocr-group-{index}",
+            job_type="zip_image_group",
+            zip_batch_id=batch_id,
+            zip_path=zip_path,
+            members=[{"member_name": m.filename, "filename": name} for m, name in group],
+            case_id=caseId,
+            is_scanned=is_scanned,
         )
 
+    if not queued and os.path.exists(zip_path):
+        os.unlink(zip_path)
+    logger.info(f"Zip batch {batch_id}: {len(queued)} members queued, {failed_count} rejected")
+    return batch
 
-def process_zip_file(file_content, safe_filename, caseId, user_id, is_scanned=False):
-    """Process a zip file: extract and start background ingestion for each entry.
-    Returns (ingested_files, failed_files).
+
+def _enqueue_zip_member(batch_id, zip_path, member_name, filename, case_id, is_scanned):
+    enqueue_ingestion(
+        case_id,
+        filename,
+        job_type="zip_member",
+        batch_id=batch_id,
+        zip_path=zip_path,
+        member_name=member_name,
+        filename=filename,
+        case_id=case_id,
+        is_scanned=is_scanned,
+    )
+
+
+async def process_zip_image_group(zip_batch_id, zip_path, members, case_id, is_scanned=False):
     """
-    ingested_files = []
-    failed_files = []
+    Queue handler: OCR a group of image members as one multi-page Sarvam job,
+    then queue their regular member jobs, which find the text in the OCR
+    cache. Members are always queued, even if the group OCR fails; they
+    then fall back to one OCR job each.
+    """
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            def _extract():
+                paths = []
+                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                    for i, member in enumerate(members):
+                        info = zip_ref.getinfo(member["member_name"])
+                        path = os.path.join(tmp_dir, f"{i}{os.path.splitext(member['filename'])[1]}")
+                        with zip_ref.open(info) as src:
+                            copy_stream_to_disk(src, path, max_bytes=min(MAX_FILE_SIZE, info.file_size))
+                        paths.append(path)
+                return paths
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        zip_path = os.path.join(temp_dir, safe_filename)
-        with open(zip_path, 'wb') as f:
-            f.write(file_content)
+            paths = await asyncio.to_thread(_extract)
+            current_ocr_key.set(case_id)
+            texts = await asyncio.to_thread(ocr_images, paths)
+            logger.info(f"Zip batch {zip_batch_id}: OCR'd {len(texts)}/{len(paths)} images in one group")
+    except Exception as e:
+        logger.warning(f"Zip batch {zip_batch_id}: image group OCR failed, falling back to per-file OCR: {e}")
+    finally:
+        for member in members:
+            _enqueue_zip_member(zip_batch_id, zip_path, member["member_name"], member["filename"], case_id, is_scanned)
 
+
+async def process_zip_member(batch_id, zip_path, member_name, filename, case_id, is_scanned=False):
+    """Queue handler: stream one member out of the archive, then parse and ingest it."""
+    update_batch_member(batch_id, filename, "extracting")
+
+    def _extract():
+        staged = new_staging_path(filename)
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
-
-        for root, dirs, files in os.walk(temp_dir):
-            for extracted_file in files:
-                if extracted_file == safe_filename:
-                    continue
-                if extracted_file.startswith('.') or extracted_file.startswith('__'):
-                    continue
-
-                extracted_path = os.path.join(root, extracted_file)
-                extracted_safe_name = sanitize_filename(extracted_file)
-
-                try:
-                    document_status_collection.update_one(
-                        {"case_id": caseId, "filename": extracted_safe_name},
-                        {
-                            "$set": {
-                                "status": "Processing",
-                                "filename": extracted_safe_name,
-                                "case_id": caseId,
-                                "user_id": user_id,
-                                "last_updated": datetime.utcnow()
-                            }
-                        },
-                        upsert=True
-                    )
-
-                    dest_path = f"documents/{extracted_safe_name}"
-                    shutil.copy2(extracted_path, dest_path)
-
-                    page_data = parse_file_with_pages(dest_path, force_ocr=is_scanned)
-                    text = "\n".join(p.get("text", "") for p in page_data)
-
-                    if text.strip():
-                        document_status_collection.update_one(
-                            {"case_id": caseId, "filename": extracted_safe_name},
-                            {"$set": {"extracted_pages": page_data}}
-                        )
-                        asyncio.create_task(run_ingestion_background(
-                            ingest_document,
-                            caseId,
-                            extracted_safe_name,
-                            text=text,
-                            source_name=extracted_safe_name,
-                            case_id=caseId,
-                            page_metadata=page_data
-                        ))
-                        ingested_files.append(extracted_safe_name)
-                        logger.info(f"Started background ingestion for zip entry: {extracted_safe_name}")
-                    else:
-                        document_status_collection.update_one(
-                            {"case_id": caseId, "filename": extracted_safe_name},
-                            {"$set": {"status": "Failed", "error": "Empty file", "last_updated": datetime.utcnow()}}
-                        )
-                        failed_files.append(extracted_safe_name)
-
-                except Exception as e:
-                    logger.error(f"Failed to ingest {extracted_file}: {e}")
-                    document_status_collection.update_one(
-                        {"case_id": caseId, "filename": extracted_safe_name},
-                        {"$set": {"status": "Failed", "error": str(e)[:100], "last_updated": datetime.utcnow()}}
-                    )
-                    failed_files.append(extracted_safe_name)
-
-    return ingested_files, failed_files
-
-
-async def process_single_file(file_content, safe_filename, caseId, user_id, session_id=None, is_scanned=False):
-    """Process a single uploaded file: save, parse, and start background ingestion."""
+            info = zip_ref.getinfo(member_name)
+            # Cap at the declared size too, so a lying header cannot exceed the batch limit
+            with zip_ref.open(info) as src:
+                size, content_hash = copy_stream_to_disk(src, staged, max_bytes=min(MAX_FILE_SIZE, info.file_size))
+        return commit_blob(staged, case_id, filename, content_hash, size), size, content_hash
+
+    dest_path, size, content_hash = await asyncio.to_thread(_extract)
+    document_status_collection.update_one(
+        {"case_id": case_id, "filename": filename},
+        {"$set": {"content_hash": content_hash, "size_bytes": size}}
+    )
+
+    duplicate = find_duplicate_document(content_hash, is_scanned, case_id, filename)
+    if duplicate:
+        _record_duplicate(duplicate, case_id, filename)
+        ingestion_batches_collection.update_one({"_id": batch_id}, {"$inc": {"counts.dedup_hits": 1}})
+        update_batch_member(batch_id, filename, "ingesting", dedup=True)
+        await asyncio.to_thread(
+            clone_stored_document,
+            src_case_id=duplicate["case_id"],
+            src_source=duplicate["filename"],
+            case_id=case_id,
+            filename=filename,
+        )
+        return
+
+    update_batch_member(batch_id, filename, "parsing")
+    page_data = await _parse_with_progress(dest_path, case_id, filename, is_scanned)
+    text = "\n".join(p.get("text", "") for p in page_data)
+    if not text.strip():
+        raise PermanentJobError("Empty file")
+
+    _store_parsed_pages(case_id, filename, page_data)
+
+    update_batch_member(batch_id, filename, "ingesting")
+    await asyncio.to_thread(
+        ingest_document,
+        text=text,
+        source_name=filename,
+        case_id=case_id,
+        page_metadata=page_data,
+    )
+
+
+register_job_handler("zip_member", process_zip_member)
+register_job_handler("zip_image_group", process_zip_image_group)
+
+
+async def process_single_file(file_location, safe_filename, caseId, user_id, session_id=None, is_scanned=False,
+                              content_hash=None, size_bytes=None):
+    """Process a single file already saved at file_location: parse and queue ingestion.
+    Returns True when an identical, already-ingested file was re-used (dedup hit).
+    """
     doc_record = {
         "status": "Processing",
         "filename": safe_filename,
         "case_id": caseId,
         "user_id": user_id,
+        "ocr_requested": is_scanned,
         "last_updated": datetime.utcnow()
     }
+    if content_hash:
+        doc_record["content_hash"] = content_hash
+        doc_record["size_bytes"] = size_bytes
     if session_id:
         doc_record["session_id"] = session_id
 
@@ -130,34 +470,30 @@ async def process_single_file(file_content, safe_filename, caseId, user_id, sess
         upsert=True
     )
 
-    file_location = f"documents/{safe_filename}"
-    with open(file_location, "wb+") as file_object:
-        file_object.write(file_content)
+    duplicate = find_duplicate_document(content_hash, is_scanned, caseId, safe_filename)
+    if duplicate:
+        queue_duplicate(duplicate, caseId, safe_filename, session_id=session_id)
+        return True
 
-    page_data = parse_file_with_pages(file_location, force_ocr=is_scanned)
+    page_data = await _parse_with_progress(file_location, caseId, safe_filename, is_scanned, next_stage="queued")
     text = "\n".join(p.get("text", "") for p in page_data)
 
     if not text.strip():
-        from fastapi import HTTPException
         raise HTTPException(
             status_code=400,
             detail="Could not extract text from file or file is empty."
         )
 
-    document_status_collection.update_one(
-        {"case_id": caseId, "filename": safe_filename},
-        {"$set": {"extracted_pages": page_data}}
-    )
+    _store_parsed_pages(caseId, safe_filename, page_data)
 
-    asyncio.create_task(run_ingestion_background(
-        ingest_document,
+    enqueue_ingestion(
         caseId,
         safe_filename,
-        text=text,
-        source_name=safe_filename,
+        job_type="ingest_pages",
         case_id=caseId,
-        page_metadata=page_data,
+        filename=safe_filename,
         session_id=session_id
-    ))
+    )
 
-    logger.info(f"Started background ingestion: {safe_filename} for case {caseId} (session: {session_id or 'none'})")
+    logger.info(f"Queued ingestion: {safe_filename} for case {caseId} (session: {session_id or 'none'})")
+    return False
@@ -1,4 +1,3 @@
-import os
 import asyncio
 from datetime import datetime
 
@@ -33,22 +32,31 @@ STEP_ORDER = list(STEP_LABELS.keys())
 def fetch_docs_for_case(case_id: str) -> list:
     """Helper to fetch documents for a case (shared by all investigation endpoints)."""
     from ingestion.loader import parse_file
-    docs_status = list(document_status_collection.find({"case_id": case_id, "status": "Ready"}))
+    from services.page_store import ensure_pages_stored, load_pages
+    from services.document_store import resolve_document
+    docs_status = list(document_status_collection.find(
+        {"case_id": case_id, "status": "Ready"},
+        {"case_id": 1, "filename": 1, "page_count": 1, "extracted_pages": 1}
+    ))
     doc_list = []
     for doc in docs_status:
         filename = doc["filename"]
-        file_path = f"documents/{filename}"
-        if os.path.exists(file_path):
-            try:
+        try:
+            # Stored page text first; re-parsing would repeat OCR for scans
+            if ensure_pages_stored(doc):
+                content = "\n".join(p["text"] for p in load_pages(case_id, filename))
+            elif file_path := resolve_document(case_id, filename):
                 content = parse_file(file_path)
-                if content.strip():
-                    doc_list.append({
-                        "id": filename,
-                        "content": content,
-                        "metadata": {"source": filename}
-                    })
-            except Exception as e:
-                print(f"Error reading {filename}: {e}")
+            else:
+                continue
+            if content.strip():
+                doc_list.append({
+                    "id": filename,
+                    "content": content,
+                    "metadata": {"source": filename}
+                })
+        except Exception as e:
+            print(f"Error reading {filename}: {e}")
     return doc_list
 
 
@@ -0,0 +1,283 @@
+"""
+Extracted page text, stored outside document_status.
+
+Each page is its own document in ``document_pages`` keyed by
+(case_id, filename, page_index), with the text zlib-compressed. Status reads
+stay small, a large judgment can no longer push document_status towards the
+16 MB BSON limit, and the viewer can fetch a page range without loading the
+whole document.
+
+document_status keeps only ``page_count`` and ``pages_hash`` (sha256 of the
+stored text, the viewer's ETag). Records written before the page store
+existed still carry an inline ``extracted_pages`` array; they are moved
+into the store the first time they are read, or by the opt-in startup sweep
+(PAGE_STORE_SWEEP=true).
+"""
+
+import os
+import zlib
+import socket
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+
+from bson import Binary
+from pymongo import InsertOne
+from pymongo.errors import DuplicateKeyError
+
+from database import document_pages_collection, document_status_collection, maintenance_locks_collection
+from services.document_store import document_exists, resolve_document
+from utils.error_handler import logger
+
+PAGE_STORE_SWEEP = os.getenv("PAGE_STORE_SWEEP", "false").lower() == "true"
+PAGE_STORE_SWEEP_LOCK_SECONDS = int(os.getenv("PAGE_STORE_SWEEP_LOCK_SECONDS", "300"))
+
+_PAGE_FIELDS = ("page_number", "file_type", "ocr")
+_INSERT_BATCH = 500
+_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tiff"}
+_SWEEP_LOCK_ID = "page_store_sweep"
+_SWEEP_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _to_record(case_id: str, filename: str, page_index: int, page: dict) -> dict:
+    record = {
+        "case_id": case_id,
+        "filename": filename,
+        "page_index": page_index,
+        "chars": len(page.get("text", "")),
+        "text_z": Binary(zlib.compress(page.get("text", "").encode("utf-8"), 6)),
+    }
+    record.update({k: page[k] for k in _PAGE_FIELDS if k in page})
+    return record
+
+
+def _from_record(record: dict) -> dict:
+    page = {"text": zlib.decompress(record["text_z"]).decode("utf-8")}
+    page.update({k: record[k] for k in _PAGE_FIELDS if k in record})
+    return page
+
+
+def _write_records(records):
+    batch = []
+    for record in records:
+        batch.append(InsertOne(record))
+        if len(batch) >= _INSERT_BATCH:
+            document_pages_collection.bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        document_pages_collection.bulk_write(batch, ordered=False)
+
+
+def _pages_hash(pages) -> str:
+    """sha256 over the page texts in order: a strong validator for the stored text."""
+    h = hashlib.sha256()
+    for page in pages:
+        h.update(page.get("text", "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def save_pages(case_id: str, filename: str, pages: list[dict]) -> int:
+    """Replace the stored pages of a document; returns the page count."""
+    document_pages_collection.delete_many({"case_id": case_id, "filename": filename})
+    _write_records(_to_record(case_id, filename, i, page) for i, page in enumerate(pages))
+    document_status_collection.update_one(
+        {"case_id": case_id, "filename": filename},
+        {"$set": {"page_count": len(pages), "pages_hash": _pages_hash(pages)},
+         "$unset": {"extracted_pages": "", "page_store_error": ""}}
+    )
+    return len(pages)
+
+
+def copy_pages(src_case_id: str, src_filename: str, case_id: str, filename: str) -> int:
+    """Copy another document's stored pages (still compressed) to (case_id, filename)."""
+    document_pages_collection.delete_many({"case_id": case_id, "filename": filename})
+    records = document_pages_collection.find(
+        {"case_id": src_case_id, "filename": src_filename}, {"_id": 0}
+    ).sort("page_index", 1)
+    count = 0
+
+    def retarget():
+        nonlocal count
+        for record in records:
+            count += 1
+            yield {**record, "case_id": case_id, "filename": filename}
+
+    _write_records(retarget())
+    source = document_status_collection.find_one(
+        {"case_id": src_case_id, "filename": src_filename}, {"pages_hash": 1}
+    ) or {}
+    fields = {"page_count": count}
+    if source.get("pages_hash"):
+        fields["pages_hash"] = source["pages_hash"]
+    document_status_collection.update_one(
+        {"case_id": case_id, "filename": filename},
+        {"$set": fields, "$unset": {"extracted_pages": ""}}
+    )
+    return count
+
+
+def load_pages(case_id: str, filename: str, start: int = 0, count: int | None = None) -> list[dict]:
+    """Pages [start, start + count) of a document in order (all pages when count is None)."""
+    query = {"case_id": case_id, "filename": filename, "page_index": {"$gte": start}}
+    if count is not None:
+        query["page_index"]["$lt"] = start + count
+    cursor = document_pages_collection.find(query, {"_id": 0}).sort("page_index", 1)
+    return [_from_record(record) for record in cursor]
+
+
+def ensure_pages_stored(doc_status: dict) -> int | None:
+    """
+    Page count of a document, moving a legacy inline ``extracted_pages``
+    array into the page store on the way. None if no pages were ever stored.
+    """
+    if doc_status.get("extracted_pages"):
+        pages = doc_status.pop("extracted_pages")
+        doc_status["page_count"] = save_pages(doc_status["case_id"], doc_status["filename"], pages)
+        doc_status["pages_hash"] = _pages_hash(pages)
+    return doc_status.get("page_count")
+
+
+def get_pages_hash(doc_status: dict) -> str:
+    """The stored text's hash, computed (and recorded) for pages saved before it was tracked."""
+    if not doc_status.get("pages_hash"):
+        doc_status["pages_hash"] = _pages_hash(load_pages(doc_status["case_id"], doc_status["filename"]))
+        document_status_collection.update_one(
+            {"case_id": doc_status["case_id"], "filename": doc_status["filename"]},
+            {"$set": {"pages_hash": doc_status["pages_hash"]}}
+        )
+    return doc_status["pages_hash"]
+
+
+def delete_pages(case_id: str, filename: str):
+    """Drop a document's stored pages (on archive); a re-upload stores them afresh."""
+    document_pages_collection.delete_many({"case_id": case_id, "filename": filename})
+    document_status_collection.update_one(
+        {"case_id": case_id, "filename": filename},
+        {"$unset": {"page_count": "", "pages_hash": ""}}
+    )
+
+
+# ------------------ BACKGROUND POPULATION ------------------
+_populating: dict[tuple[str, str], asyncio.Task] = {}
+
+
+async def _populate(case_id: str, filename: str, force_ocr: bool = False, ocr_cache_only: bool = False):
+    from services.parsing_service import parse_file_with_pages_async
+    try:
+        file_path = await asyncio.to_thread(resolve_document, case_id, filename)
+        if not file_path:
+            raise FileNotFoundError(filename)
+        pages = await parse_file_with_pages_async(
+            file_path, force_ocr=force_ocr, case_id=case_id, ocr_cache_only=ocr_cache_only
+        )
+        await asyncio.to_thread(save_pages, case_id, filename, pages)
+        logger.info(f"Page store populated: {filename} ({len(pages)} pages) for case {case_id}")
+    except Exception as e:
+        logger.error(f"Page store population failed for {filename}: {e}")
+        # Recorded so the sweep does not parse this document again; the viewer still retries on demand
+        try:
+            await asyncio.to_thread(
+                document_status_collection.update_one,
+                {"case_id": case_id, "filename": filename},
+                {"$set": {"page_store_error": str(e)}},
+            )
+        except Exception as record_error:
+            logger.error(f"Could not record page store failure for {filename}: {record_error}")
+    finally:
+        _populating.pop((case_id, filename), None)
+
+
+def schedule_population(case_id: str, filename: str) -> bool:
+    """
+    Parse a document into the page store in the background (once per
+    document at a time). Returns False if the source file is missing.
+    """
+    key = (case_id, filename)
+    if key in _populating:
+        return True
+    if not document_exists(case_id, filename):
+        return False
+    _populating[key] = asyncio.create_task(_populate(case_id, filename))
+    return True
+
+
+def _acquire_sweep_lock() -> bool:
+    """Take or renew the cluster-wide sweep lock; False while another process holds it."""
+    now = datetime.utcnow()
+    try:
+        maintenance_locks_collection.update_one(
+            {"_id": _SWEEP_LOCK_ID, "$or": [{"owner": _SWEEP_OWNER}, {"expires_at": {"$lt": now}}]},
+            {"$set": {"owner": _SWEEP_OWNER,
+                      "expires_at": now + timedelta(seconds=PAGE_STORE_SWEEP_LOCK_SECONDS)}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+async def _hold_sweep_lock():
+    """Keep the sweep lock alive; returns (ending the sweep) if it was lost."""
+    while True:
+        await asyncio.sleep(PAGE_STORE_SWEEP_LOCK_SECONDS / 3)
+        if not await asyncio.to_thread(_acquire_sweep_lock):
+            logger.warning("Page store sweep lock lost to another process, stopping")
+            return
+
+
+async def prepopulate_page_store():
+    """
+    Startup sweep (opt-in, PAGE_STORE_SWEEP=true): move legacy inline
+    extracted_pages into the page store, then parse Ready documents that
+    have no stored pages, one at a time so the sweep never competes with
+    live ingestion for the parse pool.
+
+    Only one process sweeps at a time (a lease in maintenance_locks). No
+    OCR is run: scanned pages take cached OCR output only and image files
+    are left to the viewer. A document that fails is marked with
+    ``page_store_error`` and not retried by later sweeps.
+    """
+    if not await asyncio.to_thread(_acquire_sweep_lock):
+        logger.info("Page store sweep already running in another process")
+        return
+    heartbeat = asyncio.create_task(_hold_sweep_lock())
+    try:
+        migrated = 0
+        while not heartbeat.done():
+            doc = await asyncio.to_thread(
+                document_status_collection.find_one,
+                {"extracted_pages": {"$exists": True}},
+                {"case_id": 1, "filename": 1, "extracted_pages": 1},
+            )
+            if not doc:
+                break
+            # save_pages unsets extracted_pages, so each document is visited once (even an empty array)
+            await asyncio.to_thread(save_pages, doc["case_id"], doc["filename"], doc.get("extracted_pages") or [])
+            migrated += 1
+
+        missing = await asyncio.to_thread(lambda: list(document_status_collection.find(
+            {"status": "Ready", "page_count": {"$exists": False}, "page_store_error": {"$exists": False}},
+            {"case_id": 1, "filename": 1, "ocr_requested": 1},
+        )))
+        populated = 0
+        for doc in missing:
+            if heartbeat.done():
+                break
+            key = (doc["case_id"], doc["filename"])
+            if os.path.splitext(doc["filename"])[1].lower() in _IMAGE_EXTENSIONS or key in _populating:
+                continue
+            if not await asyncio.to_thread(document_exists, *key):
+                continue
+            _populating[key] = asyncio.create_task(
+                _populate(*key, force_ocr=bool(doc.get("ocr_requested")), ocr_cache_only=True)
+            )
+            await _populating.get(key, asyncio.sleep(0))
+            populated += 1
+        logger.info(f"Page store sweep: {migrated} migrated, {populated} of {len(missing)} "
+                    f"documents without stored pages parsed")
+    finally:
+        heartbeat.cancel()
+        await asyncio.to_thread(
+            maintenance_locks_collection.delete_one, {"_id": _SWEEP_LOCK_ID, "owner": _SWEEP_OWNER}
+        )
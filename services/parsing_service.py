@@ -0,0 +1,110 @@
+"""
+Off-event-loop document parsing.
+
+pypdf and python-docx are CPU-bound, so PDFs and Word files are parsed in a
+process pool sized to the machine's cores. Large PDFs are split into page
+ranges that are extracted in parallel and merged back in page order. OCR
+(images, PDF pages without a text layer) spends its time waiting on
+Sarvam, so it runs in a thread instead of occupying a worker process.
+"""
+
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from ingestion.loader import (
+    parse_file_with_pages,
+    count_pdf_pages,
+    extract_pdf_page_range,
+    apply_selective_ocr,
+    get_file_type,
+)
+from ingestion.ocr_scheduler import current_ocr_key
+from utils.error_handler import logger
+
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 2)))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "50"))
+
+_PROCESS_EXTENSIONS = {".pdf", ".docx", ".doc"}
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: the API process holds torch/CUDA state and threads that must not be forked
+        _pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_parse_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def parse_file_with_pages_async(file_path: str, force_ocr: bool = False, case_id: str | None = None,
+                                      progress=None, ocr_cache_only: bool = False) -> list[dict]:
+    """
+    Async counterpart of ``parse_file_with_pages``; returns the same
+    ``[{text, page_number, file_type}]`` list without blocking the event loop.
+    ``case_id`` is the fair-queuing key for any OCR the file needs.
+    ``progress`` (a ProgressReporter) receives the PDF's page count as soon
+    as it is known, then pages_parsed per finished range and pages_ocr per
+    finished OCR batch. With ``ocr_cache_only`` scanned PDF pages take only
+    cached OCR output and nothing is sent to Sarvam.
+    """
+    if case_id:
+        # Copied into the to_thread contexts below, where the loader submits OCR jobs
+        current_ocr_key.set(case_id)
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in _PROCESS_EXTENSIONS:
+        return await asyncio.to_thread(parse_file_with_pages, file_path, force_ocr)
+
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    if ext != ".pdf":
+        return await loop.run_in_executor(pool, parse_file_with_pages, file_path, False)
+
+    try:
+        total_pages = await loop.run_in_executor(pool, count_pdf_pages, file_path)
+    except Exception as e:
+        logger.warning(f"Could not count pages of {file_path}, parsing in one task: {e}")
+        total_pages = 0
+    if progress and total_pages:
+        progress.update(pages_total=total_pages, pages_parsed=0)
+
+    if total_pages <= PDF_PAGES_PER_TASK:
+        ranges = [(0, max(total_pages, 1))]
+    else:
+        ranges = [
+            (start, min(start + PDF_PAGES_PER_TASK, total_pages))
+            for start in range(0, total_pages, PDF_PAGES_PER_TASK)
+        ]
+        logger.info(f"Parsing {file_path}: {total_pages} pages in {len(ranges)} parallel ranges")
+    futures = [
+        loop.run_in_executor(pool, extract_pdf_page_range, file_path, start, end, force_ocr)
+        for start, end in ranges
+    ]
+    if progress and total_pages:
+        for (start, end), future in zip(ranges, futures):
+            future.add_done_callback(
+                lambda f, n=end - start: None if f.cancelled() or f.exception() else progress.add(pages_parsed=n)
+            )
+    results = await asyncio.gather(*futures)
+
+    # gather() preserves submission order, so pages come back sorted.
+    # Pages without a text layer are OCR'd here, in a thread: they wait on
+    # Sarvam and should not hold a worker process.
+    pages = [page for chunk in results for page in chunk]
+    pages = await asyncio.to_thread(apply_selective_ocr, file_path, pages, progress, ocr_cache_only)
+    file_type = get_file_type(file_path)
+    for page in pages:
+        page["file_type"] = file_type
+    return pages if pages else [{"text": "", "file_type": file_type}]
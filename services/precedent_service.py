@@ -1,19 +1,93 @@
 import os
 import json
+import random
 import asyncio
 from datetime import datetime
 
 import httpx
+import numpy as np
 
 from database import document_status_collection, precedent_cache_collection
 from dependencies import INDIAN_KANOON_API_TOKEN, INDIAN_KANOON_BASE_URL
+from utils.clustering import representative_indices
 from utils.error_handler import logger
 
+# Precedent queries are drawn from one representative chunk per topic cluster
+# of the whole case, so the prompt stays the same size however large the case.
+PRECEDENT_CLUSTERS = int(os.getenv("PRECEDENT_CLUSTERS", "12"))
+PRECEDENT_EXCERPT_CHARS = int(os.getenv("PRECEDENT_EXCERPT_CHARS", "1000"))
+# Above this many chunks, cluster a uniform sample of them
+PRECEDENT_MAX_VECTORS = int(os.getenv("PRECEDENT_MAX_VECTORS", "20000"))
+SCROLL_PAGE_SIZE = 1000
+
+
+def _case_vectors(qdrant_client, collection: str, caseId: str) -> tuple[list, np.ndarray]:
+    """
+    Point ids and vectors of a case's chunks, paged out of Qdrant without
+    payloads. Reservoir-sampled down to PRECEDENT_MAX_VECTORS, seeded by case
+    so the same case yields the same sample.
+    """
+    from qdrant_client import models as qmodels
+
+    case_filter = qmodels.Filter(
+        must=[qmodels.FieldCondition(key="case_id", match=qmodels.MatchValue(value=caseId))]
+    )
+    rng = random.Random(caseId)
+    ids: list = []
+    vectors: np.ndarray | None = None
+    seen = 0
+    offset = None
+    while True:
+        points, offset = qdrant_client.scroll(
+            collection_name=collection,
+            scroll_filter=case_filter,
+            limit=SCROLL_PAGE_SIZE,
+            offset=offset,
+            with_payload=False,
+            with_vectors=True,
+        )
+        for point in points:
+            if vectors is None:
+                vectors = np.empty((min(SCROLL_PAGE_SIZE, PRECEDENT_MAX_VECTORS), len(point.vector)), dtype=np.float32)
+            seen += 1
+            if len(ids) < PRECEDENT_MAX_VECTORS:
+                slot = len(ids)
+                ids.append(point.id)
+                if slot == len(vectors):
+                    # Doubled as vectors arrive, so a small case never pays for the full cap
+                    grown = np.empty((min(2 * len(vectors), PRECEDENT_MAX_VECTORS), vectors.shape[1]), dtype=np.float32)
+                    grown[:slot] = vectors
+                    vectors = grown
+            else:
+                slot = rng.randrange(seen)
+                if slot >= PRECEDENT_MAX_VECTORS:
+                    continue
+                ids[slot] = point.id
+            vectors[slot] = point.vector
+        if offset is None:
+            break
+    if vectors is None:
+        return [], np.empty((0, 0), dtype=np.float32)
+    return ids, vectors[:len(ids)]
+
+
+def _representative_chunks(qdrant_client, collection: str, caseId: str) -> list[str]:
+    """Texts of the chunks nearest the case's PRECEDENT_CLUSTERS k-means centroids, largest cluster first."""
+    ids, vectors = _case_vectors(qdrant_client, collection, caseId)
+    if not ids:
+        return []
+    picks = [ids[i] for i in representative_indices(vectors, PRECEDENT_CLUSTERS)]
+    points = qdrant_client.retrieve(
+        collection_name=collection, ids=picks, with_payload=["text"], with_vectors=False
+    )
+    texts = {p.id: p.payload.get("text", "") for p in points}
+    return [texts[i] for i in picks if texts.get(i)]
+
 
 async def find_precedents(caseId: str, force: bool = False):
     """
     Use case document embeddings to find relevant Indian Kanoon precedents.
-    1. Fetch top chunks from Qdrant for this case
+    1. Cluster the case's chunk vectors, take the chunk nearest each centroid
     2. Use LLM to extract targeted legal search queries
     3. Search Indian Kanoon with those queries
     4. Return deduplicated results
@@ -30,7 +104,7 @@ async def find_precedents(caseId: str, force: bool = False):
                 "total": cached["total"],
             }
 
-    from qdrant_client import QdrantClient, models as qmodels
+    from qdrant_client import QdrantClient
     from groq import Groq
 
     qdrant_url = os.getenv("QDRANT_URL")
@@ -38,24 +112,10 @@ async def find_precedents(caseId: str, force: bool = False):
     qdrant_client = QdrantClient(url=qdrant_url, api_key=qdrant_key)
     COLLECTION = "chunks"
 
-    # 1. Scroll Qdrant for this case's chunks
+    # 1. Cluster the case's chunk vectors and take the chunk nearest each centroid
     from fastapi import HTTPException
     try:
-        scroll_result = qdrant_client.scroll(
-            collection_name=COLLECTION,
-            scroll_filter=qmodels.Filter(
-                must=[
-                    qmodels.FieldCondition(
-                        key="case_id",
-                        match=qmodels.MatchValue(value=caseId),
-                    )
-                ]
-            ),
-            limit=20,
-            with_payload=True,
-            with_vectors=False,
-        )
-        points = scroll_result[0]
+        chunk_texts = await asyncio.to_thread(_representative_chunks, qdrant_client, COLLECTION, caseId)
     except Exception as e:
         logger.warning(f"Qdrant scroll failed for case {caseId}: {e}")
         raise HTTPException(
@@ -63,17 +123,14 @@ async def find_precedents(caseId: str, force: bool = False):
             detail="Vector database (Qdrant) is unavailable. Please ensure Qdrant is running."
         )
 
-    if not points:
+    if not chunk_texts:
         raise HTTPException(
             status_code=404,
             detail="No document embeddings found for this case. Please upload documents first."
         )
 
-    # 2. Combine chunk texts for LLM analysis
-    chunk_texts = [p.payload.get("text", "") for p in points if p.payload.get("text")]
-    combined_text = "\n---\n".join(chunk_texts)
-    if len(combined_text) > 12000:
-        combined_text = combined_text[:12000]
+    # 2. Combine chunk texts for LLM analysis (at most PRECEDENT_CLUSTERS excerpts)
+    combined_text = "\n---\n".join(text[:PRECEDENT_EXCERPT_CHARS] for text in chunk_texts)
 
     # 3. Use Groq LLM to extract legal search queries
     groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
@@ -0,0 +1,223 @@
+"""
+Resumable uploads.
+
+A client first declares the file (name, size, sha256). If the same user
+or case already stored those exact bytes the transfer is skipped and the
+document goes straight to ingestion. Otherwise an upload session is
+opened: the client PUTs fixed-size parts in any order (and in parallel),
+can ask which parts have arrived after a dropped connection, and finally
+completes the upload, which verifies the sha256 and hands the file to
+``process_single_file`` like a regular /ingest upload.
+
+Parts are written in place into a preallocated file in the staging
+directory, so several API workers can only serve the same upload if that
+directory is shared (UPLOAD_STAGING_DIR); otherwise route an upload's
+requests to one worker. Sessions expire after UPLOAD_SESSION_TTL_HOURS.
+"""
+
+import os
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+
+from database import upload_sessions_collection, document_status_collection
+from services.blob_storage import get_storage, DOCUMENT_STORE_DIR
+from services.document_store import blob_key, commit_blob, get_file_record, hash_file, link_blob
+from services.ingestion_service import process_single_file, MAX_FILE_SIZE
+from utils.error_handler import logger
+
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE_MB", "5")) * 1024 * 1024
+UPLOAD_SESSION_TTL = timedelta(hours=int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")))
+UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR", os.path.join(DOCUMENT_STORE_DIR, ".uploads"))
+
+
+def _staging_path(upload_id: str, filename: str) -> str:
+    return os.path.join(UPLOAD_STAGING_DIR, f"{upload_id}{os.path.splitext(filename)[1].lower()}")
+
+
+def _part_length(session: dict, part_number: int) -> int:
+    return min(session["part_size"], session["size_bytes"] - part_number * session["part_size"])
+
+
+def _purge_expired_staging():
+    """Drop staged files whose session has expired (the TTL index removes the sessions themselves)."""
+    if not os.path.isdir(UPLOAD_STAGING_DIR):
+        return
+    cutoff = (datetime.utcnow() - UPLOAD_SESSION_TTL).timestamp()
+    for name in os.listdir(UPLOAD_STAGING_DIR):
+        path = os.path.join(UPLOAD_STAGING_DIR, name)
+        if os.path.getmtime(path) < cutoff:
+            os.unlink(path)
+
+
+def _preallocate(path: str, size_bytes: int):
+    """Create the staged file at its full size so parts can be written in place."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.truncate(size_bytes)
+
+
+def _find_reusable_blob(sha256: str, filename: str, case_id: str, user_id: str) -> str | None:
+    """
+    Blob key of identical bytes this user or case already uploaded. Reuse is
+    limited to those, so a hash alone never grants access to someone
+    else's document.
+    """
+    owner = document_status_collection.find_one(
+        {"content_hash": sha256, "$or": [{"case_id": case_id}, {"user_id": user_id}]},
+        {"case_id": 1, "filename": 1}
+    )
+    if not owner:
+        return None
+    record = get_file_record(owner["case_id"], owner["filename"])
+    key = blob_key(sha256, filename)
+    if not record or record["blob"] != key or not get_storage().exists(key):
+        return None
+    return key
+
+
+async def init_upload(case_id: str, filename: str, size_bytes: int, sha256: str, user_id: str,
+                      session_id=None, is_scanned=False) -> dict:
+    if size_bytes <= 0:
+        raise HTTPException(status_code=400, detail="Empty file")
+    if size_bytes > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+        )
+
+    key = await asyncio.to_thread(_find_reusable_blob, sha256, filename, case_id, user_id)
+    if key:
+        await asyncio.to_thread(link_blob, case_id, filename, sha256, size_bytes, key)
+        file_path = await asyncio.to_thread(get_storage().local_path, key)
+        dedup_hit = await process_single_file(
+            file_path, filename, case_id, user_id,
+            session_id=session_id, is_scanned=is_scanned,
+            content_hash=sha256, size_bytes=size_bytes
+        )
+        logger.info(f"Upload skipped, blob already stored: {filename} for case {case_id}")
+        return {"status": "complete", "transferSkipped": True, "dedup_hits": 1 if dedup_hit else 0}
+
+    await asyncio.to_thread(_purge_expired_staging)
+    upload_id = uuid.uuid4().hex
+    path = _staging_path(upload_id, filename)
+    await asyncio.to_thread(_preallocate, path, size_bytes)
+
+    now = datetime.utcnow()
+    total_parts = -(-size_bytes // UPLOAD_PART_SIZE)
+    await asyncio.to_thread(upload_sessions_collection.insert_one, {
+        "_id": upload_id,
+        "case_id": case_id,
+        "filename": filename,
+        "user_id": user_id,
+        "session_id": session_id,
+        "is_scanned": is_scanned,
+        "size_bytes": size_bytes,
+        "sha256": sha256,
+        "part_size": UPLOAD_PART_SIZE,
+        "total_parts": total_parts,
+        "received_parts": [],
+        "status": "uploading",
+        "created_at": now,
+        "expires_at": now + UPLOAD_SESSION_TTL,
+    })
+    return {
+        "status": "uploading",
+        "uploadId": upload_id,
+        "partSize": UPLOAD_PART_SIZE,
+        "totalParts": total_parts,
+    }
+
+
+def get_upload(upload_id: str, user_id: str) -> dict:
+    session = upload_sessions_collection.find_one({"_id": upload_id})
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    if session["user_id"] != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return session
+
+
+def _write_part(path: str, offset: int, data: bytes):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+
+
+async def upload_part(upload_id: str, part_number: int, data: bytes, user_id: str) -> dict:
+    session = get_upload(upload_id, user_id)
+    if session["status"] != "uploading":
+        raise HTTPException(status_code=409, detail=f"Upload is {session['status']}")
+    if not 0 <= part_number < session["total_parts"]:
+        raise HTTPException(status_code=400, detail="Invalid part number")
+    if len(data) != _part_length(session, part_number):
+        raise HTTPException(status_code=400, detail="Part has the wrong size")
+
+    path = _staging_path(upload_id, session["filename"])
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    # Re-sending a part simply overwrites it, so client retries are idempotent
+    await asyncio.to_thread(_write_part, path, part_number * session["part_size"], data)
+    upload_sessions_collection.update_one(
+        {"_id": upload_id},
+        {"$addToSet": {"received_parts": part_number}, "$set": {"expires_at": datetime.utcnow() + UPLOAD_SESSION_TTL}}
+    )
+    return {"partNumber": part_number, "received": True}
+
+
+def upload_status(session: dict) -> dict:
+    received = set(session["received_parts"])
+    return {
+        "uploadId": session["_id"],
+        "status": session["status"],
+        "filename": session["filename"],
+        "partSize": session["part_size"],
+        "totalParts": session["total_parts"],
+        "receivedParts": sorted(received),
+        "missingParts": [i for i in range(session["total_parts"]) if i not in received],
+    }
+
+
+async def complete_upload(upload_id: str, user_id: str) -> dict:
+    session = get_upload(upload_id, user_id)
+    missing = upload_status(session)["missingParts"]
+    if missing:
+        raise HTTPException(status_code=409, detail=f"{len(missing)} parts missing")
+
+    # Only one completion may run; a concurrent retry gets a 409
+    claimed = upload_sessions_collection.find_one_and_update(
+        {"_id": upload_id, "status": "uploading"}, {"$set": {"status": "completing"}}
+    )
+    if not claimed:
+        raise HTTPException(status_code=409, detail=f"Upload is {session['status']}")
+
+    path = _staging_path(upload_id, session["filename"])
+    case_id, filename = session["case_id"], session["filename"]
+    try:
+        size, sha256 = await asyncio.to_thread(hash_file, path)
+        if sha256 != session["sha256"] or size != session["size_bytes"]:
+            # Keep the session so the client can re-send the parts and complete again
+            upload_sessions_collection.update_one({"_id": upload_id}, {"$set": {"received_parts": []}})
+            raise HTTPException(status_code=400, detail="Checksum mismatch: re-upload the parts")
+        file_path = await asyncio.to_thread(commit_blob, path, case_id, filename, sha256, size)
+    except Exception:
+        upload_sessions_collection.update_one({"_id": upload_id}, {"$set": {"status": "uploading"}})
+        raise
+    upload_sessions_collection.delete_one({"_id": upload_id})
+
+    dedup_hit = await process_single_file(
+        file_path, filename, case_id, user_id,
+        session_id=session.get("session_id"), is_scanned=session.get("is_scanned", False),
+        content_hash=sha256, size_bytes=size
+    )
+    return {"status": "complete", "transferSkipped": False, "dedup_hits": 1 if dedup_hit else 0}
+
+
+def abort_upload(upload_id: str, user_id: str):
+    session = get_upload(upload_id, user_id)
+    path = _staging_path(upload_id, session["filename"])
+    if os.path.exists(path):
+        os.unlink(path)
+    upload_sessions_collection.delete_one({"_id": upload_id})
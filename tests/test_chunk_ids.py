@@ -0,0 +1,42 @@
+import uuid
+
+from ingestion.chunk_ids import make_chunk_id, chunk_id_sequence
+
+
+def test_chunk_id_is_deterministic_uuid():
+    first = make_chunk_id("case1", "", "deed.pdf", "The vendor shall convey the property.")
+    second = make_chunk_id("case1", "", "deed.pdf", "The vendor shall convey the property.")
+    assert first == second
+    assert uuid.UUID(first).version == 5
+
+
+def test_chunk_id_depends_on_document_identity_and_text():
+    base = make_chunk_id("case1", "", "deed.pdf", "clause")
+    assert make_chunk_id("case2", "", "deed.pdf", "clause") != base
+    assert make_chunk_id("case1", "session-a", "deed.pdf", "clause") != base
+    assert make_chunk_id("case1", "", "lease.pdf", "clause") != base
+    assert make_chunk_id("case1", "", "deed.pdf", "clause.") != base
+    assert make_chunk_id("case1", "", "deed.pdf", "clause", occurrence=1) != base
+
+
+def test_sequence_numbers_repeated_texts():
+    next_id = chunk_id_sequence("case1", "", "deed.pdf")
+    ids = [next_id(text) for text in ["Signed.", "Preamble", "Signed.", "Signed."]]
+    assert len(set(ids)) == 4
+    assert ids[0] == make_chunk_id("case1", "", "deed.pdf", "Signed.", 0)
+    assert ids[2] == make_chunk_id("case1", "", "deed.pdf", "Signed.", 1)
+    assert ids[3] == make_chunk_id("case1", "", "deed.pdf", "Signed.", 2)
+
+
+def test_inserting_a_chunk_keeps_the_other_ids():
+    before = chunk_id_sequence("case1", "", "deed.pdf")
+    after = chunk_id_sequence("case1", "", "deed.pdf")
+    old = [before(t) for t in ["A", "B", "C"]]
+    new = [after(t) for t in ["A", "inserted", "B", "C"]]
+    assert [new[0], new[2], new[3]] == old
+
+
+def test_sequences_are_independent():
+    first = chunk_id_sequence("case1", "", "deed.pdf")
+    second = chunk_id_sequence("case1", "", "deed.pdf")
+    assert first("Signed.") == second("Signed.")
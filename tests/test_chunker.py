@@ -0,0 +1,69 @@
+from ingestion.chunker import LegalChunker, split_blocks, split_sentences, HEADING, CLAUSE, PARAGRAPH
+
+
+def count_words(texts):
+    return [len(t.split()) for t in texts]
+
+
+def make_chunker(**kwargs):
+    params = {"target_tokens": 20, "max_tokens": 30, "min_tokens": 5, "max_overlap_tokens": 8}
+    params.update(kwargs)
+    return LegalChunker(count_tokens=count_words, **params)
+
+
+def words(n, word="word"):
+    return " ".join([word] * n)
+
+
+def test_split_blocks_levels():
+    text = "SECTION 1 Definitions\nIn this Act:\n\n1. first clause\n(a) sub clause\nplain line"
+    blocks = split_blocks(text)
+    assert [level for level, _ in blocks] == [HEADING, CLAUSE, CLAUSE]
+    assert blocks[2][1] == "(a) sub clause\nplain line"
+
+
+def test_split_sentences_keeps_legal_abbreviations():
+    text = "Refer to Sec. 5 of the Act. The appeal in State v. Kumar was dismissed. Costs follow."
+    assert split_sentences(text) == [
+        "Refer to Sec. 5 of the Act.",
+        "The appeal in State v. Kumar was dismissed.",
+        "Costs follow.",
+    ]
+
+
+def test_empty_text_gives_no_chunks():
+    assert make_chunker().split_text("") == []
+    assert make_chunker().split_text("\n\n  \n") == []
+
+
+def test_paragraphs_are_packed_up_to_target():
+    text = "\n\n".join(words(8, w) for w in ("alpha", "beta", "gamma", "delta"))
+    chunks = make_chunker().split_text(text)
+    assert chunks == [
+        f"{words(8, 'alpha')}\n\n{words(8, 'beta')}",
+        f"{words(8, 'gamma')}\n\n{words(8, 'delta')}",
+    ]
+
+
+def test_heading_starts_a_new_chunk():
+    text = f"{words(10, 'alpha')}\n\nSECTION 2 Remedies\n{words(6, 'beta')}"
+    chunks = make_chunker().split_text(text)
+    assert len(chunks) == 2
+    assert chunks[1].startswith("SECTION 2 Remedies")
+
+
+def test_long_paragraph_is_cut_between_sentences_with_overlap():
+    sentences = [f"{words(9, w)}." for w in ("One", "Two", "Three", "Four")]
+    chunks = make_chunker(max_tokens=25, max_overlap_tokens=10).split_text(" ".join(sentences))
+    assert len(chunks) > 1
+    # The sentence a cut falls after is repeated at the start of the next chunk
+    assert chunks[0].endswith(sentences[1])
+    assert chunks[1].startswith(sentences[1])
+    assert all(len(c.split()) <= 25 for c in chunks)
+
+
+def test_trailing_fragment_is_folded_into_previous_chunk():
+    text = f"{words(18, 'alpha')}\n\n{words(15, 'beta')}\n\n{words(2, 'gamma')}"
+    chunks = make_chunker().split_text(text)
+    assert len(chunks) == 2
+    assert chunks[-1].endswith(words(2, "gamma"))
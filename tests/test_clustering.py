@@ -0,0 +1,54 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from utils.clustering import kmeans, representative_indices  # noqa: E402
+
+
+def blobs(sizes, dim=8, seed=0):
+    """Tight groups of unit vectors around orthogonal axes; returns (vectors, group of each row)."""
+    rng = np.random.default_rng(seed)
+    rows, groups = [], []
+    for group, size in enumerate(sizes):
+        center = np.zeros(dim)
+        center[group] = 1.0
+        rows.append(center + rng.normal(scale=0.05, size=(size, dim)))
+        groups += [group] * size
+    vectors = np.vstack(rows).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True), np.array(groups)
+
+
+def test_kmeans_recovers_separated_groups():
+    vectors, groups = blobs([10, 10, 10])
+    centroids, labels = kmeans(vectors, 3)
+    assert centroids.shape == (3, vectors.shape[1])
+    # Each group lands in exactly one cluster and no two groups share one
+    mapping = {g: set(labels[groups == g].tolist()) for g in range(3)}
+    assert all(len(found) == 1 for found in mapping.values())
+    assert len({next(iter(found)) for found in mapping.values()}) == 3
+    np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, rtol=1e-5)
+
+
+def test_kmeans_clips_k_to_rows():
+    vectors, _ = blobs([2])
+    centroids, labels = kmeans(vectors, 5)
+    assert len(centroids) == 2
+    assert sorted(labels.tolist()) == [0, 1]
+
+
+def test_kmeans_is_reproducible_for_a_seed():
+    vectors, _ = blobs([6, 6, 6, 6])
+    first = kmeans(vectors, 4, seed=7)
+    second = kmeans(vectors, 4, seed=7)
+    np.testing.assert_array_equal(first[1], second[1])
+
+
+def test_representatives_lead_with_largest_cluster():
+    vectors, groups = blobs([3, 12, 6])
+    picks = representative_indices(vectors * 5.0, 3)
+    assert [groups[i] for i in picks] == [1, 2, 0]
+    assert len(set(picks)) == 3
+
+
+def test_representatives_of_nothing():
+    assert representative_indices(np.empty((0, 4), dtype=np.float32), 3) == []
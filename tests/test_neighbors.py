@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+models = pytest.importorskip("qdrant_client").models
+
+from rag.neighbors import merge_overlap, expand_with_neighbors  # noqa: E402
+
+CASE_FILTER = models.Filter(must=[models.FieldCondition(key="case_id", match=models.MatchValue(value="case1"))])
+
+
+def point(point_id, text, source="deed.pdf", chunk_index=None):
+    payload = {"text": text, "source": source}
+    if chunk_index is not None:
+        payload["chunk_index"] = chunk_index
+    return SimpleNamespace(id=point_id, payload=payload)
+
+
+class FakeClient:
+    def __init__(self, neighbors=(), error=None):
+        self.neighbors = list(neighbors)
+        self.error = error
+        self.scrolls = []
+
+    def scroll(self, **kwargs):
+        self.scrolls.append(kwargs)
+        if self.error:
+            raise self.error
+        return self.neighbors, None
+
+
+def test_merge_overlap_drops_shared_text():
+    left = "The tenant shall pay rent monthly"
+    right = "pay rent monthly in advance."
+    assert merge_overlap(left, right) == "The tenant shall pay rent monthly in advance."
+
+
+def test_merge_overlap_without_shared_text_joins_on_newline():
+    assert merge_overlap("First clause.", "Second clause.") == "First clause.\nSecond clause."
+
+
+def test_expand_merges_window_in_one_scroll():
+    chunks = {i: point(f"n{i}", f"chunk {i}", chunk_index=i) for i in range(3, 8)}
+    client = FakeClient(chunks.values())
+    expanded = expand_with_neighbors(client, "chunks", CASE_FILTER, [chunks[5]], window=1)
+    assert expanded == {"n5": "chunk 4\nchunk 5\nchunk 6"}
+    assert len(client.scrolls) == 1
+    assert client.scrolls[0]["limit"] == 3
+
+
+def test_expand_does_not_repeat_neighbours_of_higher_ranked_points():
+    chunks = {i: point(f"n{i}", f"chunk {i}", chunk_index=i) for i in range(4, 8)}
+    expanded = expand_with_neighbors(FakeClient(chunks.values()), "chunks", CASE_FILTER,
+                                     [chunks[5], chunks[6]], window=1)
+    assert expanded["n5"] == "chunk 4\nchunk 5\nchunk 6"
+    assert expanded["n6"] == "chunk 6\nchunk 7"
+
+
+def test_expand_stops_at_gaps_and_other_documents():
+    hit = point("n5", "chunk 5", chunk_index=5)
+    neighbors = [hit, point("x4", "other 4", source="lease.pdf", chunk_index=4), point("n7", "chunk 7", chunk_index=7)]
+    expanded = expand_with_neighbors(FakeClient(neighbors), "chunks", CASE_FILTER, [hit], window=2)
+    assert expanded == {"n5": "chunk 5"}
+
+
+def test_expand_skips_points_without_ordinals():
+    client = FakeClient()
+    assert expand_with_neighbors(client, "chunks", CASE_FILTER, [point("legacy", "old chunk")], window=1) == {}
+    assert client.scrolls == []
+
+
+def test_expand_disabled_or_failing_returns_nothing():
+    hit = point("n5", "chunk 5", chunk_index=5)
+    assert expand_with_neighbors(FakeClient([hit]), "chunks", CASE_FILTER, [hit], window=0) == {}
+    failing = FakeClient(error=RuntimeError("qdrant unavailable"))
+    assert expand_with_neighbors(failing, "chunks", CASE_FILTER, [hit], window=1) == {}
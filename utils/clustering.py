@@ -0,0 +1,66 @@
+import numpy as np
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 25, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Spherical k-means (cosine) over L2-normalised rows, fully vectorised.
+    k-means++ seeding, stops early once assignments no longer change.
+
+    Returns (centroids [k, dim], labels [n]). k is clipped to the number of rows.
+    """
+    n = len(vectors)
+    k = min(k, n)
+    rng = np.random.default_rng(seed)
+
+    # k-means++: each new seed drawn with probability proportional to its cosine distance
+    centroids = np.empty((k, vectors.shape[1]), dtype=vectors.dtype)
+    centroids[0] = vectors[rng.integers(n)]
+    distance = 1.0 - vectors @ centroids[0]
+    for i in range(1, k):
+        weights = np.clip(distance, 0.0, None).astype(np.float64)
+        total = weights.sum()
+        pick = rng.choice(n, p=weights / total) if total > 0 else rng.integers(n)
+        centroids[i] = vectors[pick]
+        distance = np.minimum(distance, 1.0 - vectors @ centroids[i])
+
+    labels = np.full(n, -1)
+    for _ in range(iterations):
+        similarity = vectors @ centroids.T
+        new_labels = similarity.argmax(axis=1)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=k)
+        # An emptied cluster restarts at the point its current centroid serves worst
+        for empty in np.flatnonzero(counts == 0):
+            worst = similarity[np.arange(n), labels].argmin()
+            sums[empty] = vectors[worst]
+            similarity[worst, labels[worst]] = np.inf
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms == 0, 1.0, norms)
+
+    return centroids, labels
+
+
+def representative_indices(vectors: np.ndarray, k: int, seed: int = 0) -> list[int]:
+    """
+    Row index of the member closest to each k-means centroid, largest
+    cluster first, so the most widely covered topics lead.
+    """
+    if len(vectors) == 0:
+        return []
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+    centroids, labels = kmeans(vectors, k, seed=seed)
+
+    similarity = (vectors * centroids[labels]).sum(axis=1)
+    counts = np.bincount(labels, minlength=len(centroids))
+    picks = []
+    for cluster in np.argsort(-counts, kind="stable"):
+        members = np.flatnonzero(labels == cluster)
+        if len(members):
+            picks.append(int(members[similarity[members].argmax()]))
+    return picks